@@ -8,6 +8,10 @@ load_dotenv()
 def create_app():
     app = Flask(__name__)
 
+    # Encode JSON with orjson when it is installed
+    from app.utils.fast_json import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # Configure CORS for iOS app
     CORS(app, resources={
         r"/api/*": {
@@ -22,53 +26,60 @@ def create_app():
     app.config['SUPABASE_URL'] = os.getenv('SUPABASE_URL')
     app.config['SUPABASE_KEY'] = os.getenv('SUPABASE_KEY')
     app.config['GEMINI_API_KEY'] = os.getenv('GEMINI_API_KEY')
+    app.config['SUPABASE_JWT_SECRET'] = os.getenv('SUPABASE_JWT_SECRET')  # Enables local token verification
+    app.config['BOOTSTRAP_DEMO_USER'] = os.getenv('BOOTSTRAP_DEMO_USER', 'True') == 'True'
+
+    # Response cache (in-process unless a shared Redis URL is configured)
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+    app.config['RESPONSE_CACHE_TTL'] = int(os.getenv('RESPONSE_CACHE_TTL', '60'))
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+    # Compression of JSON and text responses (brotli requires the brotli package)
+    app.config['RESPONSE_COMPRESSION_MIN_BYTES'] = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+    app.config['RESPONSE_GZIP_LEVEL'] = int(os.getenv('RESPONSE_GZIP_LEVEL', '6'))
+    app.config['RESPONSE_BROTLI_QUALITY'] = int(os.getenv('RESPONSE_BROTLI_QUALITY', '1'))
+
+    # Push events (in-process unless a shared Redis URL is configured)
+    app.config['EVENTS_REDIS_URL'] = os.getenv('EVENTS_REDIS_URL') or os.getenv('CACHE_REDIS_URL')
+    # Each open stream holds a worker thread: by default half of a worker's threads, at most 2 per user
+    app.config['EVENT_STREAM_MAX_CLIENTS'] = int(os.getenv(
+        'EVENT_STREAM_MAX_CLIENTS', str(max(1, int(os.getenv('GUNICORN_THREADS', '8')) // 2))
+    ))  # Per worker process
+    app.config['EVENT_STREAM_MAX_PER_USER'] = int(os.getenv('EVENT_STREAM_MAX_PER_USER', '2'))  # Per worker process
+
+    # Request tracing: fraction of requests timed by stage, and how slow a traced request must be to be logged
+    app.config['TRACE_SAMPLE_RATE'] = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+    app.config['TRACE_LOG_MIN_MS'] = float(os.getenv('TRACE_LOG_MIN_MS', '1000'))
+    app.config['METRICS_PUBLIC'] = os.getenv('METRICS_PUBLIC', 'False') == 'True'  # Serve /api/metrics to non-local clients
 
     # Register blueprints
-    from app.routes import auth, vacations, photos, ai, friends
+    from app.routes import auth, vacations, photos, ai, friends, locations, search, sync, events, metrics
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(vacations.bp)
     app.register_blueprint(photos.bp)
     app.register_blueprint(ai.bp)
     app.register_blueprint(friends.bp)
+    app.register_blueprint(locations.bp)
+    app.register_blueprint(search.bp)
+    app.register_blueprint(sync.bp)
+    app.register_blueprint(events.bp)
+    app.register_blueprint(metrics.bp)
+
+    from app.middleware.compression import init_compression
+    init_compression(app)
+
+    from app.services.tracing import init_tracing
+    init_tracing(app)
 
     # Health check endpoint
     @app.route('/api/health')
     def health():
         return {'status': 'ok', 'message': 'Roam API is running'}
 
-    # Initialize demo user on startup
-    with app.app_context():
-        initialize_demo_user()
+    # Make sure the demo user exists without blocking startup
+    if app.config['BOOTSTRAP_DEMO_USER']:
+        from app.services.demo_user import bootstrap_demo_user
+        bootstrap_demo_user(app)
 
     return app
-
-
-def initialize_demo_user():
-    """Ensure demo user exists in database"""
-    try:
-        from app.services.supabase_service import get_supabase_client
-
-        supabase = get_supabase_client()
-        demo_user_id = "demo-user-123"
-
-        # Check if demo user exists
-        result = supabase.table('users').select('*').eq('id', demo_user_id).execute()
-
-        if not result.data or len(result.data) == 0:
-            # Create demo user
-            user_data = {
-                'id': demo_user_id,
-                'name': 'Demo User',
-                'email': 'demo@roamapp.com',
-                'color': '#FF6B6B'
-            }
-
-            supabase.table('users').insert(user_data).execute()
-            print("✅ Demo user created successfully")
-        else:
-            print("✅ Demo user already exists")
-
-    except Exception as e:
-        print(f"⚠️ Warning: Could not initialize demo user: {str(e)}")
-        print("   The app will still work, but you may need to create the user manually.")
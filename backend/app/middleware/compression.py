@@ -0,0 +1,86 @@
+from flask import Response, current_app, request
+from typing import Optional
+import gzip
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Defaults, overridable through app.config
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 1
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/csv'}
+
+# Preferred first when a client accepts several equally
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def init_compression(app):
+    """Compress JSON and text responses for clients that accept gzip or brotli"""
+    app.after_request(compress_response)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    after_request hook: compress a buffered response body in place
+
+    Streamed responses (event streams, files), bodies under the size
+    threshold and bodies that already carry a Content-Encoding are sent as
+    they are.
+    """
+    if (
+        request.method == 'HEAD'
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or 'no-transform' in response.headers.get('Cache-Control', '')
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < current_app.config.get('RESPONSE_COMPRESSION_MIN_BYTES', DEFAULT_MIN_BYTES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed bytes differ from what a strong ETag of the JSON names
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Best content coding the current request accepts, or None for identity"""
+    return request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+
+
+def accepts_encoding(encoding: str) -> bool:
+    """Whether the current request accepts a content coding"""
+    return request.accept_encodings[encoding] > 0
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=current_app.config.get('RESPONSE_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY))
+    return gzip.compress(body, current_app.config.get('RESPONSE_GZIP_LEVEL', DEFAULT_GZIP_LEVEL))
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return gzip.decompress(body)
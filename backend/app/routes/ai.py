@@ -1,14 +1,27 @@
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth, get_current_user
-from app.services.gemini_service import generate_itinerary_from_photos, analyze_single_photo
+from app.services.gemini_service import (
+    generate_itinerary_from_photos_async, analyze_single_photo, analyze_photos_batch, update_itinerary_with_photos,
+    capture_date_range
+)
 from app.services.supabase_service import get_supabase_client
+from app.services.async_service import run_blocking, execute_async, gather_queries, fetch_all_rows, fetch_rows_in
+from app.services.demo_user import DEMO_USER_ID, ensure_demo_user
+from app.routes.vacations import (
+    ACTIVITY_ORDER, LOCATION_ORDER, PHOTO_ORDER, assemble_vacation_responses, invalidate_vacation_cache, materialise_vacation, notify_vacation_created
+)
+from app.services.search_service import index_vacation
+from app.services.itinerary_records import Activity, Photo
+from app.services.vacation_documents import fetch_vacation_documents, source_version, store_vacation_documents
+from app.utils.json_stream import iter_json_members
+import asyncio
 import uuid
 
 bp = Blueprint('ai', __name__, url_prefix='/api/ai')
 
 
 @bp.route('/generate-itinerary', methods=['POST'])
-def generate_itinerary():
+async def generate_itinerary():
     """
     Generate AI itinerary from uploaded photos
 
@@ -23,41 +36,33 @@ def generate_itinerary():
         ],
         "title": "European Adventure" (optional)
     }
+
+    The photos array is parsed from the request stream one photo at a time
+    into a compact PhotoBatch, so large camera rolls are never held as a
+    whole body plus a dict per photo.
     """
     try:
-        # Use a fixed demo user UUID
-        demo_user_id = "00000000-0000-0000-0000-000000000001"
-        
-        # Ensure demo user exists in database
-        supabase = get_supabase_client()
+        # Use a fixed demo user UUID (created once, not checked per request)
+        await run_blocking(ensure_demo_user)
+        user_id = DEMO_USER_ID
+
+        if not request.is_json:
+            return jsonify({'error': 'Request body must be JSON'}), 400
+
         try:
-            existing_user = supabase.table('users').select('id').eq('id', demo_user_id).execute()
-            if not existing_user.data or len(existing_user.data) == 0:
-                # Create demo user
-                demo_user = {
-                    'id': demo_user_id,
-                    'email': 'demo@roam.app',
-                    'name': 'Demo User',
-                    'color': '#FF6B6B'
-                }
-                supabase.table('users').insert(demo_user).execute()
-                print("✅ Created demo user in database")
-        except Exception as user_error:
-            print(f"⚠️ Demo user check: {user_error}")
-        
-        user_id = demo_user_id
+            photos, fields = _read_photos_body('title')
+        except ValueError as e:
+            return jsonify({'error': f'Invalid request body: {str(e)}'}), 400
 
-        data = request.get_json()
-        photos = data.get('photos', [])
-        title = data.get('title', 'My Vacation')
+        title = fields.get('title', 'My Vacation')
 
-        if not photos or len(photos) == 0:
+        if len(photos) == 0:
             return jsonify({'error': 'No photos provided'}), 400
 
         print(f"Generating itinerary from {len(photos)} photos for user {user_id}")
 
         # Generate itinerary using Gemini
-        result = generate_itinerary_from_photos(photos)
+        result = await generate_itinerary_from_photos_async(photos)
 
         if result.get('error'):
             return jsonify({'error': result['error']}), 400
@@ -66,10 +71,7 @@ def generate_itinerary():
         vacation_id = str(uuid.uuid4())
 
         # Extract date range from photos
-        dates = [p.get('captureDate') for p in photos if p.get('captureDate')]
-        dates.sort()
-        start_date = dates[0] if dates else None
-        end_date = dates[-1] if dates else None
+        start_date, end_date = capture_date_range(photos.capture_dates)
 
         vacation_data = {
             'id': vacation_id,
@@ -81,63 +83,55 @@ def generate_itinerary():
         }
 
         supabase = get_supabase_client()
-        supabase.table('vacations').insert(vacation_data).execute()
 
-        # Fetch user info for owner field
-        user_response = supabase.table('users').select('id, name, color').eq('id', user_id).execute()
+        # Insert the vacation and fetch user info for the owner field together
+        _, user_response = await gather_queries(
+            supabase.table('vacations').insert(vacation_data),
+            supabase.table('users').select('id, name, color').eq('id', user_id)
+        )
         user_info = user_response.data[0] if user_response.data else None
 
-        # Create locations
+        # Build every row first, then write each table with one bulk insert
+        location_rows = []
+        activity_rows = []
+        photo_rows = []
+
         for location in result['locations']:
             location_id = str(uuid.uuid4())
 
-            location_data = {
+            location_rows.append({
                 'id': location_id,
                 'vacation_id': vacation_id,
-                'name': location['name'],
-                'latitude': location['coordinate']['latitude'],
-                'longitude': location['coordinate']['longitude'],
-                'visit_date': location.get('visitDate')
-            }
-
-            supabase.table('locations').insert(location_data).execute()
+                'name': location.name,
+                'latitude': location.latitude,
+                'longitude': location.longitude,
+                'visit_date': location.visit_date
+            })
 
             # Create activities for this location
-            for activity in location.get('activities', []):
-                activity_data = {
-                    'id': str(uuid.uuid4()),
-                    'location_id': location_id,
-                    'title': activity['title'],
-                    'description': activity['description'],
-                    'time': activity.get('time'),
-                    'ai_generated': activity.get('aiGenerated', True)
-                }
-
-                supabase.table('activities').insert(activity_data).execute()
-
-            # Associate photos with this location
-            for photo in photos:
-                photo_coords = photo.get('coordinates')
-                if photo_coords:
-                    # Check if photo is close to this location
-                    photo_lat = photo_coords['latitude']
-                    photo_lon = photo_coords['longitude']
-                    loc_lat = location['coordinate']['latitude']
-                    loc_lon = location['coordinate']['longitude']
-
-                    # Simple distance check (within ~10km)
-                    if abs(photo_lat - loc_lat) < 0.1 and abs(photo_lon - loc_lon) < 0.1:
-                        photo_data = {
-                            'id': str(uuid.uuid4()),
-                            'location_id': location_id,
-                            'image_url': photo['imageURL'],
-                            'thumbnail_url': photo.get('thumbnailURL'),
-                            'capture_date': photo.get('captureDate'),
-                            'latitude': photo_lat,
-                            'longitude': photo_lon
-                        }
-
-                        supabase.table('photos').insert(photo_data).execute()
+            for activity in location.activities:
+                activity_rows.append(_activity_row(location_id, activity))
+
+            # Associate photos with this location (simple distance check, within ~10km)
+            nearby = photos.near(location.latitude, location.longitude, 0.1)
+            photo_rows.extend(_photo_row(location_id, photos[i]) for i in nearby)
+
+        await _insert_location_rows(supabase, location_rows, activity_rows, photo_rows)
+
+        # Materialise the vacation document from the rows just written instead of reading them back
+        stored = await fetch_vacation_documents([vacation_id], supabase)
+        if stored is not None:
+            document = assemble_vacation_responses(
+                [vacation_data], {user_id: user_info} if user_info else {}, location_rows, activity_rows, photo_rows
+            )[0]
+            await store_vacation_documents([(vacation_data, document, source_version(stored.get(vacation_id)))], supabase)
+
+        await run_blocking(invalidate_vacation_cache, vacation_id, user_id, supabase)
+
+        # Index the new rows directly instead of reading them back on the next search
+        index_vacation(vacation_data, location_rows, activity_rows)
+
+        await run_blocking(notify_vacation_created, vacation_data, supabase)
 
         # Return complete vacation data
         vacation_response = {
@@ -146,7 +140,7 @@ def generate_itinerary():
             'startDate': start_date,
             'endDate': end_date,
             'aiGeneratedItinerary': result['itinerary'],
-            'locations': result['locations']
+            'locations': [location.to_api() for location in result['locations']]
         }
 
         # Add owner info if available
@@ -167,6 +161,268 @@ def generate_itinerary():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/update-itinerary/<vacation_id>', methods=['POST'])
+async def update_itinerary(vacation_id):
+    """
+    Add photos to an existing vacation and update its itinerary incrementally
+
+    Only new or changed location clusters are analyzed, and only the days
+    touched by the new photos are rewritten. Photos whose imageURL is already
+    stored for the vacation are ignored, so resending the full set is safe.
+
+    Request body:
+    {
+        "photos": [
+            {
+                "imageURL": "https://...",
+                "captureDate": "2024-10-03T10:30:00Z",
+                "coordinates": {"latitude": 48.8566, "longitude": 2.3522}
+            }
+        ]
+    }
+    """
+    try:
+        # Use a fixed demo user UUID
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        data = request.get_json()
+        photos = data.get('photos', [])
+
+        if not photos or len(photos) == 0:
+            return jsonify({'error': 'No photos provided'}), 400
+
+        supabase = get_supabase_client()
+
+        # Verify ownership while loading the stored locations. Stored rows are
+        # paged: a truncated photo list would make resent photos look new
+        vacation_result, locations = await asyncio.gather(
+            execute_async(supabase.table('vacations').select('*').eq('id', vacation_id).eq('user_id', user_id)),
+            fetch_all_rows(lambda: supabase.table('locations').select('*').eq('vacation_id', vacation_id),
+                           order=LOCATION_ORDER)
+        )
+
+        if not vacation_result.data:
+            return jsonify({'error': 'Vacation not found or unauthorized'}), 404
+
+        vacation = vacation_result.data[0]
+
+        # Load stored activities and photos in bulk
+        location_ids = [loc['id'] for loc in locations]
+
+        activities, existing_photos = await asyncio.gather(
+            fetch_rows_in(lambda: supabase.table('activities').select('*'), 'location_id', location_ids,
+                          order=ACTIVITY_ORDER),
+            fetch_rows_in(lambda: supabase.table('photos').select('location_id, image_url, capture_date'),
+                          'location_id', location_ids, order=PHOTO_ORDER)
+        )
+
+        for location in locations:
+            location['activities'] = [a for a in activities if a['location_id'] == location['id']]
+
+        stored_urls = {p['image_url'] for p in existing_photos}
+        new_photos = [p for p in photos if p.get('imageURL') and p['imageURL'] not in stored_urls]
+
+        if not new_photos:
+            return jsonify({'error': 'All photos are already part of this vacation'}), 400
+
+        print(f"Updating itinerary of vacation {vacation_id} with {len(new_photos)} new photos")
+
+        result = await run_blocking(update_itinerary_with_photos, vacation, locations, existing_photos, new_photos)
+
+        if result.get('error'):
+            return jsonify({'error': result['error']}), 400
+
+        location_rows = []
+        activity_rows = []
+        photo_rows = []
+
+        # Append activities and photos to locations that gained photos
+        for location in result['updated_locations']:
+            activity_rows.extend(_activity_row(location.id, activity) for activity in location.activities)
+            photo_rows.extend(_photo_row(location.id, photo) for photo in location.photos)
+
+        # Create locations for new clusters
+        for location in result['new_locations']:
+            location_rows.append({
+                'id': location.id,
+                'vacation_id': vacation_id,
+                'name': location.name,
+                'latitude': location.latitude,
+                'longitude': location.longitude,
+                'visit_date': location.visit_date
+            })
+
+            activity_rows.extend(_activity_row(location.id, activity) for activity in location.activities)
+            photo_rows.extend(_photo_row(location.id, photo) for photo in location.photos)
+
+        itinerary_update = {
+            'start_date': result['start_date'],
+            'end_date': result['end_date'],
+            'ai_itinerary': result['itinerary']
+        }
+        vacation.update(itinerary_update)
+
+        # Write the merged itinerary back to the existing vacation alongside the new rows
+        await _insert_location_rows(
+            supabase, location_rows, activity_rows, photo_rows,
+            supabase.table('vacations').update(itinerary_update).eq('id', vacation_id)
+        )
+
+        document = await materialise_vacation(vacation, supabase)
+
+        await run_blocking(invalidate_vacation_cache, vacation_id, user_id, supabase)
+
+        return jsonify({
+            'vacation': document,
+            'message': 'Itinerary updated successfully'
+        }), 200
+
+    except Exception as e:
+        print(f"Update itinerary error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Most photos accepted by one /segment-trips request
+MAX_SEGMENT_PHOTOS = 100000
+
+
+@bp.route('/segment-trips', methods=['POST'])
+def segment_trips():
+    """
+    Split a camera roll into candidate vacations
+
+    Request body:
+    {
+        "photos": [
+            {
+                "id": "IMG_0001.HEIC",
+                "captureDate": "2024-10-01T10:30:00+02:00",
+                "location": {"latitude": 48.8566, "longitude": 2.3522}
+            }
+        ],
+        "home": {"latitude": 52.52, "longitude": 13.40} (optional, inferred otherwise),
+        "maxGapHours": 48, "homeRadiusKm": 50, "minPhotos": 5 (all optional)
+    }
+
+    Photos are in the shape returned by /api/photos/metadata ('coordinates'
+    is accepted in place of 'location'). Each candidate trip lists its photo
+    ids, which can be posted to /generate-itinerary as one vacation.
+    """
+    # Imported here so app startup does not load NumPy
+    from app.services import trip_segmentation
+
+    try:
+        data = request.get_json()
+        photos = data.get('photos', [])
+
+        if not photos or len(photos) == 0:
+            return jsonify({'error': 'No photos provided'}), 400
+
+        if len(photos) > MAX_SEGMENT_PHOTOS:
+            return jsonify({'error': f'At most {MAX_SEGMENT_PHOTOS} photos per request'}), 400
+
+        home = data.get('home')
+        if home is not None:
+            try:
+                home = (float(home['latitude']), float(home['longitude']))
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': 'home must have latitude and longitude'}), 400
+
+        try:
+            options = {
+                'max_gap_hours': float(data.get('maxGapHours', trip_segmentation.MAX_GAP_HOURS)),
+                'home_radius_km': float(data.get('homeRadiusKm', trip_segmentation.HOME_RADIUS_KM)),
+                'min_photos': int(data.get('minPhotos', trip_segmentation.MIN_TRIP_PHOTOS))
+            }
+        except (TypeError, ValueError):
+            return jsonify({'error': 'maxGapHours, homeRadiusKm and minPhotos must be numbers'}), 400
+
+        photos = [
+            {**photo, 'coordinates': photo.get('coordinates') or photo.get('location')}
+            for photo in photos if isinstance(photo, dict)
+        ]
+
+        result = trip_segmentation.segment_trips(photos, home=home, **options)
+
+        return jsonify({
+            'home': result['home'],
+            'trips': result['trips'],
+            'count': len(result['trips'])
+        }), 200
+
+    except Exception as e:
+        print(f"Segment trips error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+async def _insert_location_rows(supabase, location_rows, activity_rows, photo_rows, *extra_queries):
+    """
+    Bulk insert locations, then their activities and photos concurrently
+
+    Activities and photos reference locations, so they are written once the
+    locations exist. extra_queries run alongside them.
+    """
+    if location_rows:
+        await execute_async(supabase.table('locations').insert(location_rows))
+
+    queries = list(extra_queries)
+    if activity_rows:
+        queries.append(supabase.table('activities').insert(activity_rows))
+    if photo_rows:
+        queries.append(supabase.table('photos').insert(photo_rows))
+
+    if queries:
+        await gather_queries(*queries)
+
+
+def _read_photos_body(*fields):
+    """
+    Parse a JSON request body holding a 'photos' array
+
+    Returns (PhotoBatch, {field: value} for the named top-level fields).
+    Raises ValueError if the body is not a JSON object or a photo is not an
+    object.
+    """
+    # Imported here so app startup does not load NumPy
+    from app.services.photo_metadata import PhotoBatch
+
+    photos = PhotoBatch()
+    values = {}
+
+    for key, value in iter_json_members(request.stream, stream_arrays=('photos',)):
+        if key == 'photos':
+            photos.append(value)
+        elif key in fields:
+            values[key] = value
+
+    return photos, values
+
+
+def _activity_row(location_id: str, activity: Activity) -> dict:
+    """Build an activities table row from an activity record"""
+    return {
+        'id': activity.id or str(uuid.uuid4()),
+        'location_id': location_id,
+        'title': activity.title,
+        'description': activity.description,
+        'time': activity.time,
+        'ai_generated': activity.ai_generated
+    }
+
+
+def _photo_row(location_id: str, photo: Photo) -> dict:
+    """Build a photos table row from a photo record"""
+    return {
+        'id': str(uuid.uuid4()),
+        'location_id': location_id,
+        'image_url': photo.image_url,
+        'thumbnail_url': photo.thumbnail_url,
+        'capture_date': photo.capture_date,
+        'latitude': photo.latitude,
+        'longitude': photo.longitude
+    }
+
+
 @bp.route('/analyze-photo', methods=['POST'])
 def analyze_photo():
     """Analyze a single photo using Gemini Vision"""
@@ -184,3 +440,32 @@ def analyze_photo():
     except Exception as e:
         print(f"Analyze photo error: {str(e)}")
         return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/analyze-photos', methods=['POST'])
+def analyze_photos():
+    """
+    Analyze many photos at once using Gemini Vision
+
+    Photos are grouped into shared model calls and identical images are only
+    analyzed once. Results are returned in upload order.
+    """
+    try:
+        if 'photos' not in request.files:
+            return jsonify({'error': 'No photos provided'}), 400
+
+        files = request.files.getlist('photos')
+
+        if not files or len(files) == 0:
+            return jsonify({'error': 'No photos provided'}), 400
+
+        results = analyze_photos_batch([file.read() for file in files])
+
+        return jsonify({
+            'results': results,
+            'count': len(results)
+        }), 200
+
+    except Exception as e:
+        print(f"Analyze photos error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from app.services.supabase_service import get_supabase_client
+from app.services.supabase_service import get_supabase_client, get_auth_client, forget_token
 from app.middleware.auth_middleware import require_auth, get_current_user
 import random
 
@@ -21,9 +21,10 @@ def signup():
             return jsonify({'error': 'Email, password, and name are required'}), 400
 
         supabase = get_supabase_client()
+        auth_client = get_auth_client()
 
         # Sign up user with auto-confirm for development
-        auth_response = supabase.auth.sign_up({
+        auth_response = auth_client.sign_up({
             'email': email,
             'password': password,
             'options': {
@@ -84,7 +85,7 @@ def signup():
         else:
             # No session (email confirmation required), sign in directly
             try:
-                login_response = supabase.auth.sign_in_with_password({
+                login_response = auth_client.sign_in_with_password({
                     'email': email,
                     'password': password
                 })
@@ -133,7 +134,7 @@ def login():
         supabase = get_supabase_client()
 
         # Sign in user
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = get_auth_client().sign_in_with_password({
             'email': email,
             'password': password
         })
@@ -207,8 +208,12 @@ def get_me():
 def logout():
     """Logout user"""
     try:
-        supabase = get_supabase_client()
-        supabase.auth.sign_out()
+        token = request.headers['Authorization'].split()[1]
+        forget_token(token)
+
+        # Revoke only the session this token belongs to (the default scope signs
+        # the user out of every device); the shared client holds no user session
+        get_auth_client().admin.sign_out(token, scope='local')
         return jsonify({'message': 'Logged out successfully'}), 200
     except Exception as e:
         print(f"Logout error: {str(e)}")
@@ -0,0 +1,100 @@
+from flask import Blueprint, Response, current_app, request, jsonify
+from app.middleware.auth_middleware import require_auth, get_current_user
+from app.services.event_bus import TooManyStreams, get_event_broker
+import json
+import time
+
+bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+
+# Comment line sent when idle, so proxies keep the connection and dead clients are noticed
+EVENT_HEARTBEAT_SECONDS = 15
+
+# Streams are closed after this long; EventSource reconnects with Last-Event-ID
+EVENT_STREAM_MAX_SECONDS = 300
+
+# Reconnect delay suggested to clients
+EVENT_RETRY_MILLISECONDS = 5000
+
+# Defaults for app.config['EVENT_STREAM_MAX_CLIENTS'] and ['EVENT_STREAM_MAX_PER_USER']
+DEFAULT_MAX_STREAMS = 4
+DEFAULT_MAX_USER_STREAMS = 2
+
+
+@bp.route('', methods=['GET'])
+# @require_auth  # Disabled for testing
+def stream_events():
+    """
+    Server-sent event stream of changes relevant to the user
+
+    Events: vacation.created (own or a visible friend's vacation),
+    friend.requested and friend.accepted. Each carries ids only; clients
+    fetch details through GET /api/sync. A sync.required event means events
+    were dropped and a sync is needed. Reconnecting with the Last-Event-ID
+    header replays recent missed events, or sends sync.required when some of
+    them are no longer kept.
+    """
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        broker = get_event_broker()
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+
+        # Every open stream holds a worker thread; leave the rest for normal
+        # requests, and keep one user's tabs from taking all of them
+        try:
+            subscription, missed = broker.subscribe(
+                user_id,
+                last_event_id,
+                max_streams=current_app.config.get('EVENT_STREAM_MAX_CLIENTS', DEFAULT_MAX_STREAMS),
+                max_user_streams=current_app.config.get('EVENT_STREAM_MAX_PER_USER', DEFAULT_MAX_USER_STREAMS)
+            )
+        except TooManyStreams as e:
+            status = 429 if e.scope == 'user' else 503
+            return jsonify({'error': str(e)}), status, {'Retry-After': '30'}
+
+    except Exception as e:
+        print(f"Event stream error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    def stream():
+        yield f"retry: {EVENT_RETRY_MILLISECONDS}\n\n"
+
+        for event in missed:
+            yield format_event(event)
+
+        deadline = time.monotonic() + EVENT_STREAM_MAX_SECONDS
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+
+            event = subscription.get(timeout=min(EVENT_HEARTBEAT_SECONDS, remaining))
+
+            if subscription.overflowed:
+                yield format_event({'type': 'sync.required', 'data': {}})
+                return
+
+            yield format_event(event) if event else ': keepalive\n\n'
+
+    response = Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+    # Runs when the client disconnects or the stream ends, even if it never started
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+
+    return response
+
+
+def format_event(event):
+    """Encode an event in the text/event-stream format"""
+    lines = []
+    if event.get('id'):
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth, get_current_user
-from app.services.supabase_service import get_supabase_client
+from app.services.supabase_service import get_supabase_client, call_optional_rpc
+from app.services.async_service import run_blocking, fetch_rows_in
+from app.services.cache_service import invalidate_feeds
+from app.services.event_bus import publish_event
+from app.services.friend_graph import (
+    accepted_friends, is_friend, record_friendship, update_friendship, remove_friendship
+)
 import uuid
 
 bp = Blueprint('friends', __name__, url_prefix='/api/friends')
@@ -8,7 +14,7 @@ bp = Blueprint('friends', __name__, url_prefix='/api/friends')
 
 @bp.route('', methods=['GET'])
 # @require_auth  # Disabled for testing
-def get_friends():
+async def get_friends():
     """Get user's friend list"""
     try:
         # user = get_current_user()
@@ -17,42 +23,27 @@ def get_friends():
 
         supabase = get_supabase_client()
 
-        # Get all friends (both directions)
-        friends_result = supabase.table('friends').select('*').or_(f'user_id.eq.{user_id},friend_id.eq.{user_id}').eq('status', 'accepted').execute()
+        # Get all friends (both directions) from the cached friend graph
+        friendships = await run_blocking(accepted_friends, user_id, supabase)
 
-        friends = []
-
-        for friendship in friends_result.data:
-            # Determine which ID is the friend
-            friend_id = friendship['friend_id'] if friendship['user_id'] == user_id else friendship['user_id']
-            is_visible = friendship.get('is_visible', True) if friendship['user_id'] == user_id else True
-
-            # Get friend's profile
-            friend_result = supabase.table('users').select('*').eq('id', friend_id).execute()
+        # Profiles and counts for every friend in a constant number of queries
+        summaries = await load_friend_summaries([friend_id for friend_id, _ in friendships], supabase)
 
-            if friend_result.data:
-                friend_profile = friend_result.data[0]
-
-                # Get friend's vacation count
-                vacation_count_result = supabase.table('vacations').select('id', count='exact').eq('user_id', friend_id).execute()
-                vacation_count = vacation_count_result.count if vacation_count_result.count else 0
+        friends = []
 
-                # Get total location count for friend
-                vacations_result = supabase.table('vacations').select('id').eq('user_id', friend_id).execute()
-                vacation_ids = [v['id'] for v in vacations_result.data] if vacations_result.data else []
+        for friend_id, is_visible in friendships:
+            summary = summaries.get(friend_id)
 
-                location_count = 0
-                if vacation_ids:
-                    location_count_result = supabase.table('locations').select('id', count='exact').in_('vacation_id', vacation_ids).execute()
-                    location_count = location_count_result.count if location_count_result.count else 0
+            if summary:
+                friend_profile = summary['profile']
 
                 friends.append({
                     'id': friend_profile['id'],
                     'name': friend_profile['name'],
                     'color': friend_profile['color'],
                     'profileImage': friend_profile.get('profile_image'),
-                    'vacationCount': vacation_count,
-                    'locationCount': location_count,
+                    'vacationCount': summary['vacation_count'],
+                    'locationCount': summary['location_count'],
                     'isVisible': is_visible
                 })
 
@@ -63,6 +54,60 @@ def get_friends():
         return jsonify({'error': str(e)}), 500
 
 
+async def load_friend_summaries(friend_ids, supabase):
+    """
+    Load profiles plus vacation and location counts for many friends at once
+
+    Uses the friend_summaries database function when it is installed (one
+    round-trip, see DATABASE_SCHEMA.md). Otherwise profiles and vacation ids
+    are read in paged batches, and locations counted from their vacation ids
+    read the same way, so the number of queries does not grow with the number
+    of friends and no count is cut short by PostgREST's row cap.
+
+    Returns dict of friend_id -> {'profile', 'vacation_count', 'location_count'}
+    """
+    if not friend_ids:
+        return {}
+
+    rows = await run_blocking(
+        call_optional_rpc, 'friend_summaries', {'p_friend_ids': list(friend_ids)}, supabase, 'batched queries'
+    )
+    if rows is not None:
+        return {
+            row['id']: {
+                'profile': row,
+                'vacation_count': row.get('vacation_count') or 0,
+                'location_count': row.get('location_count') or 0
+            }
+            for row in rows
+        }
+
+    profiles = await fetch_rows_in(lambda: supabase.table('users').select('*'), 'id', friend_ids)
+
+    summaries = {
+        profile['id']: {'profile': profile, 'vacation_count': 0, 'location_count': 0}
+        for profile in profiles
+    }
+
+    if not summaries:
+        return summaries
+
+    vacations = await fetch_rows_in(lambda: supabase.table('vacations').select('id, user_id'), 'user_id', list(summaries))
+
+    vacation_owner = {}
+    for vacation in vacations:
+        vacation_owner[vacation['id']] = vacation['user_id']
+        summaries[vacation['user_id']]['vacation_count'] += 1
+
+    locations = await fetch_rows_in(
+        lambda: supabase.table('locations').select('vacation_id'), 'vacation_id', list(vacation_owner)
+    )
+    for location in locations:
+        summaries[vacation_owner[location['vacation_id']]]['location_count'] += 1
+
+    return summaries
+
+
 @bp.route('/add', methods=['POST'])
 # @require_auth  # Disabled for testing
 def add_friend():
@@ -109,6 +154,9 @@ def add_friend():
         }
 
         supabase.table('friends').insert(friendship_data).execute()
+        record_friendship(friendship_data)
+
+        publish_event([friend_id], 'friend.requested', {'friendshipId': friendship_data['id'], 'userId': user_id})
 
         return jsonify({'message': 'Friend request sent'}), 201
 
@@ -137,6 +185,14 @@ def accept_friend(friendship_id):
         # Update status
         supabase.table('friends').update({'status': 'accepted'}).eq('id', friendship_id).execute()
 
+        friendship = friendship_result.data[0]
+        record_friendship({**friendship, 'status': 'accepted'})
+        invalidate_feeds([friendship['user_id'], friendship['friend_id']])
+
+        # Each side learns who the new friend is
+        publish_event([friendship['user_id']], 'friend.accepted', {'friendshipId': friendship_id, 'friendId': friendship['friend_id']})
+        publish_event([friendship['friend_id']], 'friend.accepted', {'friendshipId': friendship_id, 'friendId': friendship['user_id']})
+
         return jsonify({'message': 'Friend request accepted'}), 200
 
     except Exception as e:
@@ -160,6 +216,9 @@ def remove_friend(friend_id):
             f'and(user_id.eq.{user_id},friend_id.eq.{friend_id}),and(user_id.eq.{friend_id},friend_id.eq.{user_id})'
         ).execute()
 
+        remove_friendship(user_id, friend_id)
+        invalidate_feeds([user_id, friend_id])
+
         return jsonify({'message': 'Friend removed'}), 200
 
     except Exception as e:
@@ -184,6 +243,9 @@ def toggle_friend_visibility(friend_id):
         # Update visibility
         supabase.table('friends').update({'is_visible': is_visible}).eq('user_id', user_id).eq('friend_id', friend_id).execute()
 
+        update_friendship(user_id, friend_id, is_visible=is_visible)
+        invalidate_feeds([user_id])
+
         return jsonify({'message': 'Visibility updated'}), 200
 
     except Exception as e:
@@ -203,11 +265,7 @@ def get_friend_vacations(friend_id):
         supabase = get_supabase_client()
 
         # Verify friendship
-        friendship_result = supabase.table('friends').select('*').or_(
-            f'and(user_id.eq.{user_id},friend_id.eq.{friend_id}),and(user_id.eq.{friend_id},friend_id.eq.{user_id})'
-        ).eq('status', 'accepted').execute()
-
-        if not friendship_result.data:
+        if not is_friend(user_id, friend_id, supabase):
             return jsonify({'error': 'Not friends with this user'}), 403
 
         # Get friend's vacations
@@ -0,0 +1,141 @@
+from flask import Blueprint, request, jsonify
+from app.middleware.auth_middleware import require_auth, get_current_user
+from app.services.supabase_service import get_supabase_client
+from app.services.friend_graph import visible_friend_ids
+
+bp = Blueprint('locations', __name__, url_prefix='/api/locations')
+
+
+# Bounds for ?k= on /nearest and ?limit= on /within
+MAX_NEAREST = 100
+MAX_WITHIN = 5000
+
+# Largest ?radiusKm= on /friends-nearby
+MAX_RADIUS_KM = 2000.0
+
+
+@bp.route('/nearest', methods=['GET'])
+# @require_auth  # Disabled for testing
+def get_nearest_locations():
+    """
+    Get the user's and visible friends' locations nearest to a point
+
+    Query parameters:
+        lat, lon: the point
+        k: number of locations (default 10, at most 100)
+    """
+    # Imported here so app startup does not load NumPy
+    from app.services.spatial_index import nearest_locations
+
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        point = parse_point(request.args)
+        if point is None:
+            return jsonify({'error': 'lat and lon must be valid coordinates'}), 400
+
+        k = request.args.get('k', 10, type=int)
+        if not 1 <= k <= MAX_NEAREST:
+            return jsonify({'error': f'k must be between 1 and {MAX_NEAREST}'}), 400
+
+        supabase = get_supabase_client()
+        user_ids = [user_id] + visible_friend_ids(user_id, supabase)
+
+        locations = nearest_locations(user_ids, point[0], point[1], k, supabase)
+
+        return jsonify({'locations': locations, 'count': len(locations)}), 200
+
+    except Exception as e:
+        print(f"Get nearest locations error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/within', methods=['GET'])
+# @require_auth  # Disabled for testing
+def get_locations_within():
+    """
+    Get the user's and visible friends' locations inside a bounding box
+
+    Query parameters:
+        bbox: minLon,minLat,maxLon,maxLat (minLon > maxLon crosses the antimeridian)
+        limit: most locations returned (default and maximum 5000)
+    """
+    from app.services.spatial_index import locations_in_bbox
+
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        try:
+            bbox = [float(v) for v in request.args.get('bbox', '').split(',')]
+        except ValueError:
+            bbox = []
+        if len(bbox) != 4 or not (-90 <= bbox[1] <= bbox[3] <= 90) \
+                or not all(-180 <= v <= 180 for v in (bbox[0], bbox[2])):
+            return jsonify({'error': 'bbox must be minLon,minLat,maxLon,maxLat'}), 400
+
+        limit = request.args.get('limit', MAX_WITHIN, type=int)
+        if not 1 <= limit <= MAX_WITHIN:
+            return jsonify({'error': f'limit must be between 1 and {MAX_WITHIN}'}), 400
+
+        supabase = get_supabase_client()
+        user_ids = [user_id] + visible_friend_ids(user_id, supabase)
+
+        locations = locations_in_bbox(user_ids, bbox, limit, supabase)
+
+        return jsonify({'locations': locations, 'count': len(locations)}), 200
+
+    except Exception as e:
+        print(f"Get locations within error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/friends-nearby', methods=['GET'])
+# @require_auth  # Disabled for testing
+def get_friend_trips_nearby():
+    """
+    Get visible friends' vacations with a location within a radius of a point
+
+    Query parameters:
+        lat, lon: the point
+        radiusKm: search radius (default 50, at most 2000)
+    """
+    from app.services.spatial_index import vacations_near
+
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        point = parse_point(request.args)
+        if point is None:
+            return jsonify({'error': 'lat and lon must be valid coordinates'}), 400
+
+        radius_km = request.args.get('radiusKm', 50.0, type=float)
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            return jsonify({'error': f'radiusKm must be between 0 and {MAX_RADIUS_KM:g}'}), 400
+
+        supabase = get_supabase_client()
+        friend_ids = visible_friend_ids(user_id, supabase)
+
+        trips = vacations_near(friend_ids, point[0], point[1], radius_km, supabase) if friend_ids else []
+
+        return jsonify({'trips': trips, 'count': len(trips)}), 200
+
+    except Exception as e:
+        print(f"Get friend trips nearby error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def parse_point(args):
+    """Read lat/lon query parameters, or None if missing or out of range"""
+    latitude = args.get('lat', type=float)
+    longitude = args.get('lon', type=float)
+
+    if latitude is None or longitude is None:
+        return None
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+
+    return latitude, longitude
@@ -0,0 +1,31 @@
+from flask import Blueprint, current_app, request, jsonify
+from app.services.tracing import metrics_snapshot
+
+bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+
+# Addresses of clients on the same host
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+
+
+@bp.route('', methods=['GET'])
+def get_metrics():
+    """
+    Request latency and stage breakdowns of this worker's traced requests
+
+    Per endpoint: request and 5xx counts, latency mean/p50/p95/max in ms,
+    database round trips per request, and per-request averages of each
+    stage (supabase, storage, auth, geocoding, image_download, gemini).
+    Only served to local clients unless METRICS_PUBLIC is set; requests
+    relayed by a proxy (X-Forwarded-For) are not local.
+    """
+    try:
+        is_local = request.remote_addr in LOCAL_ADDRESSES and 'X-Forwarded-For' not in request.headers
+        if not is_local and not current_app.config.get('METRICS_PUBLIC'):
+            return jsonify({'error': 'Not found'}), 404
+
+        return jsonify(metrics_snapshot()), 200
+
+    except Exception as e:
+        print(f"Get metrics error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,22 @@
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth, get_current_user
 from app.services.supabase_service import get_supabase_client, upload_file_to_storage, get_public_url
-from app.services.exif_service import extract_exif_data, create_thumbnail
+from app.services.exif_service import extract_exif_data, read_header_tags, create_thumbnail, EXIF_HEADER_BYTES
+from app.services.async_service import gather_limited
+import functools
 import uuid
 
 bp = Blueprint('photos', __name__, url_prefix='/api/photos')
 
+# Photos of one batch upload processed (EXIF, thumbnail, storage uploads) at the same time
+UPLOAD_CONCURRENCY = 4
+
+# Most photo headers accepted by one /metadata request
+MAX_METADATA_BATCH = 5000
+
 
 @bp.route('/upload/batch', methods=['POST'])
-def upload_batch():
+async def upload_batch():
     """Upload multiple photos at once (from iOS album picker)"""
     try:
         # Use fixed demo user UUID (must match ai.py)
@@ -25,16 +33,19 @@ def upload_batch():
 
         print(f"Processing {len(files)} photos for user {user_id}")
 
-        # Process photos sequentially
+        # Process photos concurrently, keeping upload order
+        results = await gather_limited(
+            [functools.partial(process_single_photo, file, user_id) for file in files],
+            UPLOAD_CONCURRENCY
+        )
+
         processed_photos = []
 
-        for file in files:
-            try:
-                result = process_single_photo(file, user_id)
-                if result:
-                    processed_photos.append(result)
-            except Exception as e:
-                print(f"Error processing photo: {str(e)}")
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error processing photo: {str(result)}")
+            elif result:
+                processed_photos.append(result)
 
         if not processed_photos:
             return jsonify({'error': 'Failed to process any photos'}), 500
@@ -50,6 +61,59 @@ def upload_batch():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/metadata', methods=['POST'])
+def extract_metadata_batch():
+    """
+    Extract coordinates and capture dates from photo headers only
+
+    Lets the client cluster photos into trips before uploading them. Send
+    one multipart part named 'headers' per photo, holding the leading bytes
+    of a JPEG (through its APP1 segment) or the EXIF block of a HEIC file.
+    The part's filename is echoed back as the photo id. Only the first
+    EXIF_HEADER_BYTES of each part are read.
+    """
+    try:
+        if 'headers' not in request.files:
+            return jsonify({'error': 'No photo headers provided'}), 400
+
+        files = request.files.getlist('headers')
+
+        if len(files) > MAX_METADATA_BATCH:
+            return jsonify({'error': f'At most {MAX_METADATA_BATCH} photo headers per request'}), 400
+
+        from app.services.photo_metadata import normalize_exif_batch, capture_date_strings
+
+        # Read raw tags per photo, then normalise GPS and dates for the whole batch at once
+        tag_dicts = [read_header_tags(file.read(EXIF_HEADER_BYTES)) for file in files]
+        arrays = normalize_exif_batch(tag_dicts)
+        capture_dates = capture_date_strings(arrays)
+        latitudes = arrays.latitude.tolist()
+        longitudes = arrays.longitude.tolist()
+
+        photos = []
+
+        for i, file in enumerate(files):
+            has_location = latitudes[i] == latitudes[i] and longitudes[i] == longitudes[i]
+            photos.append({
+                'id': file.filename,
+                'captureDate': capture_dates[i],
+                'location': {
+                    'latitude': latitudes[i],
+                    'longitude': longitudes[i]
+                } if has_location else None,
+                'hasExif': tag_dicts[i] is not None
+            })
+
+        return jsonify({
+            'photos': photos,
+            'count': len(photos)
+        }), 200
+
+    except Exception as e:
+        print(f"Metadata extraction error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 def process_single_photo(file, user_id: str) -> dict:
     """Process a single photo: extract EXIF, create thumbnail, upload"""
     try:
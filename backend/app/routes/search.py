@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify
+from app.middleware.auth_middleware import require_auth, get_current_user
+from app.services.supabase_service import get_supabase_client
+from app.services.friend_graph import visible_friend_ids
+from app.services.search_service import search_vacations
+
+bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+
+# Bounds for ?limit=
+DEFAULT_SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 100
+
+# Longest accepted ?q=
+MAX_QUERY_LENGTH = 200
+
+
+@bp.route('', methods=['GET'])
+# @require_auth  # Disabled for testing
+def search():
+    """
+    Search the user's and visible friends' vacations
+
+    Query parameters:
+        q: words to find in itineraries, activities, location names and
+           titles; each must match, as a prefix ("snork" finds "snorkelling")
+        limit: number of results (default 20, at most 100)
+    """
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+
+        if len(query) > MAX_QUERY_LENGTH:
+            return jsonify({'error': f'q must be at most {MAX_QUERY_LENGTH} characters'}), 400
+
+        limit = request.args.get('limit', DEFAULT_SEARCH_RESULTS, type=int)
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}'}), 400
+
+        supabase = get_supabase_client()
+        user_ids = [user_id] + visible_friend_ids(user_id, supabase)
+
+        results = search_vacations(user_ids, query, limit, supabase)
+
+        return jsonify({'results': results, 'count': len(results)}), 200
+
+    except Exception as e:
+        print(f"Search error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,287 @@
+from flask import Blueprint, request, jsonify
+from app.middleware.auth_middleware import require_auth, get_current_user
+from app.services.supabase_service import get_supabase_client
+from app.services.async_service import fetch_all_rows, fetch_rows_in
+from app.utils.helpers import parse_iso_date
+from datetime import datetime, timedelta, timezone
+import asyncio
+import base64
+import json
+
+bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+
+# Changes this close before the previous sync are sent again. Covers rows
+# committed after that sync read them and clock skew between API and database;
+# clients apply changes idempotently, so repeats are harmless.
+SYNC_OVERLAP_SECONDS = 30
+
+# Tombstones are purged after this many days (see DATABASE_SCHEMA.md), so
+# older tokens get a full sync instead
+SYNC_TOKEN_MAX_AGE_DAYS = 30
+
+# Entity lists in every sync response, also the keys of 'deleted'
+SYNC_ENTITIES = ('vacations', 'locations', 'activities', 'photos', 'friendships')
+
+# sync_tombstones.table_name -> entity list
+TOMBSTONE_ENTITIES = {
+    'vacations': 'vacations',
+    'locations': 'locations',
+    'activities': 'activities',
+    'photos': 'photos',
+    'friends': 'friendships'
+}
+
+
+@bp.route('', methods=['GET'])
+# @require_auth  # Disabled for testing
+async def get_changes():
+    """
+    Get what changed in the user's and visible friends' data since the last sync
+
+    Query parameters:
+        token: token from the previous response; without it everything in
+               scope is returned (full: true) and the client replaces its copy
+
+    Entities come as flat lists linked by vacationId / locationId. Deleted
+    rows are listed by id under 'deleted'. removedOwners are users whose
+    vacations the client should drop (friendship removed or hidden); friends
+    who became visible have all their vacations included.
+    """
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        since = None
+        if request.args.get('token'):
+            since = decode_sync_token(request.args['token'])
+            if since is None:
+                return jsonify({'error': 'Invalid sync token'}), 400
+
+        return jsonify(await load_changes(user_id, since)), 200
+
+    except Exception as e:
+        print(f"Sync error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+async def load_changes(user_id, since=None):
+    """
+    Build the change feed for a user
+
+    Vacation and location ids with their timestamps and the tombstone log
+    tell what changed; full rows are only fetched for changes, so an idle
+    client costs a few small queries and gets an almost empty response.
+    Every query is paged and id filters are chunked (see fetch_rows_in): a
+    truncated read would drop changes for good, since the token moves on.
+    """
+    supabase = get_supabase_client()
+
+    # Taken before reading, so anything written during this sync is sent again next time
+    synced_at = datetime.now(timezone.utc)
+
+    if since and synced_at - since > timedelta(days=SYNC_TOKEN_MAX_AGE_DAYS):
+        since = None
+
+    after = since - timedelta(seconds=SYNC_OVERLAP_SECONDS) if since else None
+
+    def changed(row):
+        if after is None:
+            return True
+        stamp = parse_iso_date(row.get('updated_at') or row.get('created_at'))
+        return stamp is None or _as_utc(stamp) > after
+
+    # Read fresh rather than from the friend graph cache: visibility decides the scope
+    friendships = await fetch_all_rows(
+        lambda: supabase.table('friends').select('*').or_(f'user_id.eq.{user_id},friend_id.eq.{user_id}')
+    )
+
+    visible = [
+        row['friend_id'] for row in friendships
+        if row['user_id'] == user_id and row.get('status') == 'accepted' and row.get('is_visible', True)
+    ]
+    owner_ids = [user_id] + visible
+
+    deleted = {entity: [] for entity in SYNC_ENTITIES}
+    touched_friends = {_other_user(row, user_id) for row in friendships if changed(row)}
+
+    reads = [fetch_rows_in(
+        lambda: supabase.table('vacations').select('id, user_id, updated_at, created_at'), 'user_id', owner_ids
+    )]
+    if after is not None:
+        def tombstones():
+            return supabase.table('sync_tombstones').select('*').gt('deleted_at', after.isoformat())
+
+        # Deletions under the owners' data, and friendships removed by the other side
+        reads.append(fetch_rows_in(tombstones, 'user_id', owner_ids))
+        reads.append(fetch_all_rows(lambda: tombstones().eq('friend_id', user_id)))
+
+    results = await asyncio.gather(*reads)
+    vacation_stamps = results[0]
+
+    if after is not None:
+        seen = set()
+        for tombstone in results[1] + results[2]:
+            if tombstone['id'] in seen:
+                continue
+            seen.add(tombstone['id'])
+
+            entity = TOMBSTONE_ENTITIES.get(tombstone['table_name'])
+            if entity:
+                deleted[entity].append(tombstone['row_id'])
+            if tombstone['table_name'] == 'friends':
+                touched_friends.add(_other_user(tombstone, user_id))
+
+    # Friends who just became visible are sent in full; hidden or removed ones are dropped
+    full_owners = set(owner_ids) if after is None else touched_friends & set(visible)
+    removed_owners = [] if after is None else sorted(touched_friends - set(visible) - {user_id, None})
+
+    vacation_owner = {v['id']: v['user_id'] for v in vacation_stamps}
+    changed_vacation_ids = [
+        v['id'] for v in vacation_stamps if v['user_id'] in full_owners or changed(v)
+    ]
+
+    location_stamps = await fetch_rows_in(
+        lambda: supabase.table('locations').select('id, vacation_id, updated_at, created_at'),
+        'vacation_id', list(vacation_owner)
+    )
+
+    full_location_ids = []
+    other_location_ids = []
+    changed_location_ids = []
+    for loc in location_stamps:
+        full = vacation_owner[loc['vacation_id']] in full_owners
+        (full_location_ids if full else other_location_ids).append(loc['id'])
+        if full or changed(loc):
+            changed_location_ids.append(loc['id'])
+
+    def rows_of(table):
+        return lambda: supabase.table(table).select('*')
+
+    def changed_rows_of(table):
+        return lambda: supabase.table(table).select('*').gt('updated_at', after.isoformat())
+
+    reads = {
+        'vacations': fetch_rows_in(rows_of('vacations'), 'id', changed_vacation_ids),
+        'locations': fetch_rows_in(rows_of('locations'), 'id', changed_location_ids)
+    }
+    for table in ('activities', 'photos'):
+        reads[table] = _changed_children(rows_of(table), changed_rows_of(table),
+                                         full_location_ids, other_location_ids, after)
+
+    rows = dict(zip(reads, await asyncio.gather(*reads.values())))
+
+    return {
+        'token': encode_sync_token(synced_at),
+        'full': after is None,
+        'vacations': [_vacation(v) for v in rows['vacations']],
+        'locations': [_location(loc) for loc in rows['locations']],
+        'activities': [_activity(a) for a in rows['activities']],
+        'photos': [_photo(p) for p in rows['photos']],
+        'friendships': [_friendship(row, user_id) for row in friendships if changed(row)],
+        'deleted': deleted,
+        'removedOwners': removed_owners
+    }
+
+
+def encode_sync_token(synced_at):
+    """Opaque token for the time a sync started"""
+    return base64.urlsafe_b64encode(json.dumps([synced_at.isoformat()]).encode()).decode()
+
+
+def decode_sync_token(token):
+    """Decode a sync token to an aware datetime, or None if it is malformed"""
+    try:
+        (stamp,) = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+
+    synced_at = parse_iso_date(stamp) if isinstance(stamp, str) else None
+    return _as_utc(synced_at) if synced_at else None
+
+
+async def _changed_children(all_rows, changed_rows, full_location_ids, other_location_ids, after):
+    """Activities or photos of fully sent locations, plus changed ones of the other locations"""
+    if after is None:
+        return await fetch_rows_in(all_rows, 'location_id', full_location_ids + other_location_ids)
+
+    full, changed = await asyncio.gather(
+        fetch_rows_in(all_rows, 'location_id', full_location_ids),
+        fetch_rows_in(changed_rows, 'location_id', other_location_ids)
+    )
+    return full + changed
+
+
+def _as_utc(stamp):
+    """Treat naive timestamps as UTC"""
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def _other_user(row, user_id):
+    return row.get('friend_id') if row.get('user_id') == user_id else row.get('user_id')
+
+
+def _vacation(row):
+    return {
+        'id': row['id'],
+        'ownerId': row['user_id'],
+        'title': row['title'],
+        'startDate': row.get('start_date'),
+        'endDate': row.get('end_date'),
+        'aiGeneratedItinerary': row.get('ai_itinerary'),
+        'updatedAt': row.get('updated_at')
+    }
+
+
+def _location(row):
+    return {
+        'id': row['id'],
+        'vacationId': row['vacation_id'],
+        'name': row['name'],
+        'coordinate': {
+            'latitude': row['latitude'],
+            'longitude': row['longitude']
+        },
+        'visitDate': row.get('visit_date'),
+        'updatedAt': row.get('updated_at')
+    }
+
+
+def _activity(row):
+    return {
+        'id': row['id'],
+        'locationId': row['location_id'],
+        'title': row['title'],
+        'description': row['description'],
+        'time': row.get('time'),
+        'aiGenerated': row.get('ai_generated', False),
+        'updatedAt': row.get('updated_at')
+    }
+
+
+def _photo(row):
+    return {
+        'id': row['id'],
+        'locationId': row['location_id'],
+        'imageURL': row['image_url'],
+        'thumbnailURL': row.get('thumbnail_url'),
+        'captureDate': row.get('capture_date'),
+        'location': {
+            'latitude': row.get('latitude'),
+            'longitude': row.get('longitude')
+        } if row.get('latitude') else None,
+        'caption': row.get('caption'),
+        'updatedAt': row.get('updated_at')
+    }
+
+
+def _friendship(row, user_id):
+    outgoing = row['user_id'] == user_id
+    return {
+        'id': row['id'],
+        'friendId': _other_user(row, user_id),
+        'status': row.get('status', 'pending'),
+        'isVisible': row.get('is_visible', True) if outgoing else True,
+        'outgoing': outgoing,
+        'updatedAt': row.get('updated_at') or row.get('created_at')
+    }
@@ -1,140 +1,530 @@
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth, get_current_user
 from app.services.supabase_service import get_supabase_client
+from app.services.cache_service import (
+    cached_json_response_async, feed_cache_key, vacation_cache_key, invalidate_feeds, invalidate_vacation
+)
+from app.services.async_service import run_blocking, execute_async, fetch_all_rows, fetch_rows_in
+from app.services.friend_graph import visible_friend_ids, viewer_ids
+from app.services.search_service import refresh_vacation
+from app.services.event_bus import publish_event
+from app.services.vacation_documents import (
+    fetch_vacation_documents, is_current, source_version, store_vacation_documents
+)
+from app.utils.helpers import parse_iso_date
+import asyncio
+import base64
+import json
 import uuid
 
 bp = Blueprint('vacations', __name__, url_prefix='/api/vacations')
 
 
+# Page size bounds for GET /api/vacations?limit=
+MAX_PAGE_SIZE = 100
+
+# Columns needed for summary (globe) responses
+SUMMARY_VACATION_COLUMNS = 'id, user_id, title, start_date, end_date, created_at'
+SUMMARY_LOCATION_COLUMNS = 'id, vacation_id, name, latitude, longitude'
+
+# Orders of child rows in responses; each ends in a unique column so pages are stable
+LOCATION_ORDER = 'visit_date,created_at,id'
+ACTIVITY_ORDER = 'created_at,id'
+PHOTO_ORDER = 'capture_date,created_at,id'
+
+
 @bp.route('', methods=['GET'])
-def get_vacations():
-    """Get all vacations for user and their visible friends"""
+async def get_vacations():
+    """
+    Get vacations for user and their visible friends
+
+    Query parameters (all optional):
+        limit: page size (1-100); without it every vacation is returned
+        cursor: nextCursor value from the previous page
+        fields: 'full' (default) or 'summary' (headers and location coordinates only)
+    """
     try:
         # Use a default user ID for demo (no auth required)
         user_id = "00000000-0000-0000-0000-000000000001"
 
-        supabase = get_supabase_client()
+        fields = request.args.get('fields', 'full')
+        if fields not in ('full', 'summary'):
+            return jsonify({'error': "fields must be 'full' or 'summary'"}), 400
+
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+        cursor = None
+        if request.args.get('cursor'):
+            cursor = decode_feed_cursor(request.args['cursor'])
+            if cursor is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+        return await cached_json_response_async(
+            feed_cache_key(user_id),
+            lambda: load_vacation_feed(user_id, limit=limit, cursor=cursor, fields=fields)
+        )
+
+    except Exception as e:
+        print(f"Get vacations error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+async def load_vacation_feed(user_id, limit=None, cursor=None, fields='full'):
+    """
+    Build the vacation feed payload for a user (cache miss path)
+
+    Vacations are ordered newest first by start_date (undated trips first, as
+    Postgres sorts NULLs first when descending), then created_at and id.
+    """
+    supabase = get_supabase_client()
+
+    # Get user's friends where is_visible is true
+    friend_ids = await run_blocking(visible_friend_ids, user_id, supabase)
+
+    # Get all user IDs to query (user + visible friends)
+    all_user_ids = [user_id] + friend_ids
+
+    # Get vacations for all these users
+    columns = SUMMARY_VACATION_COLUMNS if fields == 'summary' else '*'
+
+    def feed_query():
+        query = supabase.table('vacations').select(columns).in_('user_id', all_user_ids)
+        if cursor:
+            query = apply_feed_cursor(query, cursor)
+        return query.order('start_date', desc=True).order('created_at', desc=True).order('id', desc=True)
+
+    if limit:
+        vacation_rows = (await execute_async(feed_query().limit(limit + 1))).data or []
+    else:
+        # The whole feed, paged so PostgREST's row cap cannot cut it short
+        vacation_rows = await fetch_all_rows(feed_query, order=None)
+
+    next_cursor = None
+    if limit and len(vacation_rows) > limit:
+        vacation_rows = vacation_rows[:limit]
+        next_cursor = encode_feed_cursor(vacation_rows[-1])
+
+    if fields == 'summary':
+        vacations = await build_vacation_responses(vacation_rows, supabase, fields=fields)
+    else:
+        vacations = await load_vacation_documents(vacation_rows, supabase)
+
+    return {'vacations': vacations, 'nextCursor': next_cursor}, 200
+
+
+def encode_feed_cursor(vacation):
+    """Opaque cursor pointing just after the given vacation row"""
+    position = [vacation.get('start_date'), vacation.get('created_at'), vacation['id']]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_feed_cursor(cursor):
+    """Decode and validate a feed cursor, returning None if it is malformed"""
+    try:
+        start_date, created_at, vacation_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+
+    if start_date is not None and parse_iso_date(start_date) is None:
+        return None
+    if parse_iso_date(created_at) is None:
+        return None
+    try:
+        uuid.UUID(str(vacation_id))
+    except ValueError:
+        return None
+
+    return start_date, created_at, vacation_id
 
-        # Get user's friends where is_visible is true
-        friends_result = supabase.table('friends').select('friend_id').eq('user_id', user_id).eq('is_visible', True).eq('status', 'accepted').execute()
 
-        friend_ids = [f['friend_id'] for f in friends_result.data] if friends_result.data else []
+def apply_feed_cursor(query, cursor):
+    """Restrict a vacations query to rows after the cursor in feed order"""
+    start_date, created_at, vacation_id = cursor
 
-        # Get all user IDs to query (user + visible friends)
-        all_user_ids = [user_id] + friend_ids
+    if start_date is None:
+        # Still inside the undated section, which is followed by every dated vacation
+        return query.or_(
+            f'start_date.not.is.null,'
+            f'and(start_date.is.null,created_at.lt."{created_at}"),'
+            f'and(start_date.is.null,created_at.eq."{created_at}",id.lt.{vacation_id})'
+        )
 
-        # Get vacations for all these users
-        vacations_result = supabase.table('vacations').select('*').in_('user_id', all_user_ids).execute()
+    return query.or_(
+        f'start_date.lt."{start_date}",'
+        f'and(start_date.eq."{start_date}",created_at.lt."{created_at}"),'
+        f'and(start_date.eq."{start_date}",created_at.eq."{created_at}",id.lt.{vacation_id})'
+    )
 
-        vacations = []
 
-        for vacation in vacations_result.data:
-            vacation_data = build_vacation_response(vacation, supabase)
-            vacations.append(vacation_data)
+# Grid cells per 360° of longitude at zoom 0 when clustering pins
+PIN_GRID_CELLS = 8
 
-        return jsonify({'vacations': vacations}), 200
+
+@bp.route('/pins', methods=['GET'])
+async def get_vacation_pins():
+    """
+    Get compact globe pins for the user's and visible friends' locations
+
+    Query parameters (all optional):
+        bbox: minLon,minLat,maxLon,maxLat (minLon > maxLon crosses the antimeridian)
+        zoom: map zoom level (0-20); when given, nearby pins are merged per grid cell
+
+    Response is columnar: lat/lon/color/vacation are parallel arrays, color
+    indexes into colors and vacation indexes into vacationIds. Clustered
+    responses add a count array.
+    """
+    try:
+        # Use a default user ID for demo (no auth required)
+        user_id = "00000000-0000-0000-0000-000000000001"
+
+        bbox = None
+        if request.args.get('bbox'):
+            try:
+                bbox = [float(v) for v in request.args['bbox'].split(',')]
+            except ValueError:
+                bbox = []
+            if len(bbox) != 4 or not (-90 <= bbox[1] <= bbox[3] <= 90):
+                return jsonify({'error': 'bbox must be minLon,minLat,maxLon,maxLat'}), 400
+
+        zoom = request.args.get('zoom', type=int)
+        if zoom is not None and not 0 <= zoom <= 20:
+            return jsonify({'error': 'zoom must be between 0 and 20'}), 400
+
+        return await cached_json_response_async(feed_cache_key(user_id), lambda: load_vacation_pins(user_id, bbox, zoom))
 
     except Exception as e:
-        print(f"Get vacations error: {str(e)}")
+        print(f"Get pins error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
-def build_vacation_response(vacation, supabase):
-    """Build complete vacation response with locations, activities, photos"""
+async def load_vacation_pins(user_id, bbox=None, zoom=None):
+    """
+    Build the columnar pin payload (cache miss path)
 
-    # Get owner info
-    owner_result = supabase.table('users').select('*').eq('id', vacation['user_id']).execute()
-    owner = owner_result.data[0] if owner_result.data else None
+    Id filters are chunked and every query is paged (see fetch_rows_in), so
+    no pins are lost to PostgREST's row cap.
+    """
+    supabase = get_supabase_client()
 
-    # Get locations
-    locations_result = supabase.table('locations').select('*').eq('vacation_id', vacation['id']).execute()
+    all_user_ids = [user_id] + await run_blocking(visible_friend_ids, user_id, supabase)
 
-    locations = []
+    vacation_rows = await fetch_rows_in(lambda: supabase.table('vacations').select('id, user_id'), 'user_id', all_user_ids)
+    vacation_owner = {v['id']: v['user_id'] for v in vacation_rows}
 
-    for location in locations_result.data:
-        # Get activities
-        activities_result = supabase.table('activities').select('*').eq('location_id', location['id']).execute()
+    pins = {'colors': [], 'vacationIds': [], 'lat': [], 'lon': [], 'color': [], 'vacation': []}
 
-        activities = [
-            {
-                'id': act['id'],
-                'title': act['title'],
-                'description': act['description'],
-                'time': act.get('time'),
-                'aiGenerated': act.get('ai_generated', False)
-            }
-            for act in activities_result.data
-        ] if activities_result.data else []
-
-        # Get photos
-        photos_result = supabase.table('photos').select('*').eq('location_id', location['id']).execute()
-
-        photos = [
-            {
-                'id': photo['id'],
-                'imageURL': photo['image_url'],
-                'thumbnailURL': photo.get('thumbnail_url'),
-                'captureDate': photo.get('capture_date'),
-                'location': {
-                    'latitude': photo.get('latitude'),
-                    'longitude': photo.get('longitude')
-                } if photo.get('latitude') else None,
-                'caption': photo.get('caption')
-            }
-            for photo in photos_result.data
-        ] if photos_result.data else []
+    if not vacation_owner:
+        return pins, 200
+
+    def locations_query():
+        query = supabase.table('locations').select('vacation_id, latitude, longitude')
+
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            query = query.gte('latitude', min_lat).lte('latitude', max_lat)
+            if min_lon <= max_lon:
+                query = query.gte('longitude', min_lon).lte('longitude', max_lon)
+            else:
+                query = query.or_(f'longitude.gte.{min_lon},longitude.lte.{max_lon}')
+
+        return query
+
+    # Locations and owner colors only depend on the vacations, so fetch them together
+    locations, owners = await asyncio.gather(
+        fetch_rows_in(locations_query, 'vacation_id', list(vacation_owner)),
+        fetch_rows_in(lambda: supabase.table('users').select('id, color'), 'id', list(set(vacation_owner.values())))
+    )
+    owner_color = {o['id']: o['color'] for o in owners}
+
+    color_index = {}
+    vacation_index = {}
+
+    def index_of(table, key, values):
+        if key not in table:
+            table[key] = len(values)
+            values.append(key)
+        return table[key]
+
+    if zoom is None:
+        for location in locations:
+            vacation_id = location['vacation_id']
+            pins['lat'].append(round(location['latitude'], 5))
+            pins['lon'].append(round(location['longitude'], 5))
+            pins['color'].append(index_of(color_index, owner_color.get(vacation_owner[vacation_id]), pins['colors']))
+            pins['vacation'].append(index_of(vacation_index, vacation_id, pins['vacationIds']))
+        return pins, 200
+
+    # Merge pins that fall in the same grid cell at this zoom level
+    cell_size = 360.0 / (PIN_GRID_CELLS * 2 ** zoom)
+    cells = {}
+
+    for location in locations:
+        key = (int(location['latitude'] // cell_size), int(location['longitude'] // cell_size))
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = {'lat': 0.0, 'lon': 0.0, 'count': 0, 'colors': {}, 'vacation_id': location['vacation_id']}
+        cell['lat'] += location['latitude']
+        cell['lon'] += location['longitude']
+        cell['count'] += 1
+        color = owner_color.get(vacation_owner[location['vacation_id']])
+        cell['colors'][color] = cell['colors'].get(color, 0) + 1
+
+    pins['count'] = []
+    for cell in cells.values():
+        pins['lat'].append(round(cell['lat'] / cell['count'], 5))
+        pins['lon'].append(round(cell['lon'] / cell['count'], 5))
+        pins['color'].append(index_of(color_index, max(cell['colors'], key=cell['colors'].get), pins['colors']))
+        pins['vacation'].append(index_of(vacation_index, cell['vacation_id'], pins['vacationIds']))
+        pins['count'].append(cell['count'])
+
+    return pins, 200
+
+
+def invalidate_vacation_cache(vacation_id, owner_id, supabase):
+    """Drop cached data that includes a vacation: its detail, feeds showing it and the location and search indexes"""
+    invalidate_vacation(vacation_id)
+
+    # Users who see the owner's vacations on their feed
+    invalidate_feeds([owner_id] + viewer_ids(owner_id, supabase))
+
+    # Imported here so app startup does not load NumPy
+    from app.services.spatial_index import invalidate_owner_locations
+
+    invalidate_owner_locations(owner_id)
 
-        locations.append({
+    refresh_vacation(vacation_id)
+
+
+def notify_vacation_created(vacation, supabase):
+    """Push vacation.created to the owner's other devices and friends who see the owner's vacations"""
+    owner_id = vacation['user_id']
+
+    publish_event([owner_id] + viewer_ids(owner_id, supabase), 'vacation.created', {
+        'vacationId': vacation['id'],
+        'ownerId': owner_id,
+        'title': vacation['title'],
+        'startDate': vacation.get('start_date'),
+        'endDate': vacation.get('end_date')
+    })
+
+
+async def build_vacation_response(vacation, supabase):
+    """Build complete vacation response with locations, activities, photos"""
+    return (await build_vacation_responses([vacation], supabase))[0]
+
+
+async def build_vacation_responses(vacations, supabase, fields='full'):
+    """
+    Build vacation responses for many vacations with a few queries per table
+
+    fields='summary' returns vacation headers and location coordinates only,
+    skipping activities, photos and the itinerary text. Independent queries
+    run concurrently: owners with locations, then activities with photos.
+    Id filters are chunked and every query is paged (see fetch_rows_in), so
+    large feeds are neither rejected for URL length nor cut at the row cap.
+    """
+    if not vacations:
+        return []
+
+    summary = fields == 'summary'
+
+    # Get owner info and locations
+    owner_ids = list({v['user_id'] for v in vacations})
+    vacation_ids = [v['id'] for v in vacations]
+    location_columns = SUMMARY_LOCATION_COLUMNS if summary else '*'
+
+    owner_rows, location_rows = await asyncio.gather(
+        fetch_rows_in(lambda: supabase.table('users').select('id, name, color'), 'id', owner_ids),
+        fetch_rows_in(lambda: supabase.table('locations').select(location_columns), 'vacation_id', vacation_ids,
+                      order=LOCATION_ORDER)
+    )
+    owners = {o['id']: o for o in owner_rows}
+
+    activity_rows = []
+    photo_rows = []
+
+    if not summary and location_rows:
+        location_ids = [loc['id'] for loc in location_rows]
+
+        # Get activities and photos
+        activity_rows, photo_rows = await asyncio.gather(
+            fetch_rows_in(lambda: supabase.table('activities').select('*'), 'location_id', location_ids,
+                          order=ACTIVITY_ORDER),
+            fetch_rows_in(lambda: supabase.table('photos').select('*'), 'location_id', location_ids,
+                          order=PHOTO_ORDER)
+        )
+
+    return assemble_vacation_responses(vacations, owners, location_rows, activity_rows, photo_rows, summary=summary)
+
+
+def assemble_vacation_responses(vacations, owners, location_rows, activity_rows, photo_rows, summary=False):
+    """Shape vacation, owner (by id), location, activity and photo rows into vacation responses"""
+    activities_by_location = {}
+    photos_by_location = {}
+
+    for act in activity_rows:
+        activities_by_location.setdefault(act['location_id'], []).append({
+            'id': act['id'],
+            'title': act['title'],
+            'description': act['description'],
+            'time': act.get('time'),
+            'aiGenerated': act.get('ai_generated', False)
+        })
+
+    for photo in photo_rows:
+        photos_by_location.setdefault(photo['location_id'], []).append({
+            'id': photo['id'],
+            'imageURL': photo['image_url'],
+            'thumbnailURL': photo.get('thumbnail_url'),
+            'captureDate': photo.get('capture_date'),
+            'location': {
+                'latitude': photo.get('latitude'),
+                'longitude': photo.get('longitude')
+            } if photo.get('latitude') else None,
+            'caption': photo.get('caption')
+        })
+
+    locations_by_vacation = {}
+
+    for location in location_rows:
+        location_data = {
             'id': location['id'],
             'name': location['name'],
             'coordinate': {
                 'latitude': location['latitude'],
                 'longitude': location['longitude']
-            },
-            'visitDate': location.get('visit_date'),
-            'photos': photos,
-            'activities': activities,
-            'articles': []
-        })
+            }
+        }
 
-    return {
-        'id': vacation['id'],
-        'title': vacation['title'],
-        'startDate': vacation.get('start_date'),
-        'endDate': vacation.get('end_date'),
-        'owner': {
-            'id': owner['id'],
-            'name': owner['name'],
-            'color': owner['color']
-        } if owner else None,
-        'locations': locations,
-        'aiGeneratedItinerary': vacation.get('ai_itinerary')
+        if not summary:
+            location_data.update({
+                'visitDate': location.get('visit_date'),
+                'photos': photos_by_location.get(location['id'], []),
+                'activities': activities_by_location.get(location['id'], []),
+                'articles': []
+            })
+
+        locations_by_vacation.setdefault(location['vacation_id'], []).append(location_data)
+
+    responses = []
+
+    for vacation in vacations:
+        owner = owners.get(vacation['user_id'])
+
+        vacation_data = {
+            'id': vacation['id'],
+            'title': vacation['title'],
+            'startDate': vacation.get('start_date'),
+            'endDate': vacation.get('end_date'),
+            'owner': {
+                'id': owner['id'],
+                'name': owner['name'],
+                'color': owner['color']
+            } if owner else None,
+            'locations': locations_by_vacation.get(vacation['id'], [])
+        }
+
+        if not summary:
+            vacation_data['aiGeneratedItinerary'] = vacation.get('ai_itinerary')
+
+        responses.append(vacation_data)
+
+    return responses
+
+
+async def load_vacation_documents(vacations, supabase, rebuild=False):
+    """
+    Full responses for vacation rows, read from their materialised documents
+
+    One query fetches the stored documents. Missing or stale ones (and all
+    of them with rebuild=True, after a write) are built from the source
+    tables in one batch and saved for later reads.
+    """
+    if not vacations:
+        return []
+
+    stored = await fetch_vacation_documents([v['id'] for v in vacations], supabase)
+    if stored is None:
+        return await build_vacation_responses(vacations, supabase)
+
+    documents = {
+        vacation_id: row['document'] for vacation_id, row in stored.items()
+        if not rebuild and is_current(row)
     }
 
+    stale = [v for v in vacations if v['id'] not in documents]
+    documents.update(await _rebuild_vacation_documents(stale, stored, supabase))
 
-@bp.route('/<vacation_id>', methods=['GET'])
-def get_vacation(vacation_id):
-    """Get specific vacation details"""
-    try:
-        supabase = get_supabase_client()
+    return [documents[v['id']] for v in vacations]
 
-        vacation_result = supabase.table('vacations').select('*').eq('id', vacation_id).execute()
 
-        if not vacation_result.data:
-            return jsonify({'error': 'Vacation not found'}), 404
+async def materialise_vacation(vacation, supabase):
+    """Rebuild and save a vacation's document after writing to it; returns the document"""
+    return (await load_vacation_documents([vacation], supabase, rebuild=True))[0]
+
 
-        vacation = vacation_result.data[0]
-        vacation_data = build_vacation_response(vacation, supabase)
+async def _rebuild_vacation_documents(vacations, stored, supabase):
+    """
+    Build documents from the source tables and save them
 
-        return jsonify(vacation_data), 200
+    stored holds the document rows as read before building, so each document
+    is saved with the source_version it reflects.
+    """
+    if not vacations:
+        return {}
+
+    responses = await build_vacation_responses(vacations, supabase)
+
+    await store_vacation_documents([
+        (vacation, document, source_version(stored.get(vacation['id'])))
+        for vacation, document in zip(vacations, responses)
+    ], supabase)
+
+    return {vacation['id']: document for vacation, document in zip(vacations, responses)}
+
+
+@bp.route('/<vacation_id>', methods=['GET'])
+async def get_vacation(vacation_id):
+    """Get specific vacation details"""
+    try:
+        return await cached_json_response_async(vacation_cache_key(vacation_id), lambda: load_vacation(vacation_id))
 
     except Exception as e:
         print(f"Get vacation error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+async def load_vacation(vacation_id):
+    """
+    Get a vacation detail payload (cache miss path)
+
+    A current materialised document is served from a single key fetch;
+    otherwise the vacation is built from the source tables and its document
+    saved.
+    """
+    supabase = get_supabase_client()
+
+    stored = await fetch_vacation_documents([vacation_id], supabase)
+    if stored and is_current(stored.get(vacation_id)):
+        return stored[vacation_id]['document'], 200
+
+    vacation_result = await execute_async(supabase.table('vacations').select('*').eq('id', vacation_id))
+
+    if not vacation_result.data:
+        return {'error': 'Vacation not found'}, 404
+
+    vacation = vacation_result.data[0]
+
+    if stored is None:
+        return await build_vacation_response(vacation, supabase), 200
+
+    return (await _rebuild_vacation_documents([vacation], stored, supabase))[vacation_id], 200
+
+
 @bp.route('', methods=['POST'])
-def create_vacation():
+async def create_vacation():
     """Create a new vacation manually"""
     try:
         # Use a default user ID for demo (no auth required)
@@ -154,7 +544,12 @@ def create_vacation():
         }
 
         supabase = get_supabase_client()
-        supabase.table('vacations').insert(vacation_data).execute()
+        await execute_async(supabase.table('vacations').insert(vacation_data))
+
+        await materialise_vacation(vacation_data, supabase)
+
+        await run_blocking(invalidate_vacation_cache, vacation_id, user_id, supabase)
+        await run_blocking(notify_vacation_created, vacation_data, supabase)
 
         return jsonify({
             'id': vacation_id,
@@ -167,7 +562,7 @@ def create_vacation():
 
 
 @bp.route('/<vacation_id>', methods=['PUT'])
-def update_vacation(vacation_id):
+async def update_vacation(vacation_id):
     """Update vacation details"""
     try:
         # Use a default user ID for demo (no auth required)
@@ -178,7 +573,9 @@ def update_vacation(vacation_id):
         supabase = get_supabase_client()
 
         # Verify ownership
-        vacation_result = supabase.table('vacations').select('*').eq('id', vacation_id).eq('user_id', user_id).execute()
+        vacation_result = await execute_async(
+            supabase.table('vacations').select('*').eq('id', vacation_id).eq('user_id', user_id)
+        )
 
         if not vacation_result.data:
             return jsonify({'error': 'Vacation not found or unauthorized'}), 404
@@ -193,7 +590,9 @@ def update_vacation(vacation_id):
             update_data['end_date'] = data['endDate']
 
         if update_data:
-            supabase.table('vacations').update(update_data).eq('id', vacation_id).execute()
+            await execute_async(supabase.table('vacations').update(update_data).eq('id', vacation_id))
+            await materialise_vacation({**vacation_result.data[0], **update_data}, supabase)
+            await run_blocking(invalidate_vacation_cache, vacation_id, user_id, supabase)
 
         return jsonify({'message': 'Vacation updated successfully'}), 200
 
@@ -220,6 +619,8 @@ def delete_vacation(vacation_id):
         # Delete vacation (cascade will handle related data if configured)
         supabase.table('vacations').delete().eq('id', vacation_id).execute()
 
+        invalidate_vacation_cache(vacation_id, user_id, supabase)
+
         return jsonify({'message': 'Vacation deleted successfully'}), 200
 
     except Exception as e:
@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+
+# Threads shared by every async view for blocking SDK calls (PostgREST,
+# storage, Gemini, Nominatim). Sized for I/O waits, not CPU work.
+IO_THREADS = int(os.environ.get('ASYNC_IO_THREADS', '32'))
+
+# Rows PostgREST returns per request at most (its max-rows setting; 1000 on
+# Supabase). Results of paged reads are fetched in pages of this size.
+PAGE_SIZE = int(os.environ.get('SUPABASE_MAX_ROWS', '1000'))
+
+# Values per .in_() filter, keeping request URLs well under proxy limits
+# (about 7 KB of UUIDs)
+IN_CHUNK_SIZE = 200
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the per-process I/O thread pool"""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix='async-io')
+
+    return _executor
+
+
+def _reset_after_fork():
+    """Executor threads do not survive fork; the child creates its own pool"""
+    global _executor, _executor_lock
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """
+    Run a blocking call on the shared I/O pool and await its result
+
+    The caller's context variables (Flask app and request context) are
+    copied into the worker thread, so current_app and g keep working.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+
+async def execute_async(query):
+    """Execute a PostgREST query builder without blocking the event loop"""
+    return await run_blocking(query.execute)
+
+
+async def gather_queries(*queries) -> List:
+    """Execute independent queries concurrently, results in argument order"""
+    return await asyncio.gather(*(execute_async(query) for query in queries))
+
+
+async def gather_limited(calls: Iterable[Callable], limit: int) -> List:
+    """
+    Run blocking zero-argument calls concurrently, at most limit at a time
+
+    Exceptions are returned in place of results, as with
+    asyncio.gather(return_exceptions=True).
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call):
+        async with semaphore:
+            return await run_blocking(call)
+
+    return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+
+def read_all_rows(make_query: Callable[[], Any], order: Optional[str] = 'id') -> List[Dict]:
+    """
+    Every row of a select, read PAGE_SIZE rows at a time with .range()
+
+    make_query builds a fresh query for each page. Pages are ordered by
+    order (comma-separated columns that end in a unique one); pass None when
+    make_query already orders the rows that way. Reading stops at the first
+    short page, so PostgREST's max-rows cap cannot silently truncate results.
+    Blocking; async views use fetch_all_rows.
+    """
+    rows = []
+    while True:
+        query = make_query()
+        if order:
+            query = query.order(order)
+
+        page = query.range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def _in_chunks(make_query: Callable[[], Any], column: str, values: Sequence) -> List[Callable[[], Any]]:
+    """Query factories filtering column by IN_CHUNK_SIZE values each"""
+    values = list(values)
+    return [
+        lambda chunk=values[i:i + IN_CHUNK_SIZE]: make_query().in_(column, chunk)
+        for i in range(0, len(values), IN_CHUNK_SIZE)
+    ]
+
+
+def read_rows_in(make_query: Callable[[], Any], column: str, values: Sequence,
+                 order: Optional[str] = 'id') -> List[Dict]:
+    """
+    Every row of make_query() whose column is in values
+
+    Values are split into IN_CHUNK_SIZE filters, each paged with
+    read_all_rows, so neither the URL length nor the row count is bounded by
+    the number of values. Blocking and sequential; async views use
+    fetch_rows_in, which reads the chunks concurrently.
+    Rows come chunk by chunk: sort them when order matters across chunks.
+    """
+    return [row for chunk in _in_chunks(make_query, column, values) for row in read_all_rows(chunk, order)]
+
+
+async def fetch_all_rows(make_query: Callable[[], Any], order: Optional[str] = 'id') -> List[Dict]:
+    """Every row of a select, paged as by read_all_rows without blocking the event loop"""
+    return await run_blocking(read_all_rows, make_query, order)
+
+
+async def fetch_rows_in(make_query: Callable[[], Any], column: str, values: Sequence,
+                        order: Optional[str] = 'id') -> List[Dict]:
+    """
+    Every row of make_query() whose column is in values
+
+    As read_rows_in, with the chunks read concurrently.
+    Rows come chunk by chunk: sort them when order matters across chunks.
+    """
+    pages = await asyncio.gather(*(
+        fetch_all_rows(chunk, order) for chunk in _in_chunks(make_query, column, values)
+    ))
+    return [row for page in pages for row in page]
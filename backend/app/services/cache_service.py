@@ -0,0 +1,255 @@
+from collections import OrderedDict
+from flask import Response, current_app, request
+from app.middleware.compression import (
+    DEFAULT_MIN_BYTES, SUPPORTED_ENCODINGS, accepts_encoding, compress, decompress, negotiate_encoding
+)
+from typing import Awaitable, Callable, Optional, Tuple
+import hashlib
+import threading
+import time
+import uuid
+
+# Defaults, overridable through app.config
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_cache_backend = None
+_cache_lock = threading.Lock()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache bounded by total stored bytes"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        if len(value) > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at)
+            self._size += len(value)
+
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._size -= len(value)
+
+
+class RedisCacheBackend:
+    """Shared cache for multi-worker deployments (requires the redis package)"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self._client.set(key, value, ex=ttl)
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+
+def get_cache():
+    """Get or create the configured cache backend"""
+    global _cache_backend
+
+    if _cache_backend is None:
+        with _cache_lock:
+            if _cache_backend is None:
+                redis_url = current_app.config.get('CACHE_REDIS_URL')
+                if redis_url:
+                    _cache_backend = RedisCacheBackend(redis_url)
+                else:
+                    max_bytes = current_app.config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+                    _cache_backend = MemoryCacheBackend(max_bytes)
+
+    return _cache_backend
+
+
+def feed_cache_key(user_id: str) -> str:
+    """
+    Cache key for a user's vacation feed
+
+    Includes a per-user generation token, so invalidating a feed is a single
+    write that makes every cached variant (other endpoints built from the same
+    visible vacations, query strings) unreachable.
+    """
+    cache = get_cache()
+    generation_key = f"gen:feed:{user_id}"
+    generation = cache.get(generation_key)
+
+    if generation is None:
+        generation = uuid.uuid4().hex.encode()
+        cache.set(generation_key, generation)
+
+    return f"feed:{user_id}:{generation.decode()}:{request.path}?{request.query_string.decode()}"
+
+
+def vacation_cache_key(vacation_id: str) -> str:
+    """Cache key for a single vacation's detail response"""
+    return f"vacation:{vacation_id}"
+
+
+def invalidate_feeds(user_ids):
+    """Drop cached feeds for the given users"""
+    cache = get_cache()
+    for user_id in set(user_ids):
+        cache.set(f"gen:feed:{user_id}", uuid.uuid4().hex.encode())
+
+
+def invalidate_vacation(vacation_id: str):
+    """Drop the cached detail response of a vacation"""
+    get_cache().delete(vacation_cache_key(vacation_id))
+
+
+def cached_json_response(key: str, build: Callable[[], Tuple[dict, int]]) -> Response:
+    """
+    Serve a JSON response from cache with ETag / If-None-Match support
+
+    build() returns (payload, status) and is only called on a cache miss.
+    Only 200 responses are cached. Bodies above the compression threshold
+    are stored compressed once and sent as stored to clients that accept
+    the encoding, so a hit never re-serializes or re-compresses (other
+    clients get a re-encoded copy, cached alongside).
+    """
+    entry = _cache_lookup(key)
+
+    if entry is None:
+        entry = _cache_store(key, *build())
+        if isinstance(entry, Response):
+            return entry
+
+    return _etag_response(key, *entry)
+
+
+async def cached_json_response_async(key: str, build: Callable[[], Awaitable[Tuple[dict, int]]]) -> Response:
+    """cached_json_response for async views: build is a coroutine function"""
+    entry = _cache_lookup(key)
+
+    if entry is None:
+        entry = _cache_store(key, *await build())
+        if isinstance(entry, Response):
+            return entry
+
+    return _etag_response(key, *entry)
+
+
+def _cache_lookup(key: str) -> Optional[Tuple[str, bytes, Optional[str]]]:
+    """Return (etag, body, body content coding or None) of a cached response, or None on a miss"""
+    entry = get_cache().get(key)
+    if entry is None:
+        return None
+
+    # Entries are b"<etag>[;<encoding>]\n<body>"
+    header, body = entry.split(b'\n', 1)
+    etag, _, encoding = header.decode().partition(';')
+    if encoding and encoding not in SUPPORTED_ENCODINGS:
+        return None  # Stored by a worker with brotli installed; rebuilt here
+
+    return etag, body, encoding or None
+
+
+def _cache_store(key: str, payload: dict, status: int):
+    """
+    Serialize a built payload, caching it when it is a 200 response
+
+    Returns (etag, body, encoding), or a ready Response for non-200 statuses.
+    """
+    body = current_app.json.dumps_bytes(payload)
+
+    if status != 200:
+        return Response(body, status=status, mimetype='application/json')
+
+    etag = hashlib.sha1(body).hexdigest()
+    header = etag
+    encoding = None
+
+    if len(body) >= current_app.config.get('RESPONSE_COMPRESSION_MIN_BYTES', DEFAULT_MIN_BYTES):
+        encoding = SUPPORTED_ENCODINGS[0]
+        body = compress(body, encoding)
+        header = f"{etag};{encoding}"
+
+    ttl = current_app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL_SECONDS)
+    get_cache().set(key, header.encode() + b'\n' + body, ttl)
+    return etag, body, encoding
+
+
+def _etag_response(key: str, etag: str, body: bytes, encoding: Optional[str]) -> Response:
+    # Weak: the same JSON is sent both compressed and uncompressed
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        if encoding is not None and not accepts_encoding(encoding):
+            body, encoding = _encoded_variant(key, etag, body, encoding)
+
+        response = Response(body, status=200, mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+
+    response.set_etag(etag, weak=encoding is not None)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _encoded_variant(key: str, etag: str, body: bytes, encoding: str) -> Tuple[bytes, Optional[str]]:
+    """
+    Re-encode a cached body for a client that does not accept its coding
+
+    Returns (body, encoding or None for identity). The copy is cached under
+    its own key, tagged with the etag it was made from so a copy of an
+    older response is never served.
+    """
+    target = negotiate_encoding()
+    variant_key = f"{key}|{target or 'identity'}"
+    cache = get_cache()
+
+    entry = cache.get(variant_key)
+    if entry is not None:
+        variant_etag, variant = entry.split(b'\n', 1)
+        if variant_etag.decode() == etag:
+            return variant, target
+
+    variant = decompress(body, encoding)
+    if target is not None:
+        variant = compress(variant, target)
+
+    ttl = current_app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL_SECONDS)
+    cache.set(variant_key, etag.encode() + b'\n' + variant, ttl)
+    return variant, target
@@ -0,0 +1,71 @@
+import os
+import threading
+
+# Fixed user every route acts as while auth is disabled for the demo
+DEMO_USER_ID = "00000000-0000-0000-0000-000000000001"
+
+_demo_user_ready = threading.Event()
+_demo_user_lock = threading.Lock()
+
+
+def ensure_demo_user() -> bool:
+    """
+    Make sure the demo user row exists, querying the database at most once
+
+    Returns True once the user is known to exist. Failures are not cached, so
+    a later call retries.
+    """
+    if _demo_user_ready.is_set():
+        return True
+
+    from app.services.supabase_service import get_supabase_client
+
+    with _demo_user_lock:
+        if _demo_user_ready.is_set():
+            return True
+
+        try:
+            supabase = get_supabase_client()
+
+            existing_user = supabase.table('users').select('id').eq('id', DEMO_USER_ID).execute()
+            if not existing_user.data:
+                supabase.table('users').insert({
+                    'id': DEMO_USER_ID,
+                    'email': 'demo@roam.app',
+                    'name': 'Demo User',
+                    'color': '#FF6B6B'
+                }).execute()
+                print("✅ Created demo user in database")
+            else:
+                print("✅ Demo user already exists")
+
+            _demo_user_ready.set()
+            return True
+
+        except Exception as e:
+            print(f"⚠️ Warning: Could not initialize demo user: {str(e)}")
+            return False
+
+
+def _reset_after_fork():
+    """
+    The bootstrap thread may hold the lock in the preloading master; it does
+    not exist in the child, so the child starts unlocked and checks again
+    """
+    global _demo_user_ready, _demo_user_lock
+
+    _demo_user_ready = threading.Event()
+    _demo_user_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def bootstrap_demo_user(app):
+    """Run ensure_demo_user in the background so startup never waits on the database"""
+    def run():
+        with app.app_context():
+            ensure_demo_user()
+
+    threading.Thread(target=run, name='demo-user-bootstrap', daemon=True).start()
@@ -0,0 +1,306 @@
+from collections import OrderedDict, deque
+from flask import current_app
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import queue
+import threading
+import time
+
+# Recent events kept per user, replayed to clients reconnecting with Last-Event-ID
+EVENT_HISTORY_SIZE = 50
+
+# Users whose recent events are kept (least recently active dropped first)
+EVENT_HISTORY_USERS = 10000
+
+# Events buffered per open stream; a stream that falls this far behind is told to resync
+EVENT_QUEUE_SIZE = 256
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class TooManyStreams(Exception):
+    """A stream limit is reached; scope is 'worker' or 'user'"""
+
+    def __init__(self, scope: str):
+        super().__init__(f"Too many open event streams ({scope})")
+        self.scope = scope
+
+
+class _History:
+    """
+    Recent events of one user
+
+    Every event of the user with an id after since is in events; earlier
+    ones may have been dropped.
+    """
+
+    __slots__ = ('events', 'since')
+
+    def __init__(self, since: Optional[Tuple[int, int]]):
+        self.events = deque(maxlen=EVENT_HISTORY_SIZE)
+        self.since = since
+
+
+class Subscription:
+    """One open event stream of a user"""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def deliver(self, event: Dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float) -> Optional[Dict]:
+        """Next event, or None if none arrives within timeout seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MemoryBroker:
+    """
+    In-process pub/sub: events reach streams open on this worker only
+
+    Event ids are '<epoch>-<sequence>': the broker's start time in
+    milliseconds and a counter, so they order correctly within the process
+    and ids from a previous process sort before all new ones.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._history = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = int(time.time() * 1000)
+        self._sequence = 0
+        # Events up to this key may be missing for users without a history
+        self._floor = (self._epoch, 0)
+
+    def next_event_id(self) -> str:
+        with self._lock:
+            self._sequence += 1
+            return f"{self._epoch}-{self._sequence}"
+
+    def publish(self, user_ids: Iterable[str], event: Dict):
+        self.dispatch(user_ids, event)
+
+    def dispatch(self, user_ids: Iterable[str], event: Dict):
+        """Record an event and hand it to the users' open streams"""
+        with self._lock:
+            targets = []
+            for user_id in user_ids:
+                history = self._history.get(user_id)
+                if history is None:
+                    history = self._history[user_id] = _History(self._floor)
+                    if len(self._history) > EVENT_HISTORY_USERS:
+                        _, evicted = self._history.popitem(last=False)
+                        self._raise_floor(event_sort_key(evicted.events[-1]['id']))
+                else:
+                    self._history.move_to_end(user_id)
+
+                if len(history.events) == EVENT_HISTORY_SIZE:
+                    history.since = event_sort_key(history.events[0]['id'])
+                history.events.append(event)
+                targets.extend(self._subscribers.get(user_id, ()))
+
+        for subscription in targets:
+            subscription.deliver(event)
+
+    def _raise_floor(self, key: Tuple[int, int]):
+        if self._floor is not None and key > self._floor:
+            self._floor = key
+
+    def subscribe(self, user_id: str, last_event_id: Optional[str] = None, max_streams: Optional[int] = None,
+                  max_user_streams: Optional[int] = None) -> Tuple[Subscription, List[Dict]]:
+        """
+        Open a stream; returns it with the events missed since last_event_id
+
+        If some of those events are no longer kept (history evicted, too
+        many since, or ids from before this broker started), a sync.required
+        event is returned instead. Raises TooManyStreams when this worker
+        already has max_streams open, or the user max_user_streams.
+        """
+        subscription = Subscription(user_id)
+
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, ())
+            if max_streams is not None and self._stream_count() >= max_streams:
+                raise TooManyStreams('worker')
+            if max_user_streams is not None and len(subscribers) >= max_user_streams:
+                raise TooManyStreams('user')
+
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+
+            if not last_event_id:
+                return subscription, []
+
+            after = event_sort_key(last_event_id)
+            history = self._history.get(user_id)
+            since = history.since if history else self._floor
+            events = list(history.events) if history else []
+
+        if since is None or after < since:
+            required = {'type': 'sync.required', 'data': {}}
+            if events:
+                # After syncing the client is current up to the newest event
+                required['id'] = events[-1]['id']
+            return subscription, [required]
+
+        return subscription, [event for event in events if event_sort_key(event['id']) > after]
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def stream_count(self) -> int:
+        with self._lock:
+            return self._stream_count()
+
+    def _stream_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class RedisBroker(MemoryBroker):
+    """
+    Pub/sub through a Redis channel, for multi-worker deployments
+
+    Every worker publishes to one channel and runs a listener thread that
+    dispatches incoming events to its own open streams (requires the redis
+    package). Event ids come from Redis rather than per-worker clocks: an
+    epoch set once and an INCR sequence, so all workers agree on their order.
+    """
+
+    CHANNEL = 'roam:events'
+    EPOCH_KEY = 'roam:events:epoch'
+    SEQUENCE_KEY = 'roam:events:sequence'
+
+    def __init__(self, url: str):
+        import redis
+
+        super().__init__()
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        # Unknown until the listener is subscribed: reconnecting clients must sync
+        self._floor = None
+
+    def next_event_id(self) -> str:
+        pipeline = self._client.pipeline()
+        pipeline.get(self.EPOCH_KEY)
+        pipeline.incr(self.SEQUENCE_KEY)
+        epoch, sequence = pipeline.execute()
+
+        if epoch is None:
+            self._client.setnx(self.EPOCH_KEY, int(time.time() * 1000))
+            epoch = self._client.get(self.EPOCH_KEY)
+
+        return f"{int(epoch)}-{sequence}"
+
+    def publish(self, user_ids: Iterable[str], event: Dict):
+        self._client.publish(self.CHANNEL, json.dumps({'userIds': list(user_ids), 'event': event}))
+
+    def subscribe(self, user_id: str, last_event_id: Optional[str] = None, max_streams: Optional[int] = None,
+                  max_user_streams: Optional[int] = None) -> Tuple[Subscription, List[Dict]]:
+        self._ensure_listener()
+        return super().subscribe(user_id, last_event_id, max_streams, max_user_streams)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                self._start_history()
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    self.dispatch(payload['userIds'], payload['event'])
+            except Exception as e:
+                print(f"Event listener error, reconnecting: {str(e)}")
+                # Events published while disconnected are lost to this worker
+                with self._lock:
+                    self._history.clear()
+                    self._floor = None
+                time.sleep(1)
+
+    def _start_history(self):
+        """
+        Forget history the listener may have gaps in
+
+        Called once subscribed: events published from now on reach this
+        worker, so every later id is complete.
+        """
+        epoch, sequence = self._client.mget(self.EPOCH_KEY, self.SEQUENCE_KEY)
+        floor = (int(epoch), int(sequence or 0)) if epoch else (int(time.time() * 1000), 0)
+
+        with self._lock:
+            self._history.clear()
+            self._floor = floor
+
+
+def get_event_broker():
+    """Get or create the configured event broker"""
+    global _broker
+
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                redis_url = current_app.config.get('EVENTS_REDIS_URL')
+                _broker = RedisBroker(redis_url) if redis_url else MemoryBroker()
+
+    return _broker
+
+
+def _reset_after_fork():
+    """Streams and the listener thread belong to the parent; the child starts empty"""
+    global _broker, _broker_lock
+
+    _broker = None
+    _broker_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def publish_event(user_ids: Iterable[str], event_type: str, data: Dict):
+    """
+    Push a compact event to the users' open streams
+
+    Called after the write it describes has committed. Never raises: a
+    failed publish only means clients learn of the change on their next sync.
+    """
+    try:
+        broker = get_event_broker()
+        event = {
+            'id': broker.next_event_id(),
+            'type': event_type,
+            'data': data
+        }
+        broker.publish(set(user_ids), event)
+    except Exception as e:
+        print(f"Publish event error: {str(e)}")
+
+
+def event_sort_key(event_id: str) -> Tuple[int, int]:
+    """Order event ids ('<epoch>-<sequence>'); malformed ids sort first"""
+    try:
+        epoch, sequence = event_id.split('-', 1)
+        return int(epoch), int(sequence)
+    except (AttributeError, ValueError):
+        return -1, -1
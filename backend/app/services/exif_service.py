@@ -1,12 +1,38 @@
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
 from datetime import datetime
 from typing import Dict, Optional, Tuple
+from app.services.metadata_parser import read_metadata
 import io
+import re
+
+# Leading bytes of a photo read when only its metadata is needed (a JPEG APP1
+# segment is at most 64KB, plus room for the markers in front of it)
+EXIF_HEADER_BYTES = 128 * 1024
+
+# EXIF date fields in order of preference, each with its matching UTC offset field
+EXIF_DATE_FIELDS = (
+    ('DateTimeOriginal', 'OffsetTimeOriginal'),
+    ('DateTime', 'OffsetTime'),
+    ('DateTimeDigitized', 'OffsetTimeDigitized'),
+)
+
+_UTC_OFFSET = re.compile(r'[+-]\d{2}:\d{2}')
+
 
 def extract_exif_data(image_data: bytes) -> Dict:
-    """Extract EXIF data from image bytes"""
+    """
+    Extract EXIF data from image bytes
+
+    JPEG, HEIC and TIFF-based RAW files are read by the pixel-free
+    metadata parser; other formats fall back to Pillow.
+    """
+    from PIL import Image
+    from PIL.ExifTags import TAGS
+
     try:
+        exif_data = read_metadata(image_data)
+        if exif_data:
+            return _exif_result(exif_data)
+
         image = Image.open(io.BytesIO(image_data))
         exif_data = {}
 
@@ -25,19 +51,7 @@ def extract_exif_data(image_data: bytes) -> Dict:
             tag = TAGS.get(tag_id, tag_id)
             exif_data[tag] = value
 
-        # Extract GPS coordinates
-        coordinates = extract_gps_coordinates(exif_data)
-
-        # Extract capture date
-        capture_date = extract_capture_date(exif_data)
-
-        return {
-            'has_exif': True,
-            'coordinates': coordinates,
-            'capture_date': capture_date,
-            'camera_make': exif_data.get('Make'),
-            'camera_model': exif_data.get('Model')
-        }
+        return _exif_result(exif_data)
 
     except Exception as e:
         print(f"Error extracting EXIF: {str(e)}")
@@ -49,8 +63,50 @@ def extract_exif_data(image_data: bytes) -> Dict:
         }
 
 
+def extract_exif_from_header(header: bytes) -> Dict:
+    """
+    Extract EXIF data from the leading bytes of a photo, without its pixels
+
+    Accepts the start of a JPEG (up to and including its APP1 segment), the
+    start of a HEIC file (through its Exif item), a raw EXIF block
+    ("Exif\\0\\0" + TIFF header) or the header of a TIFF-based RAW file.
+    """
+    exif_data = read_header_tags(header)
+
+    if not exif_data:
+        return {
+            'has_exif': False,
+            'coordinates': None,
+            'capture_date': None
+        }
+
+    return _exif_result(exif_data)
+
+
+def read_header_tags(header: bytes) -> Optional[Dict]:
+    """Raw EXIF tags (name -> value) from photo header bytes, or None if unreadable"""
+    try:
+        return read_metadata(header) or None
+    except Exception as e:
+        print(f"Error extracting EXIF from header: {str(e)}")
+        return None
+
+
+def _exif_result(exif_data: Dict) -> Dict:
+    """Build the metadata response from a tag name -> value dict"""
+    return {
+        'has_exif': True,
+        'coordinates': extract_gps_coordinates(exif_data),
+        'capture_date': extract_capture_date(exif_data),
+        'camera_make': exif_data.get('Make'),
+        'camera_model': exif_data.get('Model')
+    }
+
+
 def extract_gps_coordinates(exif_data: Dict) -> Optional[Dict[str, float]]:
     """Extract GPS coordinates from EXIF data"""
+    from PIL.ExifTags import GPSTAGS
+
     try:
         gps_info = exif_data.get('GPSInfo')
 
@@ -101,14 +157,16 @@ def extract_capture_date(exif_data: Dict) -> Optional[str]:
     """Extract capture date from EXIF data"""
     try:
         # Try different date fields
-        date_fields = ['DateTimeOriginal', 'DateTime', 'DateTimeDigitized']
-
-        for field in date_fields:
+        for field, offset_field in EXIF_DATE_FIELDS:
             date_str = exif_data.get(field)
             if date_str:
                 # Parse format: "2024:10:01 14:30:45"
                 dt = datetime.strptime(date_str, '%Y:%m:%d %H:%M:%S')
-                # Return ISO 8601 format
+
+                # Return ISO 8601 format, with the camera's UTC offset when recorded
+                offset = exif_data.get(offset_field)
+                if isinstance(offset, str) and _UTC_OFFSET.fullmatch(offset):
+                    return dt.isoformat() + offset
                 return dt.isoformat() + 'Z'
 
         return None
@@ -120,6 +178,8 @@ def extract_capture_date(exif_data: Dict) -> Optional[str]:
 
 def create_thumbnail(image_data: bytes, size: Tuple[int, int] = (300, 300)) -> bytes:
     """Create thumbnail from image data"""
+    from PIL import Image
+
     try:
         image = Image.open(io.BytesIO(image_data))
 
@@ -0,0 +1,106 @@
+from typing import Dict, List, Tuple
+import threading
+import time
+
+# Graphs older than this are reloaded, picking up changes made outside the API
+FRIEND_GRAPH_TTL_SECONDS = 60
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def get_friend_graph(user_id: str, supabase) -> Dict[str, Dict]:
+    """
+    Get a user's friendships as an adjacency map, cached in-process
+
+    Returns dict of friend_id -> {'id', 'status', 'is_visible', 'outgoing'}.
+    'outgoing' is True when the user sent the request (owns the row), and
+    'is_visible' is the row's flag, i.e. whether the row owner sees the
+    other user's vacations.
+    """
+    now = time.monotonic()
+
+    with _graphs_lock:
+        cached = _graphs.get(user_id)
+        if cached and now - cached[0] < FRIEND_GRAPH_TTL_SECONDS:
+            return dict(cached[1])
+
+    result = supabase.table('friends').select('*').or_(f'user_id.eq.{user_id},friend_id.eq.{user_id}').execute()
+
+    graph = {}
+    for row in result.data or []:
+        outgoing = row['user_id'] == user_id
+        friend_id = row['friend_id'] if outgoing else row['user_id']
+        graph[friend_id] = _edge(row, outgoing)
+
+    with _graphs_lock:
+        _graphs[user_id] = (now, graph)
+        return dict(graph)
+
+
+def visible_friend_ids(user_id: str, supabase) -> List[str]:
+    """Accepted friends whose vacations the user has chosen to see"""
+    return [
+        friend_id for friend_id, edge in get_friend_graph(user_id, supabase).items()
+        if edge['status'] == 'accepted' and edge['outgoing'] and edge['is_visible']
+    ]
+
+
+def viewer_ids(owner_id: str, supabase) -> List[str]:
+    """Users whose feeds include the owner's vacations"""
+    return [
+        friend_id for friend_id, edge in get_friend_graph(owner_id, supabase).items()
+        if edge['status'] == 'accepted' and not edge['outgoing'] and edge['is_visible']
+    ]
+
+
+def accepted_friends(user_id: str, supabase) -> List[Tuple[str, bool]]:
+    """Accepted friends in both directions as (friend_id, is_visible) pairs"""
+    return [
+        (friend_id, edge['is_visible'] if edge['outgoing'] else True)
+        for friend_id, edge in get_friend_graph(user_id, supabase).items()
+        if edge['status'] == 'accepted'
+    ]
+
+
+def is_friend(user_id: str, friend_id: str, supabase) -> bool:
+    """Whether the two users have an accepted friendship"""
+    edge = get_friend_graph(user_id, supabase).get(friend_id)
+    return edge is not None and edge['status'] == 'accepted'
+
+
+def record_friendship(row: Dict):
+    """Write-through: a friendship row was inserted or updated"""
+    with _graphs_lock:
+        for user_id, other_id, outgoing in ((row['user_id'], row['friend_id'], True),
+                                            (row['friend_id'], row['user_id'], False)):
+            cached = _graphs.get(user_id)
+            if cached:
+                cached[1][other_id] = _edge(row, outgoing)
+
+
+def update_friendship(user_id: str, friend_id: str, **changes):
+    """Write-through: fields of the row owned by user_id (pointing at friend_id) changed"""
+    with _graphs_lock:
+        for a, b in ((user_id, friend_id), (friend_id, user_id)):
+            cached = _graphs.get(a)
+            if cached and b in cached[1]:
+                cached[1][b].update(changes)
+
+
+def remove_friendship(user_id: str, friend_id: str):
+    """Write-through: the friendship between two users was deleted"""
+    with _graphs_lock:
+        for a, b in ((user_id, friend_id), (friend_id, user_id)):
+            cached = _graphs.get(a)
+            if cached:
+                cached[1].pop(b, None)
+
+
+def _edge(row: Dict, outgoing: bool) -> Dict:
+    return {
+        'id': row.get('id'),
+        'status': row.get('status', 'pending'),
+        'is_visible': row.get('is_visible', True),
+        'outgoing': outgoing
+    }
@@ -1,22 +1,37 @@
-import google.generativeai as genai
 from flask import current_app
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence, Tuple
 import json
-from datetime import datetime
-from app.services.geocoding_service import get_location_name, cluster_locations_by_proximity
-import requests
-from PIL import Image
+from datetime import datetime, timezone
+from app.services.geocoding_service import get_location_name, cluster_indices
+from app.services.itinerary_records import Activity, Cluster, Location, LocationSummary, Photo
+from app.services.micro_batcher import MicroBatcher
+from app.services.async_service import run_blocking
+from app.services.tracing import span, traced
+import asyncio
 import io
 
+# google.generativeai, PIL and requests are imported where they are used so
+# that app startup does not pay for loading them.
+
 def initialize_gemini():
     """Initialize Gemini API"""
+    import google.generativeai as genai
+
     api_key = current_app.config['GEMINI_API_KEY']
     genai.configure(api_key=api_key)
-    return genai.GenerativeModel('gemini-2.5-flash')
+    model = genai.GenerativeModel('gemini-2.5-flash')
+
+    # Every model call is a span of the request that makes it
+    model.generate_content = traced('gemini')(model.generate_content)
+    return model
 
 
-def download_image(url: str) -> Image.Image:
+@traced('image_download')
+def download_image(url: str):
     """Download image from URL and return PIL Image"""
+    import requests
+    from PIL import Image
+
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
@@ -26,12 +41,12 @@ def download_image(url: str) -> Image.Image:
         return None
 
 
-def analyze_photos_for_location(photos: List[Dict], location_name: str) -> Dict:
+def analyze_photos_for_location(photos: Sequence[Photo], location_name: str) -> Dict:
     """
     Use Gemini Vision to analyze photos and extract activities
     
     Args:
-        photos: List of photo dicts with imageURL
+        photos: Photos of the location (a list or PhotoBatch)
         location_name: Name of the location
         
     Returns:
@@ -43,9 +58,8 @@ def analyze_photos_for_location(photos: List[Dict], location_name: str) -> Dict:
         # Download up to 5 photos for analysis (to stay within API limits)
         images = []
         for photo in photos[:5]:
-            image_url = photo.get('imageURL') or photo.get('image_url')
-            if image_url:
-                img = download_image(image_url)
+            if photo.image_url:
+                img = download_image(photo.image_url)
                 if img:
                     images.append(img)
         
@@ -125,21 +139,36 @@ Return ONLY valid JSON, no other text."""
         }
 
 
-def generate_itinerary_from_photos(photos_data: List[Dict]) -> Dict:
+def generate_itinerary_from_photos(photos_data: Sequence[Dict]) -> Dict:
+    """
+    Blocking wrapper around generate_itinerary_from_photos_async
+
+    For scripts and other callers without an event loop; async views await
+    the async variant directly.
+    """
+    return asyncio.run(generate_itinerary_from_photos_async(photos_data))
+
+
+async def generate_itinerary_from_photos_async(photos_data: Sequence[Dict]) -> Dict:
     """
     Generate AI itinerary from photos with EXIF data and visual analysis
 
     Args:
-        photos_data: List of dicts with keys: image_url, coordinates, capture_date
+        photos_data: List of dicts with keys: imageURL, coordinates, captureDate
+                     (or a PhotoBatch of them)
 
     Returns:
-        Dict with itinerary text and structured location/activity data
+        Dict with itinerary text and structured locations (Location records)
+
+    Reverse geocoding stays sequential (Nominatim allows about one request
+    per second), but each cluster's vision analysis starts as soon as its
+    name is known, so analyses overlap with each other and with the
+    remaining lookups. The blocking SDK calls run on the shared I/O pool.
     """
     try:
         model = initialize_gemini()
 
-        # Filter photos with coordinates
-        photos_with_location = [p for p in photos_data if p.get('coordinates')]
+        photos_with_location, clusters = _cluster_photos(photos_data)
 
         if not photos_with_location:
             return {
@@ -148,55 +177,32 @@ def generate_itinerary_from_photos(photos_data: List[Dict]) -> Dict:
                 'locations': []
             }
 
-        # Sort photos by capture date
-        photos_with_location.sort(key=lambda x: x.get('capture_date', ''))
+        location_names = []
+        analyses = []
 
-        # Cluster photos by location proximity
-        coordinates_list = [
-            {
-                **p['coordinates'],
-                'photo': p,
-                'capture_date': p.get('capture_date')
-            }
-            for p in photos_with_location
-        ]
+        for cluster in clusters:
+            location_name = await run_blocking(get_location_name, cluster.latitude, cluster.longitude)
+            location_names.append(location_name)
 
-        clusters = cluster_locations_by_proximity(coordinates_list, threshold_km=10.0)
+            cluster_photos = cluster.photos
 
-        # Build location summaries with visual analysis
-        location_summaries = []
+            print(f"🔍 Analyzing {len(cluster_photos)} photos at {location_name}...")
+            analyses.append(asyncio.ensure_future(
+                run_blocking(analyze_photos_for_location, cluster_photos, location_name)
+            ))
 
-        for i, cluster in enumerate(clusters):
-            center = cluster['center']
-            location_name = get_location_name(center['latitude'], center['longitude'])
+        visual_analyses = await asyncio.gather(*analyses)
 
-            dates = [c['capture_date'] for c in cluster['coordinates'] if c.get('capture_date')]
-            photo_count = len(cluster['coordinates'])
-            
-            # Get photos for this cluster
-            cluster_photos = [c['photo'] for c in cluster['coordinates']]
-            
-            # Analyze photos with Gemini Vision to extract activities
-            print(f"🔍 Analyzing {len(cluster_photos)} photos at {location_name}...")
-            visual_analysis = analyze_photos_for_location(cluster_photos, location_name)
-
-            location_summaries.append({
-                'name': location_name,
-                'coordinates': center,
-                'photo_count': photo_count,
-                'dates': dates,
-                'activities': visual_analysis.get('activities', []),
-                'visual_summary': visual_analysis.get('overall_summary')
-            })
-
-        # Create enhanced prompt for Gemini with visual insights
-        prompt = create_enhanced_itinerary_prompt(location_summaries, photos_with_location)
-
-        # Generate itinerary
-        response = model.generate_content(prompt)
+        location_summaries = [
+            _location_summary(cluster, location_name, visual_analysis)
+            for cluster, location_name, visual_analysis in zip(clusters, location_names, visual_analyses)
+        ]
+
+        prompt = create_enhanced_itinerary_prompt(location_summaries, photos_with_location.capture_dates)
+
+        response = await run_blocking(model.generate_content, prompt)
         itinerary_text = response.text
 
-        # Parse structured data with activities from visual analysis
         structured_locations = parse_locations_with_activities(location_summaries, itinerary_text)
 
         return {
@@ -216,34 +222,79 @@ def generate_itinerary_from_photos(photos_data: List[Dict]) -> Dict:
         }
 
 
-def create_enhanced_itinerary_prompt(location_summaries: List[Dict], photos: List[Dict]) -> str:
-    """Create enhanced prompt for Gemini with visual analysis data"""
+def _cluster_photos(photos_data: Sequence[Dict], threshold_km: float = 10.0):
+    """
+    Return (photos with coordinates sorted by capture time, proximity clusters)
+
+    Photos are held as a PhotoBatch (lists of dicts are converted), so
+    coordinates and dates are normalised into arrays once without a dict per
+    photo; sorting uses UTC epoch seconds (so mixed timezone suffixes order
+    correctly) and clustering runs on the coordinate arrays.
+    """
+    from app.services.photo_metadata import PhotoBatch, chronological_order
+    import numpy as np
+
+    photos = photos_data if isinstance(photos_data, PhotoBatch) else PhotoBatch.from_photos(photos_data)
+
+    # Filter photos with coordinates, then sort them by capture time
+    arrays = photos.arrays()
+    located = np.flatnonzero(~np.isnan(arrays.latitude) & ~np.isnan(arrays.longitude))
+    order = located[chronological_order(arrays.epoch[located])]
+    photos_with_location = photos.take(order)
+
+    if not photos_with_location:
+        return photos_with_location, []
+
+    # Cluster photos by location proximity
+    clusters = []
+    for members in cluster_indices(arrays.latitude[order], arrays.longitude[order], threshold_km):
+        cluster_photos = photos_with_location.take(members)
+        clusters.append(Cluster(
+            cluster_photos.latitude[0], cluster_photos.longitude[0],
+            cluster_photos, [d for d in cluster_photos.capture_dates if d]
+        ))
+
+    return photos_with_location, clusters
+
+
+def _location_summary(cluster: Cluster, location_name: str, visual_analysis: Dict) -> LocationSummary:
+    """Location summary fed to the itinerary prompt for one photo cluster"""
+    return LocationSummary(
+        location_name,
+        cluster.latitude,
+        cluster.longitude,
+        len(cluster.photos),
+        cluster.dates,
+        [Activity.from_analysis(a) for a in visual_analysis.get('activities', [])],
+        visual_analysis.get('overall_summary')
+    )
+
+
+def create_enhanced_itinerary_prompt(location_summaries: List[LocationSummary],
+                                     capture_dates: Sequence[Optional[str]]) -> str:
+    """Create enhanced prompt for Gemini with visual analysis data (capture_dates: one per photo)"""
 
     # Build detailed location descriptions with activities from visual analysis
     locations_text = []
     for loc in location_summaries:
-        loc_text = f"\n📍 {loc['name']} ({loc['photo_count']} photos)"
+        loc_text = f"\n📍 {loc.name} ({loc.photo_count} photos)"
         
         # Add activities found from visual analysis
-        if loc.get('activities'):
+        if loc.activities:
             loc_text += "\n   Activities identified:"
-            for activity in loc['activities']:
-                loc_text += f"\n   - {activity['title']}: {activity['description']}"
+            for activity in loc.activities:
+                loc_text += f"\n   - {activity.title}: {activity.description}"
         
-        if loc.get('visual_summary'):
-            loc_text += f"\n   Visual summary: {loc['visual_summary']}"
+        if loc.visual_summary:
+            loc_text += f"\n   Visual summary: {loc.visual_summary}"
             
         locations_text.append(loc_text)
 
     locations_detail = "\n".join(locations_text)
 
     # Get date range
-    dates = [p.get('capture_date') for p in photos if p.get('capture_date')]
-    if dates:
-        dates.sort()
-        start_date = dates[0]
-        end_date = dates[-1]
-    else:
+    start_date, end_date = capture_date_range(capture_dates)
+    if start_date is None:
         start_date = "Unknown"
         end_date = "Unknown"
 
@@ -252,7 +303,7 @@ def create_enhanced_itinerary_prompt(location_summaries: List[Dict], photos: Lis
 Vacation Details:
 - Start Date: {start_date}
 - End Date: {end_date}
-- Total Photos: {len(photos)}
+- Total Photos: {len(capture_dates)}
 
 Locations & Activities (from AI photo analysis):
 {locations_detail}
@@ -281,106 +332,173 @@ Make it read like a professional travel itinerary that someone would get from a
     return prompt
 
 
-def create_itinerary_prompt(location_summaries: List[Dict], photos: List[Dict]) -> str:
+def create_itinerary_prompt(location_summaries: List[LocationSummary], capture_dates: Sequence[Optional[str]]) -> str:
     """Create prompt for Gemini to generate itinerary (fallback)"""
-    return create_enhanced_itinerary_prompt(location_summaries, photos)
+    return create_enhanced_itinerary_prompt(location_summaries, capture_dates)
 
 
-def parse_locations_with_activities(location_summaries: List[Dict], itinerary_text: str) -> List[Dict]:
-    """Convert location summaries with visual analysis into structured data matching iOS model"""
+def parse_locations_with_activities(location_summaries: List[LocationSummary], itinerary_text: str) -> List[Location]:
+    """Convert location summaries with visual analysis into structured locations (see Location.to_api)"""
     import uuid
-    from datetime import datetime, timedelta
 
     locations = []
 
-    for i, loc_summary in enumerate(location_summaries):
-        dates = loc_summary.get('dates', [])
+    for loc_summary in location_summaries:
+        dates = loc_summary.dates
         visit_date = dates[0] if dates else None
 
-        # Use activities from visual analysis if available
-        activities = []
-        if loc_summary.get('activities'):
-            # Generate reasonable times for activities throughout the day
-            for activity_index, activity_data in enumerate(loc_summary['activities']):
-                # If we have photo dates, use them as base times
-                if visit_date:
-                    try:
-                        # Parse visit date
-                        base_date = datetime.fromisoformat(visit_date.replace('Z', '+00:00'))
-                        # Spread activities throughout the day (9 AM, 12 PM, 3 PM, etc.)
-                        hour_offset = 9 + (activity_index * 3)  # Start at 9 AM, then 12 PM, 3 PM, etc.
-                        activity_time = base_date.replace(hour=hour_offset % 24, minute=0, second=0)
-                        activity_time_str = activity_time.isoformat()
-                    except:
-                        activity_time_str = visit_date  # Fallback to visit date
-                else:
-                    activity_time_str = None
-                
-                activities.append({
-                    'id': str(uuid.uuid4()),
-                    'title': activity_data.get('title', 'Activity'),
-                    'description': activity_data.get('description', ''),
-                    'time': activity_time_str,
-                    'aiGenerated': True
-                })
+        # Use activities from visual analysis if available, spread through the day (9 AM, 12 PM, 3 PM, etc.)
+        if loc_summary.activities:
+            activities = _timed_activities(loc_summary.activities, visit_date)
         else:
             # Fallback to basic activity
-            activities = generate_activities_for_location(loc_summary['name'], itinerary_text, visit_date)
-
-        # Generate proper UUID for location
-        location_uuid = str(uuid.uuid4())
-
-        location = {
-            'id': location_uuid,
-            'name': loc_summary['name'],
-            'coordinate': loc_summary['coordinates'],  # iOS expects 'coordinate' (singular)
-            'visitDate': visit_date,
-            'photos': [],
-            'activities': activities,
-            'articles': []
-        }
+            activities = generate_activities_for_location(loc_summary.name, itinerary_text, visit_date)
 
-        locations.append(location)
+        locations.append(Location(
+            str(uuid.uuid4()),
+            loc_summary.name,
+            loc_summary.latitude,
+            loc_summary.longitude,
+            visit_date,
+            activities
+        ))
 
     return locations
 
 
-def parse_locations_from_summary(location_summaries: List[Dict], itinerary_text: str) -> List[Dict]:
-    """Convert location summaries into structured data matching iOS model (fallback)"""
+def parse_locations_from_summary(location_summaries: List[LocationSummary], itinerary_text: str) -> List[Location]:
+    """Convert location summaries into structured locations (fallback)"""
     return parse_locations_with_activities(location_summaries, itinerary_text)
 
 
-def generate_activities_for_location(location_name: str, itinerary_text: str, visit_date: str = None) -> List[Dict]:
+def generate_activities_for_location(location_name: str, itinerary_text: str, visit_date: str = None) -> List[Activity]:
     """Generate activities based on location and itinerary text"""
     import uuid
 
-    # Simple activity extraction from location name
-    activities = []
-
-    # AI-generated activity based on location with proper UUID
-    activities.append({
-        'id': str(uuid.uuid4()),  # Changed to proper UUID
-        'title': f"Explored {location_name}",
-        'description': f"Visited and captured memories in {location_name}",
-        'time': visit_date,  # Use visit date if available
-        'aiGenerated': True
-    })
-
-    return activities
+    # AI-generated activity based on location, timed at the visit date if available
+    return [Activity(
+        f"Explored {location_name}",
+        f"Visited and captured memories in {location_name}",
+        visit_date,
+        str(uuid.uuid4())
+    )]
 
 
 def analyze_single_photo(image_data: bytes) -> Dict:
-    """Analyze a single photo using Gemini vision"""
+    """
+    Analyze a single photo using Gemini vision
+
+    Concurrent calls are coalesced into grouped model calls and identical
+    images are deduplicated by content hash (see _photo_batcher).
+    """
     try:
-        model = initialize_gemini()
+        # Grouped calls run on the batcher's threads, so the wait is what this request spends in Gemini
+        with span('gemini'):
+            return _photo_batcher.submit(image_data).result(timeout=PHOTO_ANALYSIS_TIMEOUT)
+
+    except Exception as e:
+        print(f"Error analyzing photo: {str(e)}")
+        return {
+            'description': None,
+            'analyzed': False,
+            'error': str(e)
+        }
+
+
+def analyze_photos_batch(images_data: List[bytes]) -> List[Dict]:
+    """Analyze many photos, grouping them into as few Gemini calls as possible"""
+    futures = _photo_batcher.submit_many(images_data)
+    results = []
+
+    with span('gemini'):
+        for future in futures:
+            try:
+                results.append(future.result(timeout=PHOTO_ANALYSIS_TIMEOUT))
+            except Exception as e:
+                print(f"Error analyzing photo: {str(e)}")
+                results.append({
+                    'description': None,
+                    'analyzed': False,
+                    'error': str(e)
+                })
+
+    return results
+
+
+def analyze_photo_group(images_data: List[bytes]) -> List[Dict]:
+    """
+    Describe several photos with one Gemini call, returning one result per photo
+
+    Each image is decoded on its own: one that cannot be read gets a failed
+    result and the rest of the group is still sent to the model.
+    """
+    from PIL import Image
 
-        # Convert bytes to PIL Image for Gemini
-        from PIL import Image
-        import io
+    results = [None] * len(images_data)
+    images = []
+    positions = []
 
-        image = Image.open(io.BytesIO(image_data))
+    for i, data in enumerate(images_data):
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except Exception as e:
+            print(f"Error decoding photo: {str(e)}")
+            results[i] = {'description': None, 'analyzed': False, 'error': f"Unreadable image: {str(e)}"}
+            continue
+        images.append(image)
+        positions.append(i)
+
+    if images:
+        for i, result in zip(positions, _describe_images(images)):
+            results[i] = result
+
+    return results
+
+
+def _describe_images(images: List) -> List[Dict]:
+    """Describe decoded images with one Gemini call, one result per image"""
+    model = initialize_gemini()
 
-        prompt = """Describe what you see in this vacation photo. Include:
+    if len(images) == 1:
+        prompt = SINGLE_PHOTO_PROMPT
+    else:
+        prompt = f"""You are given {len(images)} vacation photos, in order. For EACH photo, describe what you see. Include:
+1. Main subjects (people, landmarks, scenery)
+2. Activity or scene type
+3. Mood or atmosphere
+4. Any notable details
+
+Keep each description concise (2-3 sentences).
+
+Return ONLY a JSON array of exactly {len(images)} strings, one description per photo in the same order, no other text."""
+
+    response = model.generate_content([prompt] + images)
+
+    if len(images) == 1:
+        return [{'description': response.text, 'analyzed': True}]
+
+    try:
+        response_text = response.text.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text[7:]
+        if response_text.startswith('```'):
+            response_text = response_text[3:]
+        if response_text.endswith('```'):
+            response_text = response_text[:-3]
+
+        descriptions = json.loads(response_text.strip())
+        if not isinstance(descriptions, list) or len(descriptions) != len(images):
+            raise ValueError(f"expected {len(images)} descriptions")
+    except (json.JSONDecodeError, ValueError) as e:
+        # Fall back to one call per photo rather than mismatching descriptions
+        print(f"⚠️ Grouped photo analysis unusable ({e}), analyzing individually")
+        return [_describe_images([image])[0] for image in images]
+
+    return [{'description': str(d), 'analyzed': True} for d in descriptions]
+
+
+SINGLE_PHOTO_PROMPT = """Describe what you see in this vacation photo. Include:
 1. Main subjects (people, landmarks, scenery)
 2. Activity or scene type
 3. Mood or atmosphere
@@ -388,17 +506,310 @@ def analyze_single_photo(image_data: bytes) -> Dict:
 
 Keep it concise (2-3 sentences)."""
 
-        response = model.generate_content([prompt, image])
+# Seconds a caller waits for its (possibly grouped) analysis
+PHOTO_ANALYSIS_TIMEOUT = 120
+
+# Requests arriving within 50ms of each other share a Gemini call of up to 8 images
+_photo_batcher = MicroBatcher(
+    analyze_photo_group,
+    window_seconds=0.05,
+    max_batch_size=8,
+    should_cache=lambda result: result.get('analyzed', False)
+)
+
+
+def update_itinerary_with_photos(vacation: Dict, existing_locations: List[Dict], existing_photos: List[Dict],
+                                 new_photos: List[Dict], threshold_km: float = 10.0) -> Dict:
+    """
+    Incrementally fold new photos into an existing vacation itinerary
+
+    Only clusters that are new or that add photos to an existing location are
+    geocoded and analyzed. Stored activities are reused for every other
+    location, and only the itinerary days touched by the new photos are
+    regenerated.
+
+    Args:
+        vacation: Vacation row (start_date, end_date, ai_itinerary)
+        existing_locations: Location rows, each with an 'activities' list of activity rows
+        existing_photos: Photo rows already stored for the vacation (location_id, capture_date)
+        new_photos: List of photo dicts (imageURL, captureDate, coordinates) not yet stored
+
+    Returns:
+        Dict with the merged itinerary, new locations, and updated_locations:
+        Location records of existing locations holding only their added
+        activities and photos
+    """
+    try:
+        photos_with_location, clusters = _cluster_photos(new_photos, threshold_km)
+
+        if not photos_with_location:
+            return {
+                'error': 'No photos with location data found',
+                'itinerary': None,
+                'new_locations': [],
+                'updated_locations': []
+            }
+
+        # Match each cluster against the stored locations; unmatched clusters become new locations
+        changed = {}
+        new_clusters = []
+
+        for cluster in clusters:
+            match = _nearest_location(cluster.latitude, cluster.longitude, existing_locations, threshold_km)
+            if match:
+                entry = changed.setdefault(match['id'], (match, []))
+                entry[1].extend(cluster.photos)
+            else:
+                new_clusters.append(cluster)
+
+        # Analyze only the photos that were added to existing locations
+        updated_locations = []
+        for location, cluster_photos in changed.values():
+            print(f"🔍 Analyzing {len(cluster_photos)} new photos at {location['name']}...")
+            visual_analysis = analyze_photos_for_location(cluster_photos, location['name'])
+
+            known_titles = {a['title'].lower() for a in location.get('activities', [])}
+            added = [
+                Activity.from_analysis(a) for a in visual_analysis.get('activities', [])
+                if a.get('title') and a['title'].lower() not in known_titles
+            ]
+
+            dates = [photo.capture_date for photo in cluster_photos if photo.capture_date]
+            visit_date = location.get('visit_date') or (dates[0] if dates else None)
+
+            updated_locations.append(Location(
+                location['id'],
+                location['name'],
+                location['latitude'],
+                location['longitude'],
+                visit_date,
+                _timed_activities(added, visit_date, offset=len(location.get('activities', []))),
+                cluster_photos
+            ))
+
+        # Geocode and analyze clusters that are not near any stored location
+        new_summaries = []
+        for cluster in new_clusters:
+            location_name = get_location_name(cluster.latitude, cluster.longitude)
+
+            print(f"🔍 Analyzing {len(cluster.photos)} photos at {location_name}...")
+            visual_analysis = analyze_photos_for_location(cluster.photos, location_name)
+            new_summaries.append(_location_summary(cluster, location_name, visual_analysis))
+
+        new_locations = parse_locations_with_activities(new_summaries, vacation.get('ai_itinerary') or '')
+        for location, cluster in zip(new_locations, new_clusters):
+            location.photos = list(cluster.photos)
+
+        # Date range of the merged trip
+        new_dates = [d for d in photos_with_location.capture_dates if d]
+        start_date, end_date = capture_date_range([vacation.get('start_date'), vacation.get('end_date')] + new_dates)
+
+        itinerary_text = regenerate_itinerary_days(
+            vacation, existing_locations, existing_photos, updated_locations, new_summaries,
+            new_dates, start_date, end_date
+        )
 
         return {
-            'description': response.text,
-            'analyzed': True
+            'itinerary': itinerary_text,
+            'start_date': start_date,
+            'end_date': end_date,
+            'new_locations': new_locations,
+            'updated_locations': updated_locations
         }
 
     except Exception as e:
-        print(f"Error analyzing photo: {str(e)}")
+        print(f"Error updating itinerary: {str(e)}")
+        import traceback
+        traceback.print_exc()
         return {
-            'description': None,
-            'analyzed': False,
-            'error': str(e)
+            'error': str(e),
+            'itinerary': None,
+            'new_locations': [],
+            'updated_locations': []
         }
+
+
+def regenerate_itinerary_days(vacation: Dict, existing_locations: List[Dict], existing_photos: List[Dict],
+                              updated_locations: List[Location], new_summaries: List[LocationSummary],
+                              new_dates: List[str], start_date: str, end_date: str) -> str:
+    """
+    Rewrite only the itinerary days covered by new photos
+
+    Falls back to regenerating the whole itinerary when the stored text has no
+    "Day N" structure or when the new photos move the trip start earlier
+    (which renumbers every day).
+    """
+    model = initialize_gemini()
+    existing_text = vacation.get('ai_itinerary') or ''
+    preamble, day_blocks = split_itinerary_days(existing_text)
+
+    # Summaries of every location, reusing stored activities for unchanged ones
+    added_by_id = {loc.id: loc for loc in updated_locations}
+    summaries = []
+    for location in existing_locations:
+        added = added_by_id.get(location['id'])
+        added_photos = added.photos if added else []
+        stored_count = sum(1 for p in existing_photos if p.get('location_id') == location['id'])
+        summaries.append(LocationSummary(
+            location['name'],
+            location['latitude'],
+            location['longitude'],
+            stored_count + len(added_photos),
+            ([location['visit_date']] if location.get('visit_date') else [])
+            + [photo.capture_date for photo in added_photos if photo.capture_date],
+            [Activity.from_row(a) for a in location.get('activities', [])] + (added.activities if added else [])
+        ))
+    summaries.extend(new_summaries)
+
+    start_day = _parse_date(start_date)
+    previous_start = _parse_date(vacation.get('start_date'))
+    renumbered = previous_start is not None and start_day is not None and start_day < previous_start
+
+    affected_days = sorted({
+        (_parse_date(d) - start_day).days + 1
+        for d in new_dates
+        if _parse_date(d) is not None and start_day is not None
+    })
+
+    if not day_blocks or renumbered or not affected_days:
+        all_dates = [p.get('capture_date') for p in existing_photos] + new_dates
+        prompt = create_enhanced_itinerary_prompt(summaries, all_dates)
+        return model.generate_content(prompt).text
+
+    # Only the locations visited on an affected day are relevant to the rewrite
+    affected_summaries = [
+        s for s in summaries
+        if any(_parse_date(d) is not None and (_parse_date(d) - start_day).days + 1 in affected_days
+               for d in s.dates)
+    ]
+
+    prompt = create_day_update_prompt(affected_days, affected_summaries, day_blocks, start_date)
+    response = model.generate_content(prompt)
+    _, rewritten = split_itinerary_days(response.text)
+
+    for day in affected_days:
+        if day in rewritten:
+            day_blocks[day] = rewritten[day]
+
+    return join_itinerary_days(preamble, day_blocks)
+
+
+def create_day_update_prompt(days: List[int], location_summaries: List[LocationSummary],
+                             day_blocks: Dict[int, str], start_date: str) -> str:
+    """Create prompt asking Gemini to rewrite specific days of an existing itinerary"""
+
+    locations_text = []
+    for loc in location_summaries:
+        loc_text = f"\n📍 {loc.name} ({loc.photo_count} photos)"
+        if loc.activities:
+            loc_text += "\n   Activities identified:"
+            for activity in loc.activities:
+                loc_text += f"\n   - {activity.title}: {activity.description or ''}"
+        locations_text.append(loc_text)
+
+    current_text = "\n\n".join(day_blocks[d] for d in days if d in day_blocks) or "(these days are not written yet)"
+    day_list = ", ".join(f"Day {d}" for d in days)
+
+    return f"""You are a travel expert updating an existing day-by-day vacation itinerary. New photos were added, so rewrite ONLY these days: {day_list}. Day 1 is {start_date}.
+
+Current text for these days:
+{current_text}
+
+Locations & Activities for these days (from AI photo analysis):
+{"".join(locations_text)}
+
+Write each requested day in this format:
+
+Day N - [Date] - [Location Name]
+Morning: [What they did in the morning]
+Afternoon: [What they did in the afternoon]
+Evening: [What they did in the evening]
+
+IMPORTANT:
+1. Output ONLY the requested days, each starting with "Day N"
+2. Keep the tone enthusiastic and descriptive
+3. Use plain text formatting - NO markdown"""
+
+
+def split_itinerary_days(itinerary_text: str):
+    """Split itinerary text into its preamble and a dict of day number -> day block"""
+    import re
+
+    parts = re.split(r'(?m)^(?=Day\s+\d+\b)', itinerary_text or '')
+    preamble = parts[0] if parts and not re.match(r'Day\s+\d+\b', parts[0]) else ''
+    day_blocks = {}
+
+    for part in parts:
+        match = re.match(r'Day\s+(\d+)\b', part)
+        if match:
+            day_blocks[int(match.group(1))] = part.strip()
+
+    return preamble.strip(), day_blocks
+
+
+def join_itinerary_days(preamble: str, day_blocks: Dict[int, str]) -> str:
+    """Reassemble itinerary text from its preamble and day blocks"""
+    parts = [preamble] if preamble else []
+    parts.extend(day_blocks[day] for day in sorted(day_blocks))
+    return "\n\n".join(parts)
+
+
+def _timed_activities(activities: List[Activity], visit_date: str = None, offset: int = 0) -> List[Activity]:
+    """Assign ids and spread activity times through the day, continuing after offset slots"""
+    import uuid
+
+    timed = []
+    for activity_index, activity in enumerate(activities, start=offset):
+        activity_time_str = None
+        if visit_date:
+            try:
+                base_date = datetime.fromisoformat(visit_date.replace('Z', '+00:00'))
+                activity_time = base_date.replace(hour=(9 + activity_index * 3) % 24, minute=0, second=0)
+                activity_time_str = activity_time.isoformat()
+            except ValueError:
+                activity_time_str = visit_date
+
+        timed.append(Activity(activity.title, activity.description, activity_time_str, str(uuid.uuid4())))
+
+    return timed
+
+
+def _nearest_location(latitude: float, longitude: float, locations: List[Dict], threshold_km: float):
+    """Return the stored location closest to (latitude, longitude) if it is within threshold_km"""
+    from app.utils.helpers import calculate_distance_km
+
+    best = None
+    best_distance = threshold_km
+    for location in locations:
+        distance = calculate_distance_km(latitude, longitude, location['latitude'], location['longitude'])
+        if distance <= best_distance:
+            best = location
+            best_distance = distance
+
+    return best
+
+
+def _parse_date(date_str: str):
+    """Parse an ISO timestamp to a calendar date, or None"""
+    from app.utils.helpers import parse_iso_date
+
+    dt = parse_iso_date(date_str)
+    return dt.date() if dt else None
+
+
+def capture_date_range(capture_dates) -> Tuple[Optional[str], Optional[str]]:
+    """Earliest and latest capture dates by UTC instant, keeping their original strings; (None, None) if there are none"""
+    dates = sorted((d for d in capture_dates if d), key=_date_sort_key)
+    return (dates[0], dates[-1]) if dates else (None, None)
+
+
+def _date_sort_key(date_str: str):
+    """Sort ISO timestamps chronologically regardless of timezone suffix (naive ones count as UTC)"""
+    from app.utils.helpers import parse_iso_date
+
+    dt = parse_iso_date(date_str)
+    if dt is None:
+        return date_str
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat()
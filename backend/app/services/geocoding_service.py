@@ -1,14 +1,31 @@
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 from functools import lru_cache
+from app.services.tracing import traced
 import time
 
-# Initialize geocoder
-geolocator = Nominatim(user_agent="roam-app")
+# Geocoder is created on first use so importing this module stays cheap
+_geolocator = None
+
+
+def get_geolocator():
+    """Get or create the Nominatim geocoder"""
+    global _geolocator
+
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+
+        _geolocator = Nominatim(user_agent="roam-app")
+
+    return _geolocator
+
 
 @lru_cache(maxsize=1000)
+@traced('geocoding')
 def get_location_name(latitude: float, longitude: float) -> str:
     """Convert coordinates to location name using reverse geocoding"""
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+
+    geolocator = get_geolocator()
+
     try:
         # Add small delay to respect rate limits
         time.sleep(0.5)
@@ -51,49 +68,70 @@ def get_location_name(latitude: float, longitude: float) -> str:
 
 def cluster_locations_by_proximity(coordinates_list, threshold_km=5.0):
     """Cluster coordinates that are close to each other"""
-    from math import radians, cos, sin, asin, sqrt
+    import numpy as np
 
-    def haversine(lat1, lon1, lat2, lon2):
-        """Calculate distance between two points on Earth"""
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    latitude = np.array([coord['latitude'] for coord in coordinates_list], dtype=np.float64)
+    longitude = np.array([coord['longitude'] for coord in coordinates_list], dtype=np.float64)
 
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
+    return [
+        {
+            'center': {'latitude': coordinates_list[members[0]]['latitude'],
+                       'longitude': coordinates_list[members[0]]['longitude']},
+            'coordinates': [coordinates_list[i] for i in members]
+        }
+        for members in cluster_indices(latitude, longitude, threshold_km)
+    ]
 
-        # Earth radius in kilometers
-        r = 6371
 
-        return c * r
+def cluster_indices(latitude, longitude, threshold_km=5.0):
+    """
+    Greedy proximity clustering over coordinate arrays
 
-    clusters = []
+    Each point joins the earliest-created cluster whose center (its first
+    point) is within threshold_km, otherwise it starts a new cluster, exactly
+    as a point-by-point pass would. Distances from each new center to all
+    unassigned points are computed in one vectorised step.
 
-    for coord in coordinates_list:
-        lat = coord['latitude']
-        lon = coord['longitude']
+    Returns a list of index arrays, one per cluster, in creation order.
+    """
+    import numpy as np
 
-        # Find if this coordinate belongs to existing cluster
-        found_cluster = False
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    cos_lat = np.cos(lat)
 
-        for cluster in clusters:
-            cluster_lat = cluster['center']['latitude']
-            cluster_lon = cluster['center']['longitude']
+    # Earth radius in kilometers
+    r = 6371
 
-            distance = haversine(lat, lon, cluster_lat, cluster_lon)
+    unassigned = np.arange(len(lat))
+    clusters = []
+
+    while unassigned.size:
+        center = unassigned[0]
 
-            if distance <= threshold_km:
-                cluster['coordinates'].append(coord)
-                found_cluster = True
-                break
+        # Haversine distance from the center to every unassigned point
+        a = (np.sin((lat[unassigned] - lat[center]) / 2) ** 2
+             + cos_lat[center] * cos_lat[unassigned] * np.sin((lon[unassigned] - lon[center]) / 2) ** 2)
+        distance = 2 * r * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
 
-        if not found_cluster:
-            # Create new cluster
-            clusters.append({
-                'center': {'latitude': lat, 'longitude': lon},
-                'coordinates': [coord]
-            })
+        members = distance <= threshold_km
+        members[0] = True
+
+        clusters.append(unassigned[members])
+        unassigned = unassigned[~members]
 
     return clusters
+
+
+def haversine_km(latitude, longitude, center_latitude: float, center_longitude: float):
+    """Great-circle distance in km from one point to many (NumPy arrays)"""
+    import numpy as np
+
+    lat = np.radians(latitude)
+    center_lat = np.radians(center_latitude)
+
+    a = (np.sin((lat - center_lat) / 2) ** 2
+         + np.cos(center_lat) * np.cos(lat) * np.sin((np.radians(longitude) - np.radians(center_longitude)) / 2) ** 2)
+
+    # Earth radius in kilometers
+    return 2 * 6371 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
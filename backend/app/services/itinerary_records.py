@@ -0,0 +1,142 @@
+from typing import Dict, List, Optional
+
+# Records passed through the itinerary pipeline (clustering, vision analysis,
+# prompts, structured locations). Slotted classes keep per-item memory low and
+# attribute access typed; routes convert them to table rows or the iOS JSON
+# shape (to_api) at the boundary.
+
+
+class Photo:
+    """A photo's storage URLs, capture time (ISO string) and position"""
+
+    __slots__ = ('image_url', 'thumbnail_url', 'capture_date', 'latitude', 'longitude')
+
+    def __init__(self, image_url: Optional[str], thumbnail_url: Optional[str] = None,
+                 capture_date: Optional[str] = None, latitude: Optional[float] = None,
+                 longitude: Optional[float] = None):
+        self.image_url = image_url
+        self.thumbnail_url = thumbnail_url
+        self.capture_date = capture_date
+        self.latitude = latitude
+        self.longitude = longitude
+
+    @classmethod
+    def from_api(cls, photo: Dict) -> 'Photo':
+        """From an iOS photo dict (imageURL, thumbnailURL, captureDate, coordinates)"""
+        point = photo.get('coordinates') or {}
+        return cls(
+            photo.get('imageURL'),
+            photo.get('thumbnailURL'),
+            photo.get('captureDate') or photo.get('capture_date'),
+            point.get('latitude'),
+            point.get('longitude')
+        )
+
+    def to_api(self) -> Dict:
+        return {
+            'imageURL': self.image_url,
+            'thumbnailURL': self.thumbnail_url,
+            'captureDate': self.capture_date,
+            'coordinates': {
+                'latitude': self.latitude,
+                'longitude': self.longitude
+            } if self.latitude is not None else None
+        }
+
+
+class Activity:
+    """Something done at a location; id and time are set once it is placed in an itinerary"""
+
+    __slots__ = ('id', 'title', 'description', 'time', 'ai_generated')
+
+    def __init__(self, title: str, description: str = '', time: Optional[str] = None,
+                 id: Optional[str] = None, ai_generated: bool = True):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.time = time
+        self.ai_generated = ai_generated
+
+    @classmethod
+    def from_analysis(cls, activity: Dict) -> 'Activity':
+        """From an activity in a Gemini vision analysis ({'title', 'description'})"""
+        return cls(activity.get('title', 'Activity'), activity.get('description', ''))
+
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Activity':
+        """From an activities table row"""
+        return cls(row['title'], row.get('description') or '', row.get('time'), row.get('id'),
+                   row.get('ai_generated', False))
+
+    def to_api(self) -> Dict:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'time': self.time,
+            'aiGenerated': self.ai_generated
+        }
+
+
+class Cluster:
+    """
+    Photos taken close together, in capture order
+
+    The center is the first photo's position. photos is a PhotoBatch and
+    dates the capture dates of the photos that have one.
+    """
+
+    __slots__ = ('latitude', 'longitude', 'photos', 'dates')
+
+    def __init__(self, latitude: float, longitude: float, photos, dates: List[str]):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.photos = photos
+        self.dates = dates
+
+
+class LocationSummary:
+    """A place as described to the itinerary prompt: name, photo count, dates and activities"""
+
+    __slots__ = ('name', 'latitude', 'longitude', 'photo_count', 'dates', 'activities', 'visual_summary')
+
+    def __init__(self, name: str, latitude: float, longitude: float, photo_count: int, dates: List[str],
+                 activities: List[Activity], visual_summary: Optional[str] = None):
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.photo_count = photo_count
+        self.dates = dates
+        self.activities = activities
+        self.visual_summary = visual_summary
+
+
+class Location:
+    """A location of a generated itinerary, with its activities and the photos assigned to it"""
+
+    __slots__ = ('id', 'name', 'latitude', 'longitude', 'visit_date', 'activities', 'photos')
+
+    def __init__(self, id: str, name: str, latitude: float, longitude: float, visit_date: Optional[str] = None,
+                 activities: Optional[List[Activity]] = None, photos=None):
+        self.id = id
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.visit_date = visit_date
+        self.activities = activities if activities is not None else []
+        self.photos = photos if photos is not None else []
+
+    def to_api(self) -> Dict:
+        """iOS Location shape"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'coordinate': {
+                'latitude': self.latitude,
+                'longitude': self.longitude
+            },
+            'visitDate': self.visit_date,
+            'photos': [photo.to_api() for photo in self.photos],
+            'activities': [activity.to_api() for activity in self.activities],
+            'articles': []
+        }
@@ -0,0 +1,339 @@
+from typing import Dict, Optional
+import struct
+
+# TIFF tags kept, by name as in PIL.ExifTags.TAGS
+TIFF_TAGS = {
+    0x010F: 'Make',
+    0x0110: 'Model',
+    0x0132: 'DateTime',
+    0x9003: 'DateTimeOriginal',
+    0x9004: 'DateTimeDigitized',
+    0x9010: 'OffsetTime',
+    0x9011: 'OffsetTimeOriginal',
+    0x9012: 'OffsetTimeDigitized',
+}
+
+EXIF_IFD_POINTER = 0x8769
+GPS_IFD_POINTER = 0x8825
+
+# GPS tags kept (GPSLatitudeRef .. GPSLongitude), keyed by number as in GPSInfo
+GPS_TAGS = {1, 2, 3, 4}
+
+# TIFF magic numbers: standard (42) plus the Olympus ORF and Panasonic RW2 variants
+TIFF_MAGICS = {42, 0x4F52, 0x5352, 0x55}
+
+# HEIF brands whose files carry an Exif item in the meta box
+HEIF_BRANDS = {b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx', b'mif1', b'msf1', b'avif'}
+
+# Upper bound on entries read from one IFD, against corrupt counts
+MAX_IFD_ENTRIES = 512
+
+# Bytes per value for each TIFF field type
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+
+def read_metadata(data: bytes) -> Optional[Dict]:
+    """
+    Read EXIF tags from a JPEG, HEIF or TIFF-based RAW file (or a prefix of one)
+
+    Only the container structure and the few IFD entries the app uses are
+    read; pixels are never decoded and Pillow is not needed, so HEIC photos
+    that Pillow cannot open keep their location and capture date.
+
+    Returns a dict shaped like the one built from Pillow's _getexif(): tag
+    name -> value, with 'GPSInfo' mapping GPS tag numbers to values. Returns
+    None if the format is not recognised or no EXIF block is present.
+    """
+    block = find_exif_block(data)
+
+    if block is None and _is_heif(data):
+        block = find_heif_exif(data)
+
+    if block is None:
+        return None
+
+    if block[:6] == b'Exif\x00\x00':
+        block = block[6:]
+
+    return parse_tiff(block)
+
+
+def find_exif_block(data: bytes) -> Optional[bytes]:
+    """Locate the EXIF block in a JPEG prefix or raw EXIF/TIFF bytes"""
+    if data[:6] == b'Exif\x00\x00' or _is_tiff(data):
+        return data
+
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+
+        marker = data[pos + 1]
+
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers carry no length
+            pos += 2
+            continue
+
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan: metadata always comes before these
+            return None
+
+        length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return data[pos + 4:pos + 2 + length]
+
+        pos += 2 + length
+
+    return None
+
+
+def find_heif_exif(data: bytes) -> Optional[bytes]:
+    """
+    Locate the Exif item of a HEIF/HEIC file
+
+    Walks ftyp/meta, finds the item of type 'Exif' in iinf, then reads its
+    extent from iloc. The item payload starts with a 4-byte offset to the
+    TIFF header, which is skipped. Returns None if the item is missing or
+    lies beyond the bytes given.
+    """
+    meta = _find_box(data, 0, len(data), b'meta')
+    if meta is None:
+        return None
+
+    # meta is a full box: skip version and flags
+    start, end = meta[0] + 4, meta[1]
+
+    iinf = _find_box(data, start, end, b'iinf')
+    iloc = _find_box(data, start, end, b'iloc')
+    if iinf is None or iloc is None:
+        return None
+
+    item_id = _exif_item_id(data, *iinf)
+    if item_id is None:
+        return None
+
+    extent = _item_extent(data, *iloc, item_id)
+    if extent is None:
+        return None
+
+    offset, length = extent
+    if offset + length > len(data) or length < 4:
+        return None
+
+    payload = data[offset:offset + length]
+    tiff_offset = 4 + int.from_bytes(payload[:4], 'big')
+    return payload[tiff_offset:]
+
+
+def parse_tiff(tiff: bytes) -> Optional[Dict]:
+    """Read the kept tags from IFD0 and its Exif and GPS sub-IFDs"""
+    if not _is_tiff(tiff):
+        return None
+
+    endian = '<' if tiff[:2] == b'II' else '>'
+    ifd0_offset = struct.unpack_from(endian + 'I', tiff, 4)[0]
+
+    tags = {}
+    ifd0 = _read_ifd(tiff, ifd0_offset, endian)
+
+    for tag, value in ifd0.items():
+        if tag in TIFF_TAGS:
+            tags[TIFF_TAGS[tag]] = value
+
+    exif_offset = ifd0.get(EXIF_IFD_POINTER)
+    if isinstance(exif_offset, int):
+        for tag, value in _read_ifd(tiff, exif_offset, endian).items():
+            if tag in TIFF_TAGS:
+                tags[TIFF_TAGS[tag]] = value
+
+    gps_offset = ifd0.get(GPS_IFD_POINTER)
+    if isinstance(gps_offset, int):
+        gps = _read_ifd(tiff, gps_offset, endian)
+        tags['GPSInfo'] = {tag: value for tag, value in gps.items() if tag in GPS_TAGS}
+
+    return tags
+
+
+def _read_ifd(tiff: bytes, offset: int, endian: str) -> Dict:
+    """Decode the entries of one IFD, skipping anything out of bounds"""
+    entries = {}
+
+    try:
+        count = struct.unpack_from(endian + 'H', tiff, offset)[0]
+    except struct.error:
+        return entries
+
+    for i in range(min(count, MAX_IFD_ENTRIES)):
+        entry = offset + 2 + i * 12
+        try:
+            tag, field_type, value_count = struct.unpack_from(endian + 'HHI', tiff, entry)
+        except struct.error:
+            break
+
+        size = _TYPE_SIZES.get(field_type)
+        if size is None:
+            continue
+
+        total = size * value_count
+        if total <= 4:
+            value_offset = entry + 8
+        else:
+            value_offset = struct.unpack_from(endian + 'I', tiff, entry + 8)[0]
+
+        if value_offset + total > len(tiff):
+            continue
+
+        entries[tag] = _decode_value(tiff, value_offset, field_type, value_count, endian)
+
+    return entries
+
+
+def _decode_value(tiff: bytes, offset: int, field_type: int, count: int, endian: str):
+    """Decode a TIFF field the way Pillow presents it (scalars for single values)"""
+    raw = tiff[offset:offset + _TYPE_SIZES[field_type] * count]
+
+    if field_type == 2:
+        return raw.split(b'\x00', 1)[0].decode('latin-1', 'replace')
+
+    if field_type in (1, 7):
+        return raw if field_type == 7 else (raw[0] if count == 1 else tuple(raw))
+
+    if field_type in (5, 10):
+        fmt = 'I' if field_type == 5 else 'i'
+        numbers = struct.unpack(f'{endian}{2 * count}{fmt}', raw)
+        values = tuple(
+            numbers[i] / numbers[i + 1] if numbers[i + 1] else float('nan')
+            for i in range(0, len(numbers), 2)
+        )
+    else:
+        fmt = {3: 'H', 4: 'I', 6: 'b', 8: 'h', 9: 'i', 11: 'f', 12: 'd'}[field_type]
+        values = struct.unpack(f'{endian}{count}{fmt}', raw)
+
+    return values[0] if count == 1 else values
+
+
+def _is_tiff(data: bytes) -> bool:
+    if data[:2] == b'II':
+        endian = '<'
+    elif data[:2] == b'MM':
+        endian = '>'
+    else:
+        return False
+
+    return len(data) >= 8 and struct.unpack_from(endian + 'H', data, 2)[0] in TIFF_MAGICS
+
+
+def _is_heif(data: bytes) -> bool:
+    if data[4:8] != b'ftyp':
+        return False
+
+    size = int.from_bytes(data[:4], 'big')
+    brands = [data[8:12]] + [data[i:i + 4] for i in range(16, min(size, len(data)), 4)]
+    return any(brand in HEIF_BRANDS for brand in brands)
+
+
+def _find_box(data: bytes, start: int, end: int, box_type: bytes):
+    """Return (payload_start, payload_end) of the first child box of the given type"""
+    pos = start
+    while pos + 8 <= end:
+        size = int.from_bytes(data[pos:pos + 4], 'big')
+        header = 8
+
+        if size == 1:
+            size = int.from_bytes(data[pos + 8:pos + 16], 'big')
+            header = 16
+        elif size == 0:
+            size = end - pos
+
+        if size < header:
+            return None
+
+        if data[pos + 4:pos + 8] == box_type:
+            return pos + header, min(pos + size, end)
+
+        pos += size
+
+    return None
+
+
+def _exif_item_id(data: bytes, start: int, end: int) -> Optional[int]:
+    """Find the id of the 'Exif' item in an iinf box payload"""
+    version = data[start]
+    pos = start + 4 + (2 if version == 0 else 4)
+
+    while pos + 8 <= end:
+        size = int.from_bytes(data[pos:pos + 4], 'big')
+        if size < 8:
+            return None
+
+        if data[pos + 4:pos + 8] == b'infe':
+            infe_version = data[pos + 8]
+            if infe_version >= 2:
+                body = pos + 12
+                id_size = 2 if infe_version == 2 else 4
+                item_id = int.from_bytes(data[body:body + id_size], 'big')
+                item_type = data[body + id_size + 2:body + id_size + 6]
+                if item_type == b'Exif':
+                    return item_id
+
+        pos += size
+
+    return None
+
+
+def _item_extent(data: bytes, start: int, end: int, item_id: int):
+    """Return the (file offset, length) of an item's first extent from an iloc box payload"""
+    version = data[start]
+    pos = start + 4
+
+    offset_size = data[pos] >> 4
+    length_size = data[pos] & 0x0F
+    base_offset_size = data[pos + 1] >> 4
+    index_size = data[pos + 1] & 0x0F if version in (1, 2) else 0
+    pos += 2
+
+    def read(size):
+        nonlocal pos
+        value = int.from_bytes(data[pos:pos + size], 'big')
+        pos += size
+        return value
+
+    item_count = read(4 if version == 2 else 2)
+
+    for _ in range(item_count):
+        if pos >= end:
+            return None
+
+        current_id = read(4 if version == 2 else 2)
+
+        construction_method = 0
+        if version in (1, 2):
+            construction_method = read(2) & 0x0F
+
+        read(2)  # data_reference_index
+        base_offset = read(base_offset_size)
+        extent_count = read(2)
+
+        extents = []
+        for _ in range(extent_count):
+            if index_size:
+                read(index_size)
+            extents.append((base_offset + read(offset_size), read(length_size)))
+
+        if current_id == item_id:
+            # Only items stored in the file itself (not in idat or other items) are supported
+            if construction_method != 0 or not extents:
+                return None
+            return extents[0]
+
+    return None
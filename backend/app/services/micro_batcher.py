@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, List
+import hashlib
+import threading
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into grouped calls
+
+    Items submitted within window_seconds of each other are processed together
+    by process_batch (up to max_batch_size per call). Identical payloads are
+    deduplicated by SHA-256: concurrent duplicates share one in-flight future
+    and completed results are kept in a bounded LRU cache.
+    """
+
+    def __init__(self, process_batch: Callable[[List[bytes]], List], window_seconds: float = 0.05,
+                 max_batch_size: int = 8, cache_size: int = 512,
+                 should_cache: Callable[[object], bool] = lambda result: True):
+        self.process_batch = process_batch
+        self.should_cache = should_cache
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._inflight = {}
+        self._results = OrderedDict()
+        self._timer = None
+
+    def submit(self, data: bytes) -> Future:
+        """Queue data for the next batch and return a future for its result"""
+        digest = hashlib.sha256(data).hexdigest()
+        app = _current_app_or_none()
+
+        with self._lock:
+            if digest in self._results:
+                self._results.move_to_end(digest)
+                future = Future()
+                future.set_result(self._results[digest])
+                return future
+
+            if digest in self._inflight:
+                return self._inflight[digest]
+
+            future = Future()
+            self._inflight[digest] = future
+            self._pending.append((digest, data, future, app))
+
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take_pending()
+                threading.Thread(target=self._run, args=(batch,), daemon=True).start()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        return future
+
+    def submit_many(self, items: List[bytes]) -> List[Future]:
+        """Queue several items at once; full batches are dispatched immediately"""
+        return [self.submit(data) for data in items]
+
+    def _take_pending(self):
+        """Detach pending items (lock must be held)"""
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+
+        if self._timer is not None and not self._pending:
+            self._timer.cancel()
+            self._timer = None
+
+        return batch
+
+    def _flush(self):
+        """Timer callback: process whatever accumulated during the window"""
+        with self._lock:
+            self._timer = None
+            batches = []
+            while self._pending:
+                batches.append(self._take_pending())
+
+        for batch in batches:
+            self._run(batch)
+
+    def _run(self, batch):
+        """Process one batch and resolve its futures"""
+        app = next((item[3] for item in batch if item[3] is not None), None)
+
+        try:
+            if app is not None:
+                with app.app_context():
+                    results = self.process_batch([item[1] for item in batch])
+            else:
+                results = self.process_batch([item[1] for item in batch])
+
+            if len(results) != len(batch):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            with self._lock:
+                for digest, _, _, _ in batch:
+                    self._inflight.pop(digest, None)
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            for (digest, _, _, _), result in zip(batch, results):
+                self._inflight.pop(digest, None)
+                if self.should_cache(result):
+                    self._results[digest] = result
+                    self._results.move_to_end(digest)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+        for (_, _, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+def _current_app_or_none():
+    """Return the active Flask app so worker threads can push its context"""
+    from flask import current_app, has_app_context
+
+    return current_app._get_current_object() if has_app_context() else None
@@ -0,0 +1,298 @@
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from app.services.exif_service import EXIF_DATE_FIELDS
+from app.services.itinerary_records import Photo
+import math
+import numpy as np
+
+# Positions of the digits in 'YYYY:MM:DD HH:MM:SS' / 'YYYY-MM-DDTHH:MM:SS'
+_DATETIME_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+
+# Weights turning (degrees, minutes, seconds) rows into decimal degrees
+_DMS_WEIGHTS = np.array([1.0, 1.0 / 60.0, 1.0 / 3600.0])
+
+
+class PhotoArrays(NamedTuple):
+    """
+    Normalised metadata of N photos as parallel arrays
+
+    Missing values are NaN. epoch is the capture time in seconds since the
+    Unix epoch (UTC when the offset is known, otherwise the camera's wall
+    clock read as UTC). utc_offset is the camera's offset from UTC in minutes.
+    """
+    latitude: np.ndarray
+    longitude: np.ndarray
+    epoch: np.ndarray
+    utc_offset: np.ndarray
+
+
+def normalize_exif_batch(tag_dicts: Sequence[Optional[Dict]]) -> PhotoArrays:
+    """
+    Normalise the EXIF tags of many photos at once
+
+    tag_dicts are tag name -> value dicts as returned by read_metadata (None
+    for photos without metadata). Dates use the first of DateTimeOriginal,
+    DateTime and DateTimeDigitized, with the matching OffsetTime* field.
+    """
+    count = len(tag_dicts)
+    dms = np.full((count, 2, 3), np.nan)
+    south = np.zeros(count, dtype=bool)
+    west = np.zeros(count, dtype=bool)
+    dates = [None] * count
+    offsets = [None] * count
+
+    for i, tags in enumerate(tag_dicts):
+        if not tags:
+            continue
+
+        for date_field, offset_field in EXIF_DATE_FIELDS:
+            if tags.get(date_field):
+                dates[i] = tags[date_field]
+                offsets[i] = tags.get(offset_field)
+                break
+
+        gps = tags.get('GPSInfo') or {}
+        lat, lat_ref, lon, lon_ref = gps.get(2), gps.get(1), gps.get(4), gps.get(3)
+
+        if lat and lon and lat_ref and lon_ref and len(lat) == 3 and len(lon) == 3:
+            dms[i, 0] = [float(v) for v in lat]
+            dms[i, 1] = [float(v) for v in lon]
+            south[i] = lat_ref != 'N'
+            west[i] = lon_ref != 'E'
+
+    degrees = dms @ _DMS_WEIGHTS
+    latitude = np.where(south, -degrees[:, 0], degrees[:, 0])
+    longitude = np.where(west, -degrees[:, 1], degrees[:, 1])
+
+    wall_clock = parse_datetimes(dates)
+    utc_offset = parse_utc_offsets(offsets)
+
+    return PhotoArrays(latitude, longitude, _to_epoch(wall_clock, utc_offset), utc_offset)
+
+
+def normalize_photo_batch(photos: Sequence[Dict]) -> PhotoArrays:
+    """
+    Normalise API photo dicts ('coordinates' and ISO 'captureDate') at once
+
+    Accepts both the iOS key (captureDate) and the internal one
+    (capture_date). Offsets are read from a 'Z' or +HH:MM suffix.
+    """
+    coordinates = np.full((len(photos), 2), np.nan)
+    dates = [None] * len(photos)
+
+    for i, photo in enumerate(photos):
+        coordinates[i] = _coordinates(photo.get('coordinates'))
+
+        dates[i] = photo.get('captureDate') or photo.get('capture_date')
+
+    return _iso_photo_arrays(coordinates[:, 0], coordinates[:, 1], dates)
+
+
+def _coordinates(point) -> Tuple[float, float]:
+    """(latitude, longitude) of a 'coordinates' object; NaN when missing, partial or not numbers"""
+    try:
+        return float(point['latitude']), float(point['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return math.nan, math.nan
+
+
+class PhotoBatch:
+    """
+    API photos (imageURL, thumbnailURL, captureDate, coordinates) kept as columns
+
+    Holds the photos of a request compactly: they are appended one at a
+    time, e.g. while the request body is still being parsed, and cost a few
+    references and two floats each instead of two dicts. Indexing builds a
+    Photo record on demand.
+    """
+
+    __slots__ = ('image_urls', 'thumbnail_urls', 'capture_dates', 'latitude', 'longitude')
+
+    def __init__(self):
+        self.image_urls = []
+        self.thumbnail_urls = []
+        self.capture_dates = []
+        self.latitude = array('d')
+        self.longitude = array('d')
+
+    @classmethod
+    def from_photos(cls, photos: Sequence[Dict]) -> 'PhotoBatch':
+        batch = cls()
+        for photo in photos:
+            batch.append(photo)
+        return batch
+
+    def append(self, photo: Dict):
+        """Add a photo dict; coordinates that are missing or not numbers are stored as NaN"""
+        if not isinstance(photo, dict):
+            raise ValueError('Each photo must be an object')
+
+        latitude, longitude = _coordinates(photo.get('coordinates'))
+
+        self.image_urls.append(photo.get('imageURL'))
+        self.thumbnail_urls.append(photo.get('thumbnailURL'))
+        self.capture_dates.append(photo.get('captureDate') or photo.get('capture_date'))
+        self.latitude.append(latitude)
+        self.longitude.append(longitude)
+
+    def __len__(self) -> int:
+        return len(self.image_urls)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        latitude = self.latitude[index]
+        located = not math.isnan(latitude)
+        return Photo(
+            self.image_urls[index],
+            self.thumbnail_urls[index],
+            self.capture_dates[index],
+            latitude if located else None,
+            self.longitude[index] if located else None
+        )
+
+    def __iter__(self) -> Iterator[Photo]:
+        return (self[i] for i in range(len(self)))
+
+    def take(self, indices: Sequence[int]) -> 'PhotoBatch':
+        """New batch of the photos at the given positions, in that order"""
+        batch = PhotoBatch()
+        batch.image_urls = [self.image_urls[i] for i in indices]
+        batch.thumbnail_urls = [self.thumbnail_urls[i] for i in indices]
+        batch.capture_dates = [self.capture_dates[i] for i in indices]
+        batch.latitude = array('d', (self.latitude[i] for i in indices))
+        batch.longitude = array('d', (self.longitude[i] for i in indices))
+        return batch
+
+    def arrays(self) -> PhotoArrays:
+        """Normalised coordinates and capture times, as normalize_photo_batch returns them"""
+        return _iso_photo_arrays(
+            np.array(self.latitude, dtype=np.float64), np.array(self.longitude, dtype=np.float64), self.capture_dates
+        )
+
+    def near(self, latitude: float, longitude: float, degrees: float) -> np.ndarray:
+        """Positions of photos less than degrees away from a point in both latitude and longitude"""
+        lat = np.array(self.latitude, dtype=np.float64)
+        lon = np.array(self.longitude, dtype=np.float64)
+        return np.flatnonzero((np.abs(lat - latitude) < degrees) & (np.abs(lon - longitude) < degrees))
+
+
+def _iso_photo_arrays(latitude: np.ndarray, longitude: np.ndarray, dates: Sequence[Optional[str]]) -> PhotoArrays:
+    """PhotoArrays from coordinate arrays and ISO capture dates"""
+    count = len(dates)
+    wall_clock_dates = [None] * count
+    offsets = [None] * count
+
+    for i, date in enumerate(dates):
+        if isinstance(date, str) and len(date) >= 19:
+            wall_clock_dates[i] = date
+            offsets[i] = date[19:].lstrip('.0123456789')
+
+    wall_clock = parse_datetimes(wall_clock_dates)
+    utc_offset = parse_utc_offsets(offsets)
+
+    return PhotoArrays(latitude, longitude, _to_epoch(wall_clock, utc_offset), utc_offset)
+
+
+def parse_datetimes(values: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Parse 'YYYY:MM:DD HH:MM:SS' (EXIF) or ISO 'YYYY-MM-DDTHH:MM:SS' strings
+
+    Returns wall-clock seconds since the epoch as float64, NaN for missing or
+    invalid values (including EXIF's '0000:00:00 00:00:00' placeholder).
+    """
+    count = len(values)
+    if count == 0:
+        return np.empty(0)
+
+    raw = np.array(
+        [v[:19].encode('ascii', 'replace') if isinstance(v, str) else b'' for v in values],
+        dtype='S19'
+    )
+    chars = raw.view(np.uint8).reshape(count, 19)
+
+    digits = chars[:, _DATETIME_DIGITS].astype(np.int64) - ord('0')
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= np.isin(chars[:, 4], (ord(':'), ord('-'))) & (chars[:, 7] == chars[:, 4])
+    valid &= np.isin(chars[:, 10], (ord(' '), ord('T')))
+    valid &= (chars[:, 13] == ord(':')) & (chars[:, 16] == ord(':'))
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    second = digits[:, 12] * 10 + digits[:, 13]
+
+    valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+
+    # Count days from the first of the month, rejecting days past the month's end
+    month_start = ((np.where(valid, year, 1970) - 1970) * 12 + np.where(valid, month, 1) - 1).astype('datetime64[M]')
+    date = month_start.astype('datetime64[D]') + np.where(valid, day, 1) - 1
+    valid &= date.astype('datetime64[M]') == month_start
+
+    seconds = date.astype(np.int64) * 86400 + hour * 3600 + minute * 60 + second
+    return np.where(valid, seconds.astype(np.float64), np.nan)
+
+
+def parse_utc_offsets(values: Sequence[Optional[str]]) -> np.ndarray:
+    """Parse '+HH:MM' / '-HH:MM' / 'Z' offsets to minutes (float32, NaN if missing)"""
+    count = len(values)
+    if count == 0:
+        return np.empty(0, dtype=np.float32)
+
+    raw = np.array(
+        [('+00:00' if v == 'Z' else v[:6]).encode('ascii', 'replace') if isinstance(v, str) else b'' for v in values],
+        dtype='S6'
+    )
+    chars = raw.view(np.uint8).reshape(count, 6)
+
+    digits = chars[:, [1, 2, 4, 5]].astype(np.int64) - ord('0')
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= np.isin(chars[:, 0], (ord('+'), ord('-'))) & (chars[:, 3] == ord(':'))
+
+    minutes = (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 2] * 10 + digits[:, 3]
+    minutes = np.where(chars[:, 0] == ord('-'), -minutes, minutes)
+    valid &= np.abs(minutes) <= 14 * 60
+
+    return np.where(valid, minutes, np.nan).astype(np.float32)
+
+
+def chronological_order(epoch: np.ndarray) -> np.ndarray:
+    """Indices sorting photos by capture time; undated photos first, ties keep input order"""
+    return np.argsort(np.where(np.isnan(epoch), -np.inf, epoch), kind='stable')
+
+
+def capture_date_strings(arrays: PhotoArrays) -> List[Optional[str]]:
+    """
+    Format capture times as ISO strings in the camera's local time
+
+    Photos with a known offset get it as suffix (+02:00); others keep the
+    historical 'Z' suffix on the wall-clock time.
+    """
+    dated = ~np.isnan(arrays.epoch)
+    has_offset = ~np.isnan(arrays.utc_offset)
+
+    offset_minutes = np.where(has_offset, arrays.utc_offset, 0).astype(np.int64)
+    local = np.where(dated, arrays.epoch, 0).astype(np.int64) + offset_minutes * 60
+    stamps = np.datetime_as_string(local.astype('datetime64[s]'), unit='s')
+
+    results = []
+    for i, stamp in enumerate(stamps):
+        if not dated[i]:
+            results.append(None)
+        elif has_offset[i]:
+            sign = '-' if offset_minutes[i] < 0 else '+'
+            hours, minutes = divmod(abs(int(offset_minutes[i])), 60)
+            results.append(f"{stamp}{sign}{hours:02d}:{minutes:02d}")
+        else:
+            results.append(f"{stamp}Z")
+
+    return results
+
+
+def _to_epoch(wall_clock: np.ndarray, utc_offset: np.ndarray) -> np.ndarray:
+    """Shift wall-clock times to UTC where the offset is known"""
+    return wall_clock - np.where(np.isnan(utc_offset), 0, utc_offset) * 60
@@ -0,0 +1,347 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+from app.services.async_service import read_rows_in
+from app.services.supabase_service import call_optional_rpc
+import bisect
+import math
+import re
+import threading
+import time
+
+# Weight of each field's words, as the A/B/C labels of the Postgres document
+# with ts_rank's default weights (A = 1.0, B = 0.4, C = 0.2)
+FIELD_WEIGHTS = {'title': 1.0, 'location': 1.0, 'activity': 0.4, 'itinerary': 0.2}
+
+# Owners indexed longer ago than this are reloaded, picking up changes made outside the API
+SEARCH_INDEX_TTL_SECONDS = 300
+
+# Vacation columns the index reads
+VACATION_COLUMNS = 'id, user_id, title, start_date, end_date, ai_itinerary'
+
+# Words of a query beyond this are ignored
+MAX_QUERY_TERMS = 8
+
+# BM25 parameters for the local index
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words shown around the first match, and how many of them come before it
+SNIPPET_WORDS = 18
+SNIPPET_LEAD = 4
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased words, split like the Postgres 'simple' configuration"""
+    return _WORD.findall(text.lower()) if text else []
+
+
+def to_tsquery(terms: Sequence[str]) -> str:
+    """Prefix query matching documents that contain every term: 'snork':* & 'bali':*"""
+    return ' & '.join(f"'{term}':*" for term in terms)
+
+
+class Document(NamedTuple):
+    """One vacation as indexed: header, owner, weighted words and display text"""
+    vacation: Dict
+    owner_id: str
+    frequencies: Dict[str, float]
+    length: float
+    body: str
+
+
+def build_document(vacation: Dict, locations: Iterable[Dict], activities: Iterable[Dict]) -> Document:
+    """Index the searchable text of a vacation, its locations and their activities"""
+    names = [location['name'] for location in locations if location.get('name')]
+    activity_texts = [
+        ': '.join(part for part in (activity.get('title'), activity.get('description')) if part)
+        for activity in activities
+    ]
+
+    fields = (
+        ('title', [vacation.get('title') or '']),
+        ('location', names),
+        ('activity', activity_texts),
+        ('itinerary', [vacation.get('ai_itinerary') or ''])
+    )
+
+    frequencies = {}
+    for field, texts in fields:
+        weight = FIELD_WEIGHTS[field]
+        for text in texts:
+            for word in tokenize(text):
+                frequencies[word] = frequencies.get(word, 0.0) + weight
+
+    body = '\n'.join(text for _, texts in fields for text in texts if text)
+
+    return Document(vacation, vacation['user_id'], frequencies, sum(frequencies.values()), body)
+
+
+class SearchIndex:
+    """
+    In-memory inverted index of vacation documents
+
+    Postings map each word to the vacations containing it with a weighted
+    term frequency. The sorted vocabulary answers prefix queries with two
+    binary searches. Documents are replaced one vacation at a time, so
+    writes only touch the words of the vacation that changed.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.documents = {}
+        self.total_length = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, document: Document):
+        """Index a vacation, replacing its previous document"""
+        vacation_id = document.vacation['id']
+
+        with self.lock:
+            self._remove(vacation_id)
+
+            for word, frequency in document.frequencies.items():
+                posting = self.postings.get(word)
+                if posting is None:
+                    posting = self.postings[word] = {}
+                    bisect.insort(self.vocabulary, word)
+                posting[vacation_id] = frequency
+
+            self.documents[vacation_id] = document
+            self.total_length += document.length
+
+    def remove(self, vacation_id: str):
+        with self.lock:
+            self._remove(vacation_id)
+
+    def search(self, terms: Sequence[str], owner_ids: Set[str], limit: int) -> List[Tuple[float, Document]]:
+        """
+        Rank the owners' vacations containing every term (each as a prefix)
+
+        Scores are BM25 over the field-weighted frequencies; a term's
+        frequency in a vacation is the sum over all words it is a prefix of.
+        """
+        with self.lock:
+            count = len(self.documents)
+            if not count or not terms:
+                return []
+
+            average_length = self.total_length / count or 1.0
+            matches = [self._prefix_frequencies(term) for term in terms]
+
+            # Vacations matching the rarest term first, kept if every other term matches too
+            matches.sort(key=len)
+            scores = {}
+
+            for vacation_id in matches[0]:
+                document = self.documents[vacation_id]
+                if document.owner_id not in owner_ids or not all(vacation_id in m for m in matches[1:]):
+                    continue
+
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * document.length / average_length)
+                score = 0.0
+                for m in matches:
+                    frequency = m[vacation_id]
+                    idf = math.log(1 + (count - len(m) + 0.5) / (len(m) + 0.5))
+                    score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                scores[vacation_id] = score
+
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (item[1], self.documents[item[0]].vacation.get('start_date') or ''),
+                reverse=True
+            )
+            return [(score, self.documents[vacation_id]) for vacation_id, score in ranked[:limit]]
+
+    def _prefix_frequencies(self, prefix: str) -> Dict[str, float]:
+        """vacation_id -> summed frequency of every word starting with prefix"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', start)
+
+        frequencies = {}
+        for word in self.vocabulary[start:end]:
+            for vacation_id, frequency in self.postings[word].items():
+                frequencies[vacation_id] = frequencies.get(vacation_id, 0.0) + frequency
+
+        return frequencies
+
+    def _remove(self, vacation_id: str):
+        document = self.documents.pop(vacation_id, None)
+        if document is None:
+            return
+
+        self.total_length -= document.length
+
+        for word in document.frequencies:
+            posting = self.postings[word]
+            posting.pop(vacation_id, None)
+            if not posting:
+                del self.postings[word]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+
+
+# Local index of the owners searched so far, used when search_vacations is not installed
+_index = SearchIndex()
+_loaded_owners = {}
+_stale_vacations = set()
+_state_lock = threading.Lock()
+
+
+def search_vacations(user_ids: Sequence[str], query: str, limit: int, supabase) -> List[Dict]:
+    """
+    Search the given users' vacations by itinerary, activity and location text
+
+    Every word of the query must appear in the vacation, as a prefix of a
+    word. Uses the search_vacations database function (GIN index over a
+    tsvector per vacation, see DATABASE_SCHEMA.md) when installed, otherwise
+    the in-process inverted index. Returns results best first.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms or not user_ids:
+        return []
+
+    rows = call_optional_rpc('search_vacations', {
+        'p_query': to_tsquery(terms), 'p_user_ids': list(user_ids), 'p_limit': limit
+    }, supabase, 'in-process search index')
+
+    if rows is not None:
+        return [_result(row, row['rank'], row.get('snippet')) for row in rows]
+
+    _load_owners(user_ids, supabase)
+    _reload_stale(supabase)
+
+    return [
+        _result(document.vacation, score, snippet(document.body, terms))
+        for score, document in _index.search(terms, set(user_ids), limit)
+    ]
+
+
+def index_vacation(vacation: Dict, locations: Sequence[Dict], activities: Sequence[Dict]):
+    """
+    Update the local index with rows just written for a vacation
+
+    Only owners already in the index are updated; others are loaded in
+    full by their first search.
+    """
+    with _state_lock:
+        if vacation['user_id'] not in _loaded_owners:
+            return
+        _stale_vacations.discard(vacation['id'])
+
+    _index.add(build_document(vacation, locations, activities))
+
+
+def refresh_vacation(vacation_id: str):
+    """Reload a vacation (or drop it, if deleted) from the database on the next local search"""
+    with _state_lock:
+        if _loaded_owners:
+            _stale_vacations.add(vacation_id)
+
+
+def snippet(body: str, terms: Sequence[str]) -> str:
+    """A few words of body around the first match, matches wrapped in <b> like ts_headline"""
+    words = body.split()
+
+    def matches(word):
+        return any(token.startswith(term) for token in tokenize(word) for term in terms)
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, first - SNIPPET_LEAD)
+
+    return ' '.join(
+        f'<b>{word}</b>' if matches(word) else word
+        for word in words[start:start + SNIPPET_WORDS]
+    )
+
+
+def _load_owners(user_ids: Sequence[str], supabase):
+    """Index every vacation of owners not loaded yet (or loaded too long ago)"""
+    now = time.monotonic()
+
+    with _state_lock:
+        missing = [
+            owner_id for owner_id in user_ids
+            if now - _loaded_owners.get(owner_id, -math.inf) >= SEARCH_INDEX_TTL_SECONDS
+        ]
+
+    if not missing:
+        return
+
+    vacations = read_rows_in(
+        lambda: supabase.table('vacations').select(VACATION_COLUMNS), 'user_id', missing
+    )
+
+    with _state_lock:
+        for owner_id in missing:
+            _loaded_owners[owner_id] = now
+
+    current = {v['id'] for v in vacations}
+    for vacation_id, document in list(_index.documents.items()):
+        if document.owner_id in missing and vacation_id not in current:
+            _index.remove(vacation_id)
+
+    _index_vacations(vacations, supabase)
+
+
+def _reload_stale(supabase):
+    """Re-read vacations written since they were indexed, dropping deleted ones"""
+    with _state_lock:
+        stale = list(_stale_vacations)
+        _stale_vacations.clear()
+
+    if not stale:
+        return
+
+    vacations = read_rows_in(lambda: supabase.table('vacations').select(VACATION_COLUMNS), 'id', stale)
+    vacations = [v for v in vacations if v['user_id'] in _loaded_owners]
+
+    found = {v['id'] for v in vacations}
+    for vacation_id in stale:
+        if vacation_id not in found:
+            _index.remove(vacation_id)
+
+    _index_vacations(vacations, supabase)
+
+
+def _index_vacations(vacations: List[Dict], supabase):
+    """Load locations and activities of many vacations, paged and chunked, and index them"""
+    if not vacations:
+        return
+
+    locations = read_rows_in(
+        lambda: supabase.table('locations').select('id, vacation_id, name'),
+        'vacation_id', [v['id'] for v in vacations]
+    )
+    activities = read_rows_in(
+        lambda: supabase.table('activities').select('location_id, title, description'),
+        'location_id', [location['id'] for location in locations]
+    )
+
+    location_vacation = {location['id']: location['vacation_id'] for location in locations}
+    locations_by_vacation = {}
+    activities_by_vacation = {}
+
+    for location in locations:
+        locations_by_vacation.setdefault(location['vacation_id'], []).append(location)
+    for activity in activities:
+        activities_by_vacation.setdefault(location_vacation[activity['location_id']], []).append(activity)
+
+    for vacation in vacations:
+        _index.add(build_document(
+            vacation,
+            locations_by_vacation.get(vacation['id'], []),
+            activities_by_vacation.get(vacation['id'], [])
+        ))
+
+
+def _result(vacation: Dict, rank: float, snippet_text: Optional[str]) -> Dict:
+    return {
+        'vacationId': vacation.get('vacation_id') or vacation['id'],
+        'ownerId': vacation['user_id'],
+        'title': vacation['title'],
+        'startDate': vacation.get('start_date'),
+        'endDate': vacation.get('end_date'),
+        'rank': round(float(rank), 4),
+        'snippet': snippet_text
+    }
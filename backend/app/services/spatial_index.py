@@ -0,0 +1,339 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.services.async_service import read_all_rows, read_rows_in
+from app.services.geocoding_service import haversine_km
+from app.services.supabase_service import call_optional_rpc
+import math
+import threading
+import time
+import numpy as np
+
+# Children per R-tree node; leaves hold this many locations
+NODE_CAPACITY = 32
+
+# Per-owner indexes older than this are rebuilt, picking up changes made outside the API
+SPATIAL_INDEX_TTL_SECONDS = 300
+
+EARTH_RADIUS_KM = 6371.0
+
+# Half the Earth's circumference: no two points are further apart
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+# First search radius of a k-nearest query, multiplied by 4 until k locations are found
+NEAREST_START_RADIUS_KM = 1.0
+
+LOCATION_COLUMNS = 'id, vacation_id, name, latitude, longitude'
+VACATION_COLUMNS = 'id, user_id, title, start_date, end_date'
+
+
+class LocationIndex:
+    """
+    Static R-tree over points, bulk loaded with Sort-Tile-Recursive packing
+
+    Points are sorted into vertical slices by longitude and by latitude
+    within each slice, then packed NODE_CAPACITY at a time. Every level is
+    a set of parallel bounding-box arrays whose node i covers children
+    i * NODE_CAPACITY onwards, so a search is one vectorised pass per level
+    instead of a walk over Python node objects.
+    """
+
+    def __init__(self, latitude: Sequence[float], longitude: Sequence[float], node_capacity: int = NODE_CAPACITY):
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        count = latitude.size
+
+        self.node_capacity = node_capacity
+
+        leaves = max(1, math.ceil(count / node_capacity))
+        slice_size = math.ceil(math.sqrt(leaves)) * node_capacity
+
+        slice_of = np.empty(count, dtype=np.int64)
+        slice_of[np.argsort(longitude, kind='stable')] = np.arange(count) // slice_size
+
+        # order maps tree positions back to the caller's indices
+        self.order = np.lexsort((latitude, slice_of))
+        self.latitude = latitude[self.order]
+        self.longitude = longitude[self.order]
+
+        # Bounding boxes (min_lat, min_lon, max_lat, max_lon) per level, leaves first
+        self.levels = []
+        boxes = (self.latitude, self.longitude, self.latitude, self.longitude)
+        size = count
+
+        while size > 0 and (not self.levels or size > node_capacity):
+            starts = np.arange(0, size, node_capacity)
+            boxes = (
+                np.minimum.reduceat(boxes[0], starts),
+                np.minimum.reduceat(boxes[1], starts),
+                np.maximum.reduceat(boxes[2], starts),
+                np.maximum.reduceat(boxes[3], starts)
+            )
+            self.levels.append(boxes)
+            size = starts.size
+
+    def __len__(self):
+        return self.latitude.size
+
+    def within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Indices of the points inside a box; min_lon > max_lon crosses the antimeridian"""
+        if min_lon > max_lon:
+            positions = np.concatenate((
+                self._search(min_lat, min_lon, max_lat, 180.0),
+                self._search(min_lat, -180.0, max_lat, max_lon)
+            ))
+        else:
+            positions = self._search(min_lat, min_lon, max_lat, max_lon)
+
+        return self.order[positions]
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and distances (km) of the points within radius_km, nearest first"""
+        positions = np.concatenate([
+            self._search(*box) for box in radius_boxes(latitude, longitude, radius_km)
+        ] or [np.empty(0, dtype=np.int64)])
+
+        distance = haversine_km(self.latitude[positions], self.longitude[positions], latitude, longitude)
+        inside = distance <= radius_km
+        positions, distance = positions[inside], distance[inside]
+
+        ranked = np.argsort(distance, kind='stable')
+        return self.order[positions[ranked]], distance[ranked]
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indices and distances (km) of the k points nearest to a location
+
+        Searches a growing radius until it holds k points. Every point
+        outside the radius is further away than every point inside it, so
+        the first k inside are the exact k nearest.
+        """
+        k = min(k, len(self))
+        radius = NEAREST_START_RADIUS_KM
+
+        while k > 0:
+            indices, distance = self.within_radius(latitude, longitude, radius)
+            if indices.size >= k or radius >= MAX_DISTANCE_KM:
+                return indices[:k], distance[:k]
+            radius = min(radius * 4, MAX_DISTANCE_KM)
+
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    def _search(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Tree positions of the points inside a box (no antimeridian handling)"""
+        if not self.levels:
+            return np.empty(0, dtype=np.int64)
+
+        capacity = self.node_capacity
+        offsets = np.arange(capacity)
+        candidates = np.arange(self.levels[-1][0].size)
+
+        for depth in range(len(self.levels) - 1, -1, -1):
+            lo_lat, lo_lon, hi_lat, hi_lon = (b[candidates] for b in self.levels[depth])
+            hit = candidates[(lo_lat <= max_lat) & (hi_lat >= min_lat) & (lo_lon <= max_lon) & (hi_lon >= min_lon)]
+
+            child_count = self.levels[depth - 1][0].size if depth else self.latitude.size
+            candidates = (hit[:, None] * capacity + offsets).ravel()
+            candidates = candidates[candidates < child_count]
+
+        lat = self.latitude[candidates]
+        lon = self.longitude[candidates]
+        return candidates[(lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)]
+
+
+def radius_boxes(latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, float, float, float]]:
+    """
+    Latitude/longitude boxes (min_lat, min_lon, max_lat, max_lon) covering a circle
+
+    Circles reaching a pole cover every longitude; circles crossing the
+    antimeridian are split in two.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    if angle >= math.pi:
+        return [(-90.0, -180.0, 90.0, 180.0)]
+
+    # Small slack so points exactly on the circle survive rounding
+    delta_lat = math.degrees(angle) + 1e-9
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+
+    if min_lat <= -90 or max_lat >= 90:
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+
+    ratio = math.sin(angle) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+
+    delta_lon = math.degrees(math.asin(ratio)) + 1e-9
+    min_lon, max_lon = longitude - delta_lon, longitude + delta_lon
+
+    if min_lon < -180:
+        return [(min_lat, min_lon + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360)]
+
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+class OwnerLocations(NamedTuple):
+    """One user's locations with their vacations and an R-tree over them"""
+    locations: List[Dict]
+    vacations: Dict[str, Dict]
+    index: LocationIndex
+
+
+_owner_indexes = {}
+_owner_indexes_lock = threading.Lock()
+
+
+def get_owner_locations(owner_id: str, supabase) -> OwnerLocations:
+    """Get a user's location index, cached in-process and rebuilt after invalidation"""
+    now = time.monotonic()
+
+    with _owner_indexes_lock:
+        cached = _owner_indexes.get(owner_id)
+        if cached and now - cached[0] < SPATIAL_INDEX_TTL_SECONDS:
+            return cached[1]
+
+    vacations = read_all_rows(lambda: supabase.table('vacations').select(VACATION_COLUMNS).eq('user_id', owner_id))
+    vacations = {v['id']: v for v in vacations}
+
+    locations = read_rows_in(
+        lambda: supabase.table('locations').select(LOCATION_COLUMNS), 'vacation_id', list(vacations)
+    )
+
+    index = LocationIndex(
+        [location['latitude'] for location in locations],
+        [location['longitude'] for location in locations]
+    )
+    owner = OwnerLocations(locations, vacations, index)
+
+    with _owner_indexes_lock:
+        _owner_indexes[owner_id] = (now, owner)
+
+    return owner
+
+
+def invalidate_owner_locations(owner_id: str):
+    """Forget a user's location index after their vacations or locations change"""
+    with _owner_indexes_lock:
+        _owner_indexes.pop(owner_id, None)
+
+
+def nearest_locations(user_ids: Sequence[str], latitude: float, longitude: float, k: int, supabase) -> List[Dict]:
+    """
+    The k locations of the given users' vacations nearest to a point
+
+    Uses the nearest_locations database function (an ordered GIST index
+    scan, see DATABASE_SCHEMA.md) when installed, otherwise each owner's
+    in-process R-tree. Returns API location dicts with distanceKm, nearest first.
+    """
+    rows = call_optional_rpc('nearest_locations', {
+        'p_latitude': latitude, 'p_longitude': longitude, 'p_user_ids': list(user_ids), 'p_limit': k
+    }, supabase, 'in-process spatial index')
+
+    if rows is not None:
+        return [_location(row, row['distance_m'] / 1000) for row in rows]
+
+    candidates = []
+    for owner_id in user_ids:
+        owner = get_owner_locations(owner_id, supabase)
+        indices, distance = owner.index.nearest(latitude, longitude, k)
+        candidates.extend(zip(distance.tolist(), (owner.locations[i] for i in indices.tolist())))
+
+    candidates.sort(key=lambda candidate: candidate[0])
+    return [_location(row, distance) for distance, row in candidates[:k]]
+
+
+def locations_in_bbox(user_ids: Sequence[str], bbox: Sequence[float], limit: int, supabase) -> List[Dict]:
+    """
+    Locations of the given users' vacations inside a box, at most limit of them
+
+    bbox is (minLon, minLat, maxLon, maxLat) as for /api/vacations/pins;
+    minLon > maxLon crosses the antimeridian.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+
+    rows = call_optional_rpc('locations_in_bbox', {
+        'p_min_latitude': min_lat, 'p_min_longitude': min_lon,
+        'p_max_latitude': max_lat, 'p_max_longitude': max_lon,
+        'p_user_ids': list(user_ids), 'p_limit': limit
+    }, supabase, 'in-process spatial index')
+
+    if rows is None:
+        rows = []
+        for owner_id in user_ids:
+            owner = get_owner_locations(owner_id, supabase)
+            indices = owner.index.within(min_lat, min_lon, max_lat, max_lon)
+            rows.extend(owner.locations[i] for i in indices[:limit - len(rows)].tolist())
+            if len(rows) >= limit:
+                break
+
+    return [_location(row) for row in rows[:limit]]
+
+
+def vacations_near(user_ids: Sequence[str], latitude: float, longitude: float, radius_km: float, supabase) -> List[Dict]:
+    """
+    Vacations of the given users with at least one location within radius_km
+
+    Returns dicts with the vacation header, the distance to its nearest
+    location and how many of its locations are inside, nearest first.
+    """
+    rows = call_optional_rpc('vacations_near', {
+        'p_latitude': latitude, 'p_longitude': longitude,
+        'p_radius_m': radius_km * 1000, 'p_user_ids': list(user_ids)
+    }, supabase, 'in-process spatial index')
+
+    if rows is not None:
+        return [
+            _trip(row, row['nearest_distance_m'] / 1000, row['location_count'])
+            for row in rows
+        ]
+
+    trips = []
+    for owner_id in user_ids:
+        owner = get_owner_locations(owner_id, supabase)
+        indices, distance = owner.index.within_radius(latitude, longitude, radius_km)
+
+        # Results are nearest first, so the first hit of a vacation is its nearest location
+        nearest = {}
+        for i, d in zip(indices.tolist(), distance.tolist()):
+            vacation_id = owner.locations[i]['vacation_id']
+            if vacation_id in nearest:
+                nearest[vacation_id][1] += 1
+            else:
+                nearest[vacation_id] = [d, 1]
+
+        trips.extend(
+            _trip(owner.vacations[vacation_id], d, count)
+            for vacation_id, (d, count) in nearest.items()
+        )
+
+    trips.sort(key=lambda trip: trip['nearestDistanceKm'])
+    return trips
+
+
+def _location(row: Dict, distance_km: Optional[float] = None) -> Dict:
+    location = {
+        'id': row['id'],
+        'vacationId': row['vacation_id'],
+        'name': row['name'],
+        'coordinate': {
+            'latitude': row['latitude'],
+            'longitude': row['longitude']
+        }
+    }
+
+    if distance_km is not None:
+        location['distanceKm'] = round(distance_km, 3)
+
+    return location
+
+
+def _trip(vacation: Dict, distance_km: float, location_count: int) -> Dict:
+    return {
+        'vacationId': vacation.get('vacation_id') or vacation['id'],
+        'ownerId': vacation['user_id'],
+        'title': vacation['title'],
+        'startDate': vacation.get('start_date'),
+        'endDate': vacation.get('end_date'),
+        'nearestDistanceKm': round(distance_km, 3),
+        'locationCount': location_count
+    }
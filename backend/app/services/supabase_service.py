@@ -1,35 +1,181 @@
-from supabase import Client
-from flask import current_app
+from flask import current_app, g
+from app.services.token_service import (
+    RevokedTokens, TokenCache, verify_jwt_locally, user_from_claims, decode_claims, token_expiry
+)
+from app.services.tracing import instrument_http_client
+import os
+import threading
 
 _supabase_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_auth_http_client = None
+_token_cache = TokenCache()
+_revoked_tokens = None
 
-def get_supabase_client() -> Client:
-    """Get or create Supabase client singleton"""
-    global _supabase_client
 
-    if _supabase_client is None:
+def get_supabase_client():
+    """
+    Get or create the shared Supabase client for data access
+
+    The client (and its PostgREST / storage HTTP pools) is created once per
+    process under a lock and is safe to share between threads. It always acts
+    with the anon key: never call auth methods that change session state on
+    it, use get_auth_client() instead. After a fork the child process builds
+    its own client rather than reusing the parent's connections.
+    """
+    global _supabase_client, _client_pid
+
+    if _supabase_client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _supabase_client is None or _client_pid != os.getpid():
+                # Imported here so app startup does not load the Supabase SDK
+                from supabase import Client
+
+                url = current_app.config['SUPABASE_URL']
+                key = current_app.config['SUPABASE_KEY']
+
+                try:
+                    # Use Client directly to avoid proxy parameter issue
+                    client = Client(url, key)
+
+                    # Build the lazily created sub-clients now so threads never race on them,
+                    # timing their round trips on traced requests
+                    instrument_http_client(client.postgrest.session, 'supabase')
+                    instrument_http_client(client.storage.session, 'storage')
+                except Exception as e:
+                    print(f"Error creating Supabase client: {str(e)}")
+                    raise e
+
+                _supabase_client = client
+                _client_pid = os.getpid()
+
+    return _supabase_client
+
+
+def get_auth_client():
+    """
+    Get the auth client for the current request
+
+    Each request gets its own lightweight GoTrue client, so sign-in/sign-out
+    session state is never shared between concurrent users. The underlying
+    HTTP connection pool is shared per process.
+    """
+    if 'auth_client' not in g:
+        from gotrue import SyncGoTrueClient
+
         url = current_app.config['SUPABASE_URL']
         key = current_app.config['SUPABASE_KEY']
 
-        try:
-            # Use Client directly to avoid proxy parameter issue
-            _supabase_client = Client(url, key)
-        except Exception as e:
-            print(f"Error creating Supabase client: {str(e)}")
-            raise e
+        g.auth_client = SyncGoTrueClient(
+            url=f"{url}/auth/v1",
+            headers={'apiKey': key, 'Authorization': f'Bearer {key}'},
+            auto_refresh_token=False,
+            persist_session=False,
+            http_client=_get_auth_http_client()
+        )
+
+    return g.auth_client
+
+
+def _get_auth_http_client():
+    """Per-process HTTP pool shared by the per-request auth clients"""
+    global _auth_http_client
+
+    if _auth_http_client is None:
+        with _client_lock:
+            if _auth_http_client is None:
+                from gotrue.http_clients import SyncClient
+
+                _auth_http_client = SyncClient()
+                instrument_http_client(_auth_http_client, 'auth')
+
+    return _auth_http_client
+
+
+def _reset_after_fork():
+    """Drop clients inherited from the parent process (pre-fork servers)"""
+    global _supabase_client, _client_pid, _client_lock, _auth_http_client, _token_cache, _revoked_tokens
+
+    _supabase_client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    _auth_http_client = None
+    _token_cache = TokenCache()
+    _revoked_tokens = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-    return _supabase_client
 
 def verify_token(token: str):
-    """Verify JWT token and return user"""
+    """
+    Verify JWT token and return user
+
+    Logged-out tokens are rejected first (see forget_token). Recently
+    verified tokens are served from an in-memory cache. Otherwise HS256
+    tokens are checked locally with SUPABASE_JWT_SECRET when it is
+    configured, and the auth server is only asked as a fallback.
+    """
+    if token in _get_revoked_tokens():
+        return None
+
+    user = _token_cache.get(token)
+    if user:
+        return user
+
+    secret = current_app.config.get('SUPABASE_JWT_SECRET')
+    if secret:
+        claims = verify_jwt_locally(token, secret)
+        if claims is False:
+            return None
+        if claims:
+            user = user_from_claims(claims)
+            _token_cache.set(token, user, token_expiry(claims))
+            return user
+
     try:
-        supabase = get_supabase_client()
         # Get user from token
-        user = supabase.auth.get_user(token)
-        return user
+        user = get_auth_client().get_user(token)
     except Exception as e:
         return None
 
+    if user:
+        _token_cache.set(token, user, token_expiry(decode_claims(token)))
+
+    return user
+
+
+def forget_token(token: str):
+    """
+    Revoke a token on logout
+
+    Drops it from the verification cache and rejects it until it expires:
+    on every worker when CACHE_REDIS_URL is configured, otherwise in this
+    process only.
+    """
+    _token_cache.discard(token)
+    _get_revoked_tokens().add(token, token_expiry(decode_claims(token)))
+
+
+def _get_revoked_tokens() -> RevokedTokens:
+    """Per-process revocation list, shared through the Redis cache when one is configured"""
+    global _revoked_tokens
+
+    if _revoked_tokens is None:
+        with _client_lock:
+            if _revoked_tokens is None:
+                shared = None
+                if current_app.config.get('CACHE_REDIS_URL'):
+                    from app.services.cache_service import get_cache
+                    shared = get_cache()
+
+                _revoked_tokens = RevokedTokens(shared)
+
+    return _revoked_tokens
+
+
 def get_user_by_id(user_id: str):
     """Get user profile from database"""
     try:
@@ -65,3 +211,55 @@ def get_public_url(bucket: str, file_path: str):
     except Exception as e:
         print(f"Error getting public URL: {str(e)}")
         return None
+
+
+# Error codes meaning a database object is not installed: PostgREST's
+# "not in the schema cache" for functions and tables, and Postgres'
+# undefined_function / undefined_table
+MISSING_OBJECT_CODES = {'PGRST202', 'PGRST205', '42883', '42P01'}
+
+# Optional database functions and tables found to be missing
+_missing_objects = set()
+
+
+def is_missing_object_error(error: Exception) -> bool:
+    """Whether a PostgREST error says the function or table called does not exist"""
+    return getattr(error, 'code', None) in MISSING_OBJECT_CODES
+
+
+def optional_object_available(name: str) -> bool:
+    """False once a call has shown that the optional function or table is not installed"""
+    return name not in _missing_objects
+
+
+def record_optional_failure(name: str, error: Exception, fallback: str = 'in-process fallback'):
+    """
+    Note a failed call to an optional function or table
+
+    Only a missing-object error switches callers to their fallback for the
+    life of the process; any other error (timeouts, connection resets,
+    statement errors) falls back for the failed call only.
+    """
+    if is_missing_object_error(error):
+        print(f"{name} unavailable, using {fallback}: {str(error)}")
+        _missing_objects.add(name)
+    else:
+        print(f"{name} failed, using {fallback} for this call: {str(error)}")
+
+
+def call_optional_rpc(name: str, params: dict, supabase, fallback: str = 'in-process fallback'):
+    """
+    Call a database function that may not be installed
+
+    Returns the result rows, or None when the call failed and the caller
+    should use its fallback (see record_optional_failure).
+    """
+    if not optional_object_available(name):
+        return None
+
+    try:
+        result = supabase.rpc(name, params).execute()
+        return result.data or []
+    except Exception as e:
+        record_optional_failure(name, e, fallback)
+        return None
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Dict, Optional
+import base64
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+
+# Upper bound on how long a verified token is trusted without re-checking
+MAX_CACHE_SECONDS = 300
+
+# Number of recently verified tokens kept in memory
+TOKEN_CACHE_SIZE = 1024
+
+# How long a revoked token without a usable exp claim stays revoked
+# (Supabase's default access token lifetime)
+DEFAULT_REVOCATION_SECONDS = 3600
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens keyed by SHA-256, capped at token expiry"""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, token: str, user, expires_at: Optional[float]):
+        cap = time.time() + MAX_CACHE_SECONDS
+        expires_at = min(expires_at, cap) if expires_at else cap
+
+        with self._lock:
+            self._entries[_token_key(token)] = (user, expires_at)
+            self._entries.move_to_end(_token_key(token))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(_token_key(token), None)
+
+
+class RevokedTokens:
+    """
+    SHA-256 hashes of logged-out tokens, each kept until the token expires
+
+    Always recorded in this process; with a shared cache backend (Redis) the
+    revocation is also written there so every worker rejects the token.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, token: str, expires_at: Optional[float]):
+        now = time.time()
+        expires_at = expires_at or now + DEFAULT_REVOCATION_SECONDS
+        if expires_at <= now:
+            return
+
+        key = _token_key(token)
+        with self._lock:
+            self._entries = {k: exp for k, exp in self._entries.items() if exp > now}
+            self._entries[key] = expires_at
+
+        if self.shared is not None:
+            self.shared.set(f"revoked:{key}", b'1', ttl=math.ceil(expires_at - now))
+
+    def __contains__(self, token: str) -> bool:
+        key = _token_key(token)
+        with self._lock:
+            expires_at = self._entries.get(key)
+        if expires_at is not None and expires_at > time.time():
+            return True
+
+        return self.shared is not None and self.shared.get(f"revoked:{key}") is not None
+
+
+def decode_claims(token: str) -> Optional[Dict]:
+    """Decode a JWT payload without verifying it"""
+    try:
+        _, payload, _ = token.split('.')
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+
+    return claims if isinstance(claims, dict) else None
+
+
+def token_expiry(claims: Optional[Dict]) -> Optional[float]:
+    """The exp claim as epoch seconds, or None when it is missing or not a number"""
+    exp = (claims or {}).get('exp')
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return None
+    return exp
+
+
+def verify_jwt_locally(token: str, secret: str):
+    """
+    Verify an HS256 Supabase JWT with the project's JWT secret
+
+    Returns the claims if the token is valid, False if it is definitely
+    invalid (malformed, bad signature, no numeric exp, expired, wrong
+    audience), or None if it cannot be checked locally (e.g. an asymmetric
+    signing algorithm).
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split('.')
+        header = json.loads(_b64decode(header_b64))
+    except (ValueError, TypeError):
+        return False
+
+    if not isinstance(header, dict):
+        return False
+
+    if header.get('alg') != 'HS256':
+        return None
+
+    expected = hmac.new(secret.encode(), f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+    try:
+        signature = _b64decode(signature_b64)
+    except ValueError:
+        return False
+
+    if not hmac.compare_digest(expected, signature):
+        return False
+
+    claims = decode_claims(token)
+    if not claims or not claims.get('sub'):
+        return False
+
+    expires_at = token_expiry(claims)
+    if expires_at is None or expires_at <= time.time():
+        return False
+
+    audience = claims.get('aud')
+    if audience is not None and 'authenticated' not in (audience if isinstance(audience, list) else [audience]):
+        return False
+
+    return claims
+
+
+def user_from_claims(claims: Dict):
+    """Build an object shaped like gotrue's UserResponse (user.user.id) from JWT claims"""
+    return SimpleNamespace(user=SimpleNamespace(
+        id=claims['sub'],
+        email=claims.get('email'),
+        role=claims.get('role'),
+        user_metadata=claims.get('user_metadata', {}),
+        app_metadata=claims.get('app_metadata', {})
+    ))
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
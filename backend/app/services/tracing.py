@@ -0,0 +1,283 @@
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from flask import current_app, request
+from typing import Dict, Optional
+import functools
+import os
+import random
+import threading
+import time
+
+# Defaults, overridable through app.config
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_LOG_MIN_MS = 1000
+
+# Request durations kept per endpoint for percentiles
+DURATION_WINDOW = 1024
+
+# Stage whose calls are counted as database round trips
+DATABASE_STAGE = 'supabase'
+
+_current_trace = ContextVar('trace', default=None)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+_metrics_since = datetime.now(timezone.utc)
+
+
+class Trace:
+    """
+    Stage timings of one sampled request
+
+    Spans may end on any thread the request fans out to (run_blocking copies
+    the context, so they all see the same Trace), hence the lock.
+    """
+
+    __slots__ = ('started', 'stages', 'status', 'streamed', '_lock')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.status = None
+        self.streamed = False
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, failed: bool = False):
+        """Record one call of a stage: [calls, seconds, errors]"""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = [0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += failed
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the current request, or None when it is not sampled"""
+    return _current_trace.get()
+
+
+class span:
+    """
+    Time a block as one call of stage on the current request's trace
+
+    A no-op when the request is not traced. A block that raises counts as a
+    failed call.
+    """
+
+    __slots__ = ('stage', 'trace', 'started')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.trace = _current_trace.get()
+
+    def __enter__(self):
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is not None:
+            self.trace.add(self.stage, time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+
+def traced(stage: str):
+    """Decorator: time each call of the function as a span of stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_http_client(client, stage: str):
+    """
+    Time every round trip of an httpx client as a span of stage
+
+    Measured from sending the request to receiving the response headers, so
+    each call is one round trip (for PostgREST: one database query). HTTP
+    error statuses count as failed calls.
+    """
+    def on_request(http_request):
+        if _current_trace.get() is not None:
+            http_request.extensions['trace_started'] = time.perf_counter()
+
+    def on_response(http_response):
+        started = http_response.request.extensions.get('trace_started')
+        trace = _current_trace.get()
+        if trace is not None and started is not None:
+            trace.add(stage, time.perf_counter() - started, http_response.status_code >= 400)
+
+    hooks = client.event_hooks
+    client.event_hooks = {
+        'request': hooks['request'] + [on_request],
+        'response': hooks['response'] + [on_response]
+    }
+
+
+def init_tracing(app):
+    """Register the request hooks that start, finish and export traces"""
+    app.before_request(_start_trace)
+    app.after_request(_annotate_response)
+    app.teardown_request(_finish_trace)
+
+
+def _start_trace():
+    rate = current_app.config.get('TRACE_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)
+    _current_trace.set(Trace() if rate >= 1 or random.random() < rate else None)
+
+
+def _annotate_response(response):
+    trace = _current_trace.get()
+    if trace is None:
+        return response
+
+    trace.status = response.status_code
+    trace.streamed = response.is_streamed
+
+    # Stage breakdown for browser dev tools and clients, e.g. "supabase;dur=42.1;desc="4 calls""
+    entries = [
+        f'{stage};dur={seconds * 1000:.1f};desc="{calls} calls"'
+        for stage, (calls, seconds, _) in sorted(trace.stages.items())
+    ]
+    entries.append(f'total;dur={trace.elapsed_ms():.1f}')
+    response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+
+def _finish_trace(error=None):
+    trace = _current_trace.get()
+    if trace is None:
+        return
+
+    # Worker threads are reused: the next request must not inherit this trace
+    _current_trace.set(None)
+
+    # Event streams stay open for minutes; their duration says nothing about latency
+    if trace.streamed:
+        return
+
+    total_ms = trace.elapsed_ms()
+    status = trace.status if trace.status is not None and error is None else 500
+    rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+    endpoint = f"{request.method} {rule}"
+
+    _record(endpoint, status, total_ms, trace.stages)
+
+    if total_ms >= current_app.config.get('TRACE_LOG_MIN_MS', DEFAULT_LOG_MIN_MS):
+        print(f"⏱️ {request.method} {request.path} {status} {total_ms:.0f}ms db={_database_calls(trace.stages)}"
+              f" | {format_stages(trace.stages)}")
+
+
+def format_stages(stages: Dict[str, list]) -> str:
+    """Stages slowest first, e.g. "gemini 31200ms x3 (1 failed), supabase 420ms x7\""""
+    parts = []
+    for stage, (calls, seconds, errors) in sorted(stages.items(), key=lambda item: -item[1][1]):
+        part = f"{stage} {seconds * 1000:.0f}ms x{calls}"
+        if errors:
+            part += f" ({errors} failed)"
+        parts.append(part)
+
+    return ', '.join(parts) or 'no external calls'
+
+
+def _database_calls(stages: Dict[str, list]) -> int:
+    entry = stages.get(DATABASE_STAGE)
+    return entry[0] if entry else 0
+
+
+class _EndpointMetrics:
+    """Running totals of the traced requests of one endpoint"""
+
+    __slots__ = ('requests', 'errors', 'total_ms', 'max_ms', 'durations', 'stages')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.durations = deque(maxlen=DURATION_WINDOW)
+        self.stages = {}
+
+
+def _record(endpoint: str, status: int, total_ms: float, stages: Dict[str, list]):
+    with _metrics_lock:
+        metrics = _metrics.get(endpoint)
+        if metrics is None:
+            metrics = _metrics[endpoint] = _EndpointMetrics()
+
+        metrics.requests += 1
+        metrics.errors += status >= 500
+        metrics.total_ms += total_ms
+        metrics.max_ms = max(metrics.max_ms, total_ms)
+        metrics.durations.append(total_ms)
+
+        for stage, (calls, seconds, errors) in stages.items():
+            totals = metrics.stages.get(stage)
+            if totals is None:
+                totals = metrics.stages[stage] = [0, 0.0, 0]
+            totals[0] += calls
+            totals[1] += seconds
+            totals[2] += errors
+
+
+def metrics_snapshot() -> Dict:
+    """Per-endpoint latency and per-request stage averages of this process's traced requests"""
+    with _metrics_lock:
+        endpoints = {}
+        for endpoint, metrics in _metrics.items():
+            durations = sorted(metrics.durations)
+            requests = metrics.requests
+
+            endpoints[endpoint] = {
+                'requests': requests,
+                'errors': metrics.errors,
+                'ms': {
+                    'mean': round(metrics.total_ms / requests, 1),
+                    'p50': round(durations[len(durations) // 2], 1),
+                    'p95': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 1),
+                    'max': round(metrics.max_ms, 1)
+                },
+                'dbRoundTrips': round(_database_calls(metrics.stages) / requests, 2),
+                # Averages per request
+                'stages': {
+                    stage: {
+                        'calls': round(calls / requests, 2),
+                        'ms': round(seconds * 1000 / requests, 1),
+                        'errors': errors
+                    }
+                    for stage, (calls, seconds, errors) in sorted(metrics.stages.items())
+                }
+            }
+
+    return {
+        'pid': os.getpid(),
+        'since': _metrics_since.isoformat(),
+        'sampleRate': current_app.config.get('TRACE_SAMPLE_RATE', DEFAULT_SAMPLE_RATE),
+        'endpoints': endpoints
+    }
+
+
+def _reset_after_fork():
+    """Each worker reports its own requests"""
+    global _metrics, _metrics_lock, _metrics_since
+
+    _metrics = {}
+    _metrics_lock = threading.Lock()
+    _metrics_since = datetime.now(timezone.utc)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,151 @@
+from typing import Dict, Optional, Sequence, Tuple
+from app.services.photo_metadata import normalize_photo_batch, chronological_order
+from app.services.geocoding_service import cluster_indices, haversine_km
+import numpy as np
+
+# Grid cell size used to find the most frequently visited place (home)
+HOME_CELL_DEGREES = 0.1
+
+# Photos further than this from home count as away
+HOME_RADIUS_KM = 50.0
+
+# A silence longer than this between away photos ends a trip
+MAX_GAP_HOURS = 48.0
+
+# Being back home at least this long between away photos ends a trip
+HOME_DWELL_HOURS = 12.0
+
+# Smallest candidate trip reported
+MIN_TRIP_PHOTOS = 5
+MIN_TRIP_HOURS = 20.0
+
+# Radius of one stop within a trip
+STOP_RADIUS_KM = 10.0
+
+
+def segment_trips(photos: Sequence[Dict], home: Optional[Tuple[float, float]] = None,
+                  max_gap_hours: float = MAX_GAP_HOURS, home_radius_km: float = HOME_RADIUS_KM,
+                  home_dwell_hours: float = HOME_DWELL_HOURS, min_photos: int = MIN_TRIP_PHOTOS,
+                  min_hours: float = MIN_TRIP_HOURS) -> Dict:
+    """
+    Split a camera roll into candidate trips
+
+    Photos are API dicts (id, captureDate, coordinates). Home is inferred as
+    the grid cell photographed on the most distinct days unless given.
+    Located photos are sorted once, then a single vectorised pass over the
+    sorted arrays finds trip boundaries: a gap longer than max_gap_hours
+    between away photos, or a stay at home of at least home_dwell_hours.
+    Dated photos without coordinates are attached to the trip whose time
+    span contains them.
+
+    Returns dict with 'home' and 'trips' (oldest first), each trip carrying
+    its date range, photo ids and stops (proximity clusters with dwell time).
+    """
+    arrays = normalize_photo_batch(photos)
+    dated = ~np.isnan(arrays.epoch)
+    located = dated & ~np.isnan(arrays.latitude) & ~np.isnan(arrays.longitude)
+
+    candidates = np.flatnonzero(located)
+    order = candidates[chronological_order(arrays.epoch[candidates])]
+
+    latitude = arrays.latitude[order]
+    longitude = arrays.longitude[order]
+    epoch = arrays.epoch[order]
+
+    if home is None:
+        home = infer_home(latitude, longitude, epoch)
+
+    if home is None:
+        return {'home': None, 'trips': []}
+
+    distance = haversine_km(latitude, longitude, home[0], home[1])
+    away = np.flatnonzero(distance > home_radius_km)
+
+    trips = []
+
+    if away.size:
+        # Boundaries between consecutive away photos, in one pass over the sorted arrays
+        gap = np.diff(epoch[away])
+        home_between = np.diff(away) > 1
+        breaks = (gap > max_gap_hours * 3600) | (home_between & (gap >= home_dwell_hours * 3600))
+
+        starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+        ends = np.concatenate((starts[1:], [away.size]))
+        duration = epoch[away[ends - 1]] - epoch[away[starts]]
+        keep = (ends - starts >= min_photos) & (duration >= min_hours * 3600)
+
+        # Dated photos without coordinates, sorted by time for range lookups
+        unlocated = np.flatnonzero(dated & ~located)
+        unlocated = unlocated[np.argsort(arrays.epoch[unlocated], kind='stable')]
+        unlocated_epoch = arrays.epoch[unlocated]
+
+        for start, end in zip(starts[keep], ends[keep]):
+            members = away[start:end]
+
+            lo = np.searchsorted(unlocated_epoch, epoch[members[0]], side='left')
+            hi = np.searchsorted(unlocated_epoch, epoch[members[-1]], side='right')
+
+            trips.append(_trip(
+                photos, order[members], latitude[members], longitude[members], epoch[members],
+                distance[members], unlocated[lo:hi], unlocated_epoch[lo:hi]
+            ))
+
+    return {
+        'home': {'latitude': round(float(home[0]), 5), 'longitude': round(float(home[1]), 5)},
+        'trips': trips
+    }
+
+
+def infer_home(latitude: np.ndarray, longitude: np.ndarray, epoch: np.ndarray) -> Optional[Tuple[float, float]]:
+    """Mean position of the grid cell photographed on the most distinct days"""
+    if latitude.size == 0:
+        return None
+
+    cells = np.stack((
+        np.floor(latitude / HOME_CELL_DEGREES),
+        np.floor(longitude / HOME_CELL_DEGREES),
+        np.floor(epoch / 86400)
+    ), axis=1).astype(np.int64)
+
+    # Count each (cell, day) once, then pick the cell seen on the most days
+    cell_days = np.unique(cells, axis=0)
+    visited_cells, day_counts = np.unique(cell_days[:, :2], axis=0, return_counts=True)
+    home_cell = visited_cells[np.argmax(day_counts)]
+
+    in_home = (cells[:, 0] == home_cell[0]) & (cells[:, 1] == home_cell[1])
+    return float(latitude[in_home].mean()), float(longitude[in_home].mean())
+
+
+def _trip(photos: Sequence[Dict], located: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+          epoch: np.ndarray, distance: np.ndarray, unlocated: np.ndarray, unlocated_epoch: np.ndarray) -> Dict:
+    """Describe one candidate trip; located indexes its geotagged photos in time order"""
+    stops = []
+
+    # Clusters come back in order of their first photo, i.e. chronologically
+    for members in cluster_indices(latitude, longitude, STOP_RADIUS_KM):
+        stops.append({
+            'center': {
+                'latitude': round(float(latitude[members].mean()), 5),
+                'longitude': round(float(longitude[members].mean()), 5)
+            },
+            'photoCount': int(members.size),
+            'startDate': _capture_date(photos[located[members[0]]]),
+            'endDate': _capture_date(photos[located[members[-1]]]),
+            'dwellHours': round(float(epoch[members[-1]] - epoch[members[0]]) / 3600, 1)
+        })
+
+    photo_indices = np.concatenate((located, unlocated))
+    photo_indices = photo_indices[np.argsort(np.concatenate((epoch, unlocated_epoch)), kind='stable')]
+
+    return {
+        'startDate': _capture_date(photos[located[0]]),
+        'endDate': _capture_date(photos[located[-1]]),
+        'photoCount': int(photo_indices.size),
+        'photoIds': [photos[i].get('id', int(i)) for i in photo_indices],
+        'maxDistanceKm': round(float(distance.max()), 1),
+        'stops': stops
+    }
+
+
+def _capture_date(photo: Dict) -> Optional[str]:
+    return photo.get('captureDate') or photo.get('capture_date')
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.services.async_service import execute_async, fetch_rows_in
+from app.services.supabase_service import optional_object_available, record_optional_failure
+
+# Version of the vacation response shape. Bump it whenever
+# build_vacation_responses changes its output, so documents built by older
+# code count as stale and are rebuilt on their next read.
+VACATION_DOCUMENT_FORMAT = 1
+
+DOCUMENT_COLUMNS = 'vacation_id, source_version, built_version, format_version, document'
+
+
+async def fetch_vacation_documents(vacation_ids: Sequence[str], supabase) -> Optional[Dict[str, Dict]]:
+    """
+    Read the stored document rows of some vacations
+
+    One query for a single vacation; chunked, paged queries for a feed.
+
+    Returns vacation_id -> row, without entries for vacations that have no
+    row yet, or None when the documents cannot be read and responses must
+    be built from the source tables (see record_optional_failure).
+    """
+    if not optional_object_available('vacation_documents'):
+        return None
+    if not vacation_ids:
+        return {}
+
+    def documents_query():
+        return supabase.table('vacation_documents').select(DOCUMENT_COLUMNS)
+
+    try:
+        if len(vacation_ids) == 1:
+            rows = (await execute_async(documents_query().eq('vacation_id', vacation_ids[0]))).data or []
+        else:
+            rows = await fetch_rows_in(documents_query, 'vacation_id', vacation_ids, order='vacation_id')
+    except Exception as e:
+        record_optional_failure('vacation_documents', e, 'source tables')
+        return None
+
+    return {row['vacation_id']: row for row in rows}
+
+
+def is_current(row: Optional[Dict]) -> bool:
+    """Whether a stored row holds a document built from the latest version of its vacation"""
+    return (
+        row is not None
+        and row.get('document') is not None
+        and row.get('format_version') == VACATION_DOCUMENT_FORMAT
+        and row.get('built_version') == source_version(row)
+    )
+
+
+def source_version(row: Optional[Dict]) -> int:
+    """Version of the vacation's data as of a read of its row (0 before the first write)"""
+    return (row.get('source_version') or 0) if row else 0
+
+
+async def store_vacation_documents(documents: List[Tuple[Dict, Dict, int]], supabase):
+    """
+    Save (vacation, document, version) triples, version being the
+    source_version read before the document was built
+
+    If the vacation changed while its document was being built, the triggers
+    have moved source_version past the stored built_version, so the next read
+    rebuilds it. Never raises: a document that failed to save is rebuilt on
+    its next read.
+    """
+    if not documents or not optional_object_available('vacation_documents'):
+        return
+
+    built_at = datetime.now(timezone.utc).isoformat()
+    rows = [
+        {
+            'vacation_id': vacation['id'],
+            'user_id': vacation['user_id'],
+            'built_version': version,
+            'format_version': VACATION_DOCUMENT_FORMAT,
+            'document': document,
+            'built_at': built_at
+        }
+        for vacation, document, version in documents
+    ]
+
+    try:
+        # source_version is left out: it is only ever moved by the triggers
+        await execute_async(supabase.table('vacation_documents').upsert(rows, on_conflict='vacation_id'))
+    except Exception as e:
+        print(f"Store vacation documents error: {str(e)}")
@@ -0,0 +1,43 @@
+from flask.json.provider import DefaultJSONProvider
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+# Sorted keys like the default provider; dates still go through its
+# http_date conversion instead of orjson's ISO format
+_ORJSON_OPTIONS = (
+    orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+) if orjson else 0
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is installed
+
+    Output is the default provider's compact form (sorted keys, no
+    whitespace), except that non-ASCII text is written as UTF-8 rather than
+    \\u escapes. Values orjson cannot encode natively (dates, Decimal, ...)
+    go through the default provider's conversions. Debug mode keeps the
+    default indented responses.
+    """
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """Serialize obj to UTF-8 JSON bytes, the form response bodies and the cache need"""
+        if orjson is None:
+            return super().dumps(obj, separators=(',', ':')).encode()
+        return orjson.dumps(obj, default=self.default, option=_ORJSON_OPTIONS)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def response(self, *args: Any, **kwargs: Any):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,122 @@
+from typing import Any, BinaryIO, Collection, Iterator, Tuple
+import codecs
+import json
+
+# Bytes read from the stream at a time
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+def iter_json_members(stream: BinaryIO, stream_arrays: Collection[str] = ()) -> Iterator[Tuple[str, Any]]:
+    """
+    Parse a JSON object from a byte stream, yielding (key, value) per member
+
+    Members named in stream_arrays must hold arrays; they are yielded one
+    element at a time as (key, element), so only the element being parsed
+    is held in memory, never the whole array or request body. Other members
+    are yielded whole. Raises ValueError on malformed JSON.
+    """
+    reader = _Reader(stream)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.advance()
+        reader.expect_end()
+        return
+
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError('Object keys must be strings')
+        reader.expect(':')
+
+        if key in stream_arrays:
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.advance()
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.expect(',', ']') == ']':
+                        break
+        else:
+            yield key, reader.value()
+
+        if reader.expect(',', '}') == '}':
+            break
+
+    reader.expect_end()
+
+
+class _Reader:
+    """Text buffer over a UTF-8 byte stream, refilled as values are consumed"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self, size: int = READ_SIZE) -> bool:
+        """Read more of the stream, dropping consumed text; False at the end"""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position:] + self.utf8.decode(chunk, final=self.eof)
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end), without consuming it"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return ''
+
+    def advance(self):
+        self.position += 1
+
+    def expect(self, *tokens: str) -> str:
+        """Consume one of the given punctuation characters and return it"""
+        char = self.peek()
+        if char == '' or char not in tokens:
+            raise ValueError(f"Expected {' or '.join(repr(t) for t in tokens)} at offset {self.position}")
+        self.advance()
+        return char
+
+    def expect_end(self):
+        if self.peek() != '':
+            raise ValueError('Extra data after JSON object')
+
+    def value(self) -> Any:
+        """
+        Decode the next complete JSON value
+
+        A value is only accepted once some text follows it (or the stream
+        has ended), so a number cut off by a chunk boundary is never read
+        short. Incomplete values double the read size before retrying, which
+        keeps a single huge value linear to parse.
+        """
+        self.peek()
+        size = READ_SIZE
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+
+            self.fill(max(size, len(self.buffer) - self.position))
+            size *= 2
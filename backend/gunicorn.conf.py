@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+
+# Production server settings for `gunicorn -c gunicorn.conf.py wsgi:app`.
+# Every value can be overridden through the environment.
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: most request time is spent waiting on Supabase, Gemini
+# and Nominatim, so a few processes with several threads each go a long way.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Itinerary generation makes several Gemini vision calls and can take minutes
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Run create_app() once in the master before forking workers. Clients holding
+# connections are rebuilt per worker after fork (see supabase_service).
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers periodically to bound memory growth from in-process caches
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
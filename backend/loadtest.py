@@ -0,0 +1,99 @@
+"""
+Simple load-test harness for the Roam API
+
+Runs concurrent clients against a running server for a fixed duration and
+reports throughput and latency percentiles per endpoint.
+
+Usage:
+    python loadtest.py --base-url http://localhost:5000 --concurrency 32 --duration 30
+    python loadtest.py --endpoint /api/health --endpoint /api/vacations?fields=summary
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+import argparse
+import itertools
+import threading
+import time
+
+DEFAULT_ENDPOINTS = [
+    '/api/health',
+    '/api/vacations',
+    '/api/vacations?fields=summary&limit=20',
+    '/api/vacations/pins',
+    '/api/friends',
+]
+
+
+def run_client(base_url, endpoints, deadline, token, results, lock):
+    """Issue requests round-robin over the endpoints until the deadline"""
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+    for endpoint in itertools.cycle(endpoints):
+        if time.monotonic() >= deadline:
+            return
+
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(base_url + endpoint, headers=headers), timeout=60) as response:
+                response.read()
+                ok = 200 <= response.status < 400
+        except HTTPError as e:
+            ok = e.code < 500
+        except (URLError, OSError):
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            stats = results.setdefault(endpoint, {'latencies': [], 'errors': 0})
+            stats['latencies'].append(elapsed)
+            if not ok:
+                stats['errors'] += 1
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the Roam API')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--endpoint', action='append', dest='endpoints',
+                        help='GET endpoint to exercise (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds')
+    parser.add_argument('--token', help='Bearer token for authenticated endpoints')
+    args = parser.parse_args()
+
+    endpoints = args.endpoints or DEFAULT_ENDPOINTS
+    results = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    print(f"Running {args.concurrency} clients for {args.duration:.0f}s against {args.base_url}")
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for i in range(args.concurrency):
+            # Stagger the starting endpoint so clients spread across endpoints
+            rotated = endpoints[i % len(endpoints):] + endpoints[:i % len(endpoints)]
+            executor.submit(run_client, args.base_url, rotated, deadline, args.token, results, lock)
+    wall = time.monotonic() - started
+
+    print(f"\n{'endpoint':45} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint in endpoints:
+        stats = results.get(endpoint, {'latencies': [], 'errors': 0})
+        latencies = sorted(stats['latencies'])
+        print(f"{endpoint[:45]:45} {len(latencies):7d} {len(latencies) / wall:8.1f} "
+              f"{percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 95) * 1000:8.1f} "
+              f"{percentile(latencies, 99) * 1000:8.1f} {stats['errors']:7d}")
+
+    total = sum(len(s['latencies']) for s in results.values())
+    print(f"\nTotal: {total} requests, {total / wall:.1f} req/s")
+
+
+if __name__ == '__main__':
+    main()
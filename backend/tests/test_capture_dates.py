@@ -0,0 +1,32 @@
+from app.services.gemini_service import capture_date_range, create_enhanced_itinerary_prompt
+
+
+# Local times sort the other way round from their UTC instants
+MIXED_OFFSETS = [
+    '2024-05-01T09:00:00+09:00',  # 00:00 UTC
+    '2024-04-30T20:00:00-05:00',  # 01:00 UTC on May 1
+    '2024-04-30T23:30:00+00:00',
+    None
+]
+
+
+def test_range_orders_by_utc_instant():
+    assert capture_date_range(MIXED_OFFSETS) == ('2024-04-30T23:30:00+00:00', '2024-04-30T20:00:00-05:00')
+
+
+def test_naive_dates_count_as_utc():
+    assert capture_date_range(['2024-05-01T00:30:00', '2024-05-01T01:00:00+01:00']) == (
+        '2024-05-01T01:00:00+01:00', '2024-05-01T00:30:00'
+    )
+
+
+def test_empty_range():
+    assert capture_date_range([None, '']) == (None, None)
+
+
+def test_prompt_uses_utc_range():
+    prompt = create_enhanced_itinerary_prompt([], MIXED_OFFSETS)
+
+    assert '2024-04-30T23:30:00+00:00' in prompt
+    assert '2024-04-30T20:00:00-05:00' in prompt
+    assert '2024-05-01T09:00:00+09:00' not in prompt
@@ -0,0 +1,200 @@
+"""
+Consistency of materialised vacation documents
+
+The vacation_documents table is emulated in memory, with write() standing in
+for the database triggers that bump source_version, and the source tables
+reduced to one title per vacation.
+"""
+import asyncio
+import copy
+
+import pytest
+
+import app.routes.vacations as vacations
+import app.services.supabase_service as supabase_service
+import app.services.vacation_documents as vacation_documents
+
+
+class MissingTable(Exception):
+    code = '42P01'
+
+
+class StatementTimeout(Exception):
+    code = '57014'
+
+
+class DocumentsQuery:
+    def __init__(self, db):
+        self.db = db
+        self.ids = None
+        self.rows = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.ids = {value}
+        return self
+
+    def in_(self, column, values):
+        self.ids = set(values)
+        return self
+
+    def order(self, columns):
+        return self
+
+    def range(self, start, end):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if self.db.errors:
+            raise self.db.errors.pop(0)
+
+        if self.rows is not None:
+            for row in self.rows:
+                stored = self.db.documents.setdefault(row['vacation_id'], {'source_version': 0})
+                stored.update(copy.deepcopy(row))
+            return Result(self.rows)
+
+        self.db.reads += 1
+        return Result([
+            dict(copy.deepcopy(row), vacation_id=vacation_id)
+            for vacation_id, row in self.db.documents.items()
+            if vacation_id in self.ids
+        ])
+
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.titles = {}
+        self.documents = {}
+        self.errors = []
+        self.reads = 0
+        self.builds = 0
+
+    def table(self, name):
+        assert name == 'vacation_documents'
+        return DocumentsQuery(self)
+
+    def write(self, vacation_id, title):
+        """Change a vacation's source data; the triggers bump its document's source_version"""
+        self.titles[vacation_id] = title
+        document = self.documents.setdefault(vacation_id, {'source_version': 0})
+        document['source_version'] += 1
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+
+    async def build_vacation_responses(rows, supabase, fields='full'):
+        db.builds += 1
+        return [{'id': row['id'], 'title': db.titles[row['id']]} for row in rows]
+
+    monkeypatch.setattr(vacations, 'build_vacation_responses', build_vacation_responses)
+    monkeypatch.setattr(supabase_service, '_missing_objects', set())
+    return db
+
+
+def load(db, *vacation_ids, rebuild=False):
+    rows = [{'id': vacation_id, 'user_id': 'owner'} for vacation_id in vacation_ids]
+    return asyncio.run(vacations.load_vacation_documents(rows, db, rebuild=rebuild))
+
+
+def test_current_document_is_served_without_building(db):
+    db.write('v1', 'Norway')
+    load(db, 'v1')
+
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Norway'}]
+    assert db.builds == 1
+
+
+def test_trigger_version_bump_makes_document_stale(db):
+    db.write('v1', 'Norway')
+    load(db, 'v1')
+
+    db.write('v1', 'Fjords')
+
+    assert not vacation_documents.is_current(db.documents['v1'])
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Fjords'}]
+    assert vacation_documents.is_current(db.documents['v1'])
+    assert db.builds == 2
+
+
+def test_only_stale_documents_are_rebuilt(db):
+    db.write('v1', 'Norway')
+    db.write('v2', 'Japan')
+    load(db, 'v1', 'v2')
+
+    db.write('v2', 'Kyoto')
+
+    assert load(db, 'v1', 'v2') == [{'id': 'v1', 'title': 'Norway'}, {'id': 'v2', 'title': 'Kyoto'}]
+    assert db.builds == 2
+
+
+def test_format_version_bump_rebuilds(db, monkeypatch):
+    db.write('v1', 'Norway')
+    load(db, 'v1')
+
+    monkeypatch.setattr(vacation_documents, 'VACATION_DOCUMENT_FORMAT', vacation_documents.VACATION_DOCUMENT_FORMAT + 1)
+
+    load(db, 'v1')
+    assert db.builds == 2
+    assert db.documents['v1']['format_version'] == vacation_documents.VACATION_DOCUMENT_FORMAT
+
+
+def test_write_during_build_leaves_document_stale(db, monkeypatch):
+    db.write('v1', 'Norway')
+    build = vacations.build_vacation_responses
+
+    async def racing_build(rows, supabase, fields='full'):
+        responses = await build(rows, supabase, fields)
+        db.write('v1', 'Fjords')
+        return responses
+
+    monkeypatch.setattr(vacations, 'build_vacation_responses', racing_build)
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Norway'}]
+    monkeypatch.setattr(vacations, 'build_vacation_responses', build)
+
+    # Saved with the version it was built from, so the concurrent write is not lost
+    assert not vacation_documents.is_current(db.documents['v1'])
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Fjords'}]
+
+
+def test_rebuild_after_api_write(db):
+    db.write('v1', 'Norway')
+    load(db, 'v1')
+
+    db.titles['v1'] = 'Fjords'
+    assert load(db, 'v1', rebuild=True) == [{'id': 'v1', 'title': 'Fjords'}]
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Fjords'}]
+
+
+def test_missing_table_switches_to_source_tables(db):
+    db.titles['v1'] = 'Norway'
+    db.errors = [MissingTable('relation "vacation_documents" does not exist')]
+
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Norway'}]
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Norway'}]
+    assert db.reads == 0
+    assert db.documents == {}
+
+
+def test_transient_error_falls_back_for_one_call(db):
+    db.write('v1', 'Norway')
+    db.errors = [StatementTimeout('canceling statement due to statement timeout')]
+
+    assert load(db, 'v1') == [{'id': 'v1', 'title': 'Norway'}]
+    assert 'document' not in db.documents['v1']
+
+    load(db, 'v1')
+    assert vacation_documents.is_current(db.documents['v1'])
@@ -0,0 +1,7 @@
+from app import create_app
+from run import validate_config
+
+# WSGI entry point for production servers, e.g.:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+validate_config()
+app = create_app()